@@ -5,10 +5,105 @@ import cv2
 import numpy as np
 import os
 
+CALIBRATION_UNIT = 0.001  # Kalibrasyon birimi (kare boyutu mm) -> metre
+
+def square_poses(normalized, marker_length):
+    """Normalize köşelerden (N x 4 x 2) kare markerların pozları: dönmeler N x 3 x 3, ötelemeler N x 3
+    
+    SOLVEPNP_IPPE_SQUARE'in toplu karşılığı (Collins ve Bartoli, IPPE). Kare
+    ile dörtgen arasındaki homografi kapalı çözümle bulunur; marker merkezindeki
+    Jakobiyeninden iki aday dönme, her biri için en küçük kareler ötelemesi
+    hesaplanır ve yeniden izdüşüm hatası küçük olan seçilir. Tüm adımlar
+    marker başına döngü olmadan bileşen dizileri üzerinde yapılır.
+    """
+    u, v = normalized[:, :, 0], normalized[:, :, 1]
+    (x0, x1, x2, x3), (y0, y1, y2, y3) = u.T, v.T
+    
+    # Birim kare (s, t) -> dörtgen homografisi [[a, b, c], [d, e, f], [g, h, 1]]
+    dx1, dx2, dx3 = x1 - x2, x3 - x2, x0 - x1 + x2 - x3
+    dy1, dy2, dy3 = y1 - y2, y3 - y2, y0 - y1 + y2 - y3
+    den = dx1 * dy2 - dy1 * dx2
+    g = (dx3 * dy2 - dy3 * dx2) / den
+    h = (dx1 * dy3 - dy1 * dx3) / den
+    a, b, c = x1 - x0 + g * x1, x3 - x0 + h * x3, x0
+    d, e, f = y1 - y0 + g * y1, y3 - y0 + h * y3, y0
+    
+    # Marker merkezinin (s = t = 0.5) görüntüsü ve (X, Y)'ye göre Jakobiyen; s = X/l + 0.5, t = -Y/l + 0.5
+    w = 0.5 * (g + h) + 1.0
+    px, py = (0.5 * (a + b) + c) / w, (0.5 * (d + e) + f) / w
+    scale = 1.0 / (w * marker_length)
+    J00, J01 = (a - px * g) * scale, (px * h - b) * scale
+    J10, J11 = (d - py * g) * scale, (py * h - e) * scale
+    
+    # Rv: optik ekseni merkezin bakış doğrultusuna çeviren dönme (eksen (-py, px, 0))
+    t = np.hypot(px, py)
+    s = np.sqrt(t * t + 1.0)
+    safe = np.where(t > 0, t, 1.0)
+    kx, ky = px / safe, py / safe
+    cos1, sin = 1.0 - 1.0 / s, t / s
+    Rv = np.stack([1.0 - cos1 * kx * kx, -cos1 * kx * ky, sin * kx,
+                   -cos1 * kx * ky, 1.0 - cos1 * ky * ky, sin * ky,
+                   -sin * kx, -sin * ky, 1.0 / s], axis=1).reshape(-1, 3, 3)
+                   
+    # A = B^-1 J, B = Rv[:2, :2] - p Rv[2, :2]
+    B00, B01 = Rv[:, 0, 0] + px * sin * kx, Rv[:, 0, 1] + px * sin * ky
+    B10, B11 = Rv[:, 1, 0] + py * sin * kx, Rv[:, 1, 1] + py * sin * ky
+    inverse = 1.0 / (B00 * B11 - B01 * B10)
+    A00, A01 = (B11 * J00 - B01 * J10) * inverse, (B11 * J01 - B01 * J11) * inverse
+    A10, A11 = (B00 * J10 - B10 * J00) * inverse, (B00 * J11 - B10 * J01) * inverse
+    
+    # A = gamma * R22; R22, dönmenin sol üst 2 x 2 bloğu
+    P, Q, M = A00 * A00 + A01 * A01, A10 * A10 + A11 * A11, A00 * A10 + A01 * A11
+    gamma = np.sqrt(0.5 * (P + Q + np.sqrt((P - Q) ** 2 + 4.0 * M * M)))
+    r00, r01, r10, r11 = A00 / gamma, A01 / gamma, A10 / gamma, A11 / gamma
+    b0 = np.sqrt(np.maximum(0.0, 1.0 - r00 * r00 - r10 * r10))
+    b1 = np.sqrt(np.maximum(0.0, 1.0 - r01 * r01 - r11 * r11))
+    b1 = np.where(r00 * r01 + r10 * r11 > 0, -b1, b1)
+    c0, c1, c2 = r10 * b1 - b0 * r11, b0 * r01 - r00 * b1, r00 * r11 - r10 * r01
+    candidates = np.stack([
+        np.stack([r00, r01, c0, r10, r11, c1, b0, b1, c2], axis=1),
+        np.stack([r00, r01, -c0, r10, r11, -c1, -b0, -b1, c2], axis=1)]).reshape(2, -1, 3, 3)
+    R = Rv @ candidates
+    
+    # Dönme bilinirken öteleme: t_x - u t_z = u (RX)_z - (RX)_x, t_y - v t_z = v (RX)_z - (RX)_y
+    half = marker_length / 2.0
+    model = np.array([[-half, half, half, -half], [half, half, -half, -half]])
+    rotated = R[..., :2] @ model
+    rx, ry, rz = rotated[..., 0, :], rotated[..., 1, :], rotated[..., 2, :]
+    bx, by = u * rz - rx, v * rz - ry
+    Su, Sv, Suv = u.sum(axis=1), v.sum(axis=1), (u * u + v * v).sum(axis=1)
+    Sbx, Sby, Sbz = bx.sum(axis=-1), by.sum(axis=-1), -(u * bx + v * by).sum(axis=-1)
+    tz = (Sbz + 0.25 * (Su * Sbx + Sv * Sby)) / (Suv - 0.25 * (Su * Su + Sv * Sv))
+    tx, ty = 0.25 * (Sbx + Su * tz), 0.25 * (Sby + Sv * tz)
+    z = rz + tz[..., None]
+    error = (((rx + tx[..., None]) / z - u) ** 2 + ((ry + ty[..., None]) / z - v) ** 2).sum(axis=-1)
+    
+    best = (error[1] < error[0]).astype(np.intp)
+    index = np.arange(len(best))
+    translations = np.stack([tx, ty, tz], axis=-1)
+    return R[best, index], translations[best, index]
+
+def rotation_vectors(R):
+    """N x 3 x 3 dönme matrislerinden Rodrigues vektörleri (N x 3)
+    
+    Kuaterniyon üzerinden hesaplanır; kameraya bakan markerlarda açı 180
+    dereceye yakın olduğundan eksen ters simetrik kısımdan çıkarılmaz.
+    """
+    r00, r11, r22 = R[:, 0, 0], R[:, 1, 1], R[:, 2, 2]
+    w = np.sqrt(np.maximum(0.0, 1.0 + r00 + r11 + r22))
+    q = np.sqrt(np.maximum(0.0, np.stack([1.0 + r00 - r11 - r22, 1.0 - r00 + r11 - r22, 1.0 - r00 - r11 + r22], axis=1)))
+    q = np.copysign(q, np.stack([R[:, 2, 1] - R[:, 1, 2], R[:, 0, 2] - R[:, 2, 0], R[:, 1, 0] - R[:, 0, 1]], axis=1))
+    norm = np.sqrt((q * q).sum(axis=1))
+    angle = 2.0 * np.arctan2(norm, w)
+    return q * (angle / np.where(norm > 0, norm, 1.0))[:, None]
+
 class ArucoDetector:
     def __init__(self, dictionary_id=cv2.aruco.DICT_4X4_50):
         self.aruco_dict = cv2.aruco.getPredefinedDictionary(dictionary_id)
         self.parameters = cv2.aruco.DetectorParameters()
+        # Tespit nesnesi bir kez kurulur; her karede sözlük ve parametreler yeniden hazırlanmaz.
+        # Parametrelerin kopyasını tutar: self.parameters değiştirilirse setDetectorParameters çağrılmalıdır
+        self.detector = cv2.aruco.ArucoDetector(self.aruco_dict, self.parameters)
         
     def create_marker(self, marker_id, size=200, output_file=None):
         """ArUco marker oluştur ve kaydedilmesi istenirse dosyaya kaydet"""
@@ -43,8 +138,9 @@ class ArucoDetector:
         if image is None:
             return [], None, []
             
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        corners, ids, rejected = cv2.aruco.detectMarkers(gray, self.aruco_dict, parameters=self.parameters)
+        # Tek kanallı görüntüler dönüştürülmeden kullanılır
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        corners, ids, rejected = self.detector.detectMarkers(gray)
         return corners, ids, rejected
     
     def draw_detected_markers(self, image, corners, ids):
@@ -53,27 +149,40 @@ class ArucoDetector:
             return None
             
         if ids is not None and len(ids) > 0:
-            image = cv2.aruco.drawDetectedMarkers(image.copy(), corners, ids)
+            # Renkli çizim için tek kanallı görüntü ancak burada BGR'ye genişletilir
+            canvas = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if image.ndim == 2 else image.copy()
+            image = cv2.aruco.drawDetectedMarkers(canvas, corners, ids)
         return image
     
     def estimate_pose(self, corners, ids, camera_matrix, dist_coeffs, marker_length=0.05):
-        """Marker'ların pozisyonunu tahmin et"""
+        """Marker'ların pozisyonunu tüm markerlar için tek adımda tahmin et
+        
+        Köşeler tek undistortPoints çağrısıyla normalize edilir, pozlar
+        square_poses ile birlikte çözülür. estimatePoseSingleMarkers ile aynı
+        eksen düzeni ve N x 1 x 3 rvecs/tvecs biçimi kullanılır.
+        """
         if ids is None or len(ids) == 0:
             return [], []
         
-        rvecs, tvecs, _ = cv2.aruco.estimatePoseSingleMarkers(corners, marker_length, 
-                                                             camera_matrix, dist_coeffs)
-        return rvecs, tvecs
+        points = np.asarray(corners, dtype=np.float64).reshape(-1, 1, 2)
+        normalized = cv2.undistortPoints(points, camera_matrix, dist_coeffs).reshape(-1, 4, 2)
+        R, tvecs = square_poses(normalized, marker_length)
+        return rotation_vectors(R)[:, None, :], tvecs[:, None, :]
     
-    def draw_axes(self, image, camera_matrix, dist_coeffs, rvecs, tvecs, marker_length=0.05):
-        """Her marker için koordinat eksenlerini çiz"""
+    def draw_axes(self, image, camera_matrix, dist_coeffs, rvecs, tvecs, marker_length=0.05, inplace=False):
+        """Her marker için koordinat eksenlerini çiz
+        
+        inplace verilirse görüntü kopyalanmadan üzerine çizilir (görüntü
+        zaten çağıranın kopyasıysa tam karelik kopya gereksizdir).
+        """
         if image is None or len(rvecs) == 0:
             return image if image is not None else None
         
-        result_image = image.copy()
-        for i in range(len(rvecs)):
-            cv2.drawFrameAxes(result_image, camera_matrix, dist_coeffs, 
-                            rvecs[i], tvecs[i], marker_length/2)
+        result_image = image if inplace else image.copy()
+        # drawFrameAxes projeksiyonu ve üç çizgiyi tek çağrıda C++ tarafında yapar;
+        # OpenCV'de toplu çizgi çizimi olmadığından marker başına bir çağrı en ucuzudur
+        for rvec, tvec in zip(rvecs, tvecs):
+            cv2.drawFrameAxes(result_image, camera_matrix, dist_coeffs, rvec, tvec, marker_length / 2)
         
         return result_image
         
@@ -82,14 +191,51 @@ class ArucoDetector:
         if len(tvecs) == 0:
             return []
         
-        distances = []
-        for tvec in tvecs:
-            # 3D vektörün büyüklüğü (Euclidean mesafe)
-            distance = np.linalg.norm(tvec)
-            distances.append(distance)
-        
-        return distances
+        # 3D vektörlerin büyüklüğü (Euclidean mesafe), tüm markerlar için tek seferde
+        return np.linalg.norm(np.reshape(tvecs, (-1, 3)), axis=1)
     
+    def match_stereo(self, corners_left, ids_left, corners_right, ids_right):
+        """İki gözde birden görülen markerlar: (id'ler, sol köşeler N x 4 x 2, sağ köşeler N x 4 x 2)"""
+        empty = (np.empty(0, int), np.empty((0, 4, 2)), np.empty((0, 4, 2)))
+        if ids_left is None or ids_right is None or len(ids_left) == 0 or len(ids_right) == 0:
+            return empty
+        ids_left, ids_right = np.ravel(ids_left), np.ravel(ids_right)
+        common, index_left, index_right = np.intersect1d(ids_left, ids_right, return_indices=True)
+        if common.size == 0:
+            return empty
+        points_left = np.asarray(corners_left, dtype=np.float64).reshape(-1, 4, 2)[index_left]
+        points_right = np.asarray(corners_right, dtype=np.float64).reshape(-1, 4, 2)[index_right]
+        return common, points_left, points_right
+        
+    def triangulate_markers(self, points_left, points_right, P1, P2, unit_scale=CALIBRATION_UNIT):
+        """match_stereo ile eşlenen markerların tüm köşelerini tek çağrıda üçgenle
+        
+        P1/P2 köşelerin bulunduğu rektifiye görüntülerin projeksiyonlarıdır;
+        ölçek taban çizgisinden gelir, marker boyutu gerekmez. Rektifiye sol
+        kamera koordinatlarında (köşeler N x 4 x 3, merkezler N x 3,
+        uzaklıklar N) döndürür; birim unit_scale ile metreye çevrilir.
+        """
+        if len(points_left) == 0:
+            return np.empty((0, 4, 3)), np.empty((0, 3)), np.empty(0)
+        homogeneous = cv2.triangulatePoints(P1, P2, points_left.reshape(-1, 2).T, points_right.reshape(-1, 2).T)
+        points = (homogeneous[:3] / homogeneous[3]).T.reshape(-1, 4, 3) * unit_scale
+        centers = points.mean(axis=1)
+        return points, centers, np.linalg.norm(centers, axis=1)
+        
+    def draw_marker_distances(self, image, ids, corners, distances):
+        """Marker merkezlerine id ve uzaklık (metre) yaz; corners bu görüntüdeki N x 4 x 2 köşelerdir"""
+        if image is None or len(ids) == 0:
+            return image
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif not image.flags.writeable:
+            image = image.copy()
+        for marker_id, marker_corners, distance in zip(ids, corners, distances):
+            x, y = np.asarray(marker_corners).reshape(-1, 2).mean(axis=0)
+            cv2.putText(image, f"#{int(marker_id)} {distance:.3f} m", (int(x) - 30, int(y)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+        return image
+        
     def detect_and_draw(self, image, camera_matrix=None, dist_coeffs=None, draw_axes=False, marker_length=0.05):
         """Markerları tespit et ve görüntü üzerine çiz, isteğe bağlı olarak poz hesapla"""
         if image is None:
@@ -114,7 +260,9 @@ class ArucoDetector:
             
             # Koordinat eksenlerini çiz
             if draw_axes and len(rvecs) > 0:
-                result_image = self.draw_axes(result_image, camera_matrix, dist_coeffs, rvecs, tvecs, marker_length)
+                # draw_detected_markers kopya döndürdüğünden eksenler aynı görüntüye çizilir
+                result_image = self.draw_axes(result_image, camera_matrix, dist_coeffs, rvecs, tvecs, marker_length,
+                                              inplace=result_image is not image)
             
             # Mesafeleri hesapla
             distances = self.calculate_distance(tvecs)
@@ -0,0 +1,684 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Stereo Kamera Uygulaması - Performans Ölçümleri
+Kamera olmadan sentetik sahne (veya kayıtlı görüntüler) üzerinde çalışır.
+
+Kullanım:
+    python benchmark.py chessboard [--width 1280 --height 720 --images captures]
+    python benchmark.py remap
+    python benchmark.py calibration-load [--width 1920 --height 1080]
+    python benchmark.py calibration-select [--views 200 --max-views 40]
+    python benchmark.py drift
+    python benchmark.py depth [--frames 5]
+    python benchmark.py depth-bands [--max-workers 4]
+    python benchmark.py depth-incremental [--frames 30 --session kayit --calibration calibration/stereo_calibration]
+    python benchmark.py pointcloud [--frames 30 --format raw]
+    python benchmark.py aruco-stereo [--frames 20]
+    python benchmark.py aruco-pose [--markers 1,10,50 --frames 10]
+    python benchmark.py replay [--pairs 12 --passes 3 --fps 30]
+"""
+
+import cv2
+import numpy as np
+import os
+import time
+import pickle
+import argparse
+import tempfile
+import settings
+from synthetic_camera import SyntheticStereoRig
+from replay_camera import find_image_pairs
+
+def _timeit(function, repeat=3):
+    """En iyi çalışma süresini (saniye) ve son sonucu döndür"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def _synthetic_rig(args):
+    return SyntheticStereoRig(args.width, args.height, 30, realtime=False, **{
+        'board_size': settings.CALIBRATION_SETTINGS['board_size'],
+        'square_size': settings.CALIBRATION_SETTINGS['square_size']})
+
+def _chessboard_views(args):
+    """Tahtalı, tahtasız ve yarım görünen tahtalı gri görüntüler"""
+    if args.images:
+        views = {'kayıt': []}
+        for _, left_path, _ in find_image_pairs(args.images)[:args.count]:
+            views['kayıt'].append(cv2.imread(left_path, cv2.IMREAD_GRAYSCALE))
+        return views
+        
+    rig = _synthetic_rig(args)
+    background = cv2.cvtColor(rig._static_layer('left'), cv2.COLOR_BGR2GRAY)
+    views = {'tahta var': [], 'tahta yok': [], 'yarım tahta': []}
+    for i in range(args.count):
+        t = rig.scene_time(i * 7)
+        gray = cv2.cvtColor(rig.render('left', t), cv2.COLOR_BGR2GRAY)
+        views['tahta var'].append(gray)
+        views['tahta yok'].append(background)
+        
+        # Tahtanın sağ yarısını arka planla ört
+        corners = rig.project(rig.chessboard_corners(t), 'left')
+        split = int(np.median(corners[:, 0]))
+        partial = gray.copy()
+        partial[:, split:] = background[:, split:]
+        views['yarım tahta'].append(partial)
+    return views
+
+def benchmark_chessboard(args):
+    """Tam çözünürlük ve kaba-ince dama tahtası aramasını karşılaştır"""
+    from calibration import find_chessboard, CORNER_CRITERIA
+    board_size = settings.CALIBRATION_SETTINGS['board_size']
+    coarse_width = args.coarse_width or settings.CALIBRATION_SETTINGS['coarse_width']
+    views = _chessboard_views(args)
+    
+    def run(images, width):
+        results = []
+        for gray in images:
+            ret, corners = find_chessboard(gray, board_size, width)
+            if ret:
+                corners = cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), CORNER_CRITERIA)
+            results.append(corners if ret else None)
+        return results
+        
+    print(f"Dama tahtası tespiti ({board_size[0]}x{board_size[1]}), kaba arama genişliği {coarse_width}")
+    for name, images in views.items():
+        if not images:
+            continue
+        full_time, full = _timeit(lambda: run(images, None), args.repeat)
+        coarse_time, coarse = _timeit(lambda: run(images, coarse_width), args.repeat)
+        
+        # Her iki yolun da bulduğu görüntülerde köşe farkı
+        diffs = [np.abs(a - b).max() for a, b in zip(full, coarse) if a is not None and b is not None]
+        found_full = sum(c is not None for c in full)
+        found_coarse = sum(c is not None for c in coarse)
+        print(f"  {name:<12} {len(images)} görüntü | tam: {1000 * full_time / len(images):7.1f} ms/görüntü "
+              f"({found_full} bulundu) | kaba-ince: {1000 * coarse_time / len(images):7.1f} ms/görüntü "
+              f"({found_coarse} bulundu) | hızlanma x{full_time / max(coarse_time, 1e-9):.1f}"
+              + (f" | en büyük köşe farkı {max(diffs):.3f} px" if diffs else ""))
+
+def _synthetic_calibration(width, height, map_format):
+    """Sentetik kameranın bilinen parametreleri, tipik lens distorsiyonu eklenmiş"""
+    from calibration import StereoCalibration
+    rig = SyntheticStereoRig(width, height, 30, realtime=False)
+    calibration = rig.apply_to_calibration(StereoCalibration(map_format))
+    calibration.dist_coeffs_left = np.array([[-0.12, 0.03, 0.0005, -0.0003, 0.0]])
+    calibration.dist_coeffs_right = np.array([[-0.11, 0.028, -0.0004, 0.0002, 0.0]])
+    calibration.init_rectification()
+    return rig, calibration
+
+def benchmark_remap(args):
+    """Sabit noktalı ve kayan noktalı rektifikasyon haritalarını her çözünürlükte karşılaştır"""
+    print("Rektifikasyon (iki göz, INTER_LINEAR): float = 2 x CV_32FC1, fixed = CV_16SC2 + CV_16UC1")
+    for width, height in settings.RESOLUTION_OPTIONS:
+        rig, float_calibration = _synthetic_calibration(width, height, 'float')
+        fixed_calibration = _synthetic_calibration(width, height, 'fixed')[1]
+        left = rig.render('left', 0.0)
+        right = rig.render('right', 0.0)
+        
+        float_time, float_result = _timeit(lambda: float_calibration.rectify_images(left, right), args.repeat)
+        fixed_time, fixed_result = _timeit(lambda: fixed_calibration.rectify_images(left, right), args.repeat)
+        
+        # Harita doğruluğu: sabit noktalı harita kayan noktalıya geri çevrilip karşılaştırılır
+        map_x, map_y = cv2.convertMaps(*fixed_calibration.rect_map_left, cv2.CV_32FC1)
+        float_x, float_y = float_calibration.rect_map_left
+        valid = (float_x >= 0) & (float_x < width - 1) & (float_y >= 0) & (float_y < height - 1)
+        map_error = np.maximum(np.abs(map_x - float_x), np.abs(map_y - float_y))[valid]
+        pixel_error = cv2.absdiff(float_result[0], fixed_result[0])
+        
+        float_bytes = sum(m.nbytes for m in float_calibration.rect_map_left)
+        fixed_bytes = sum(m.nbytes for m in fixed_calibration.rect_map_left)
+        print(f"  {width}x{height}: float {1000 * float_time:6.2f} ms, fixed {1000 * fixed_time:6.2f} ms "
+              f"(x{float_time / max(fixed_time, 1e-9):.1f}) | harita {float_bytes / 2**20:.1f} -> {fixed_bytes / 2**20:.1f} MB/göz "
+              f"| koordinat hatası en fazla {map_error.max():.4f} px | piksel farkı ort. {pixel_error.mean():.3f}, "
+              f"en fazla {int(pixel_error.max())}")
+
+def benchmark_calibration_load(args):
+    """Eski .pkl ile belleğe eşlenen paketin yüklenme ve ilk rektifikasyon sürelerini karşılaştır"""
+    from calibration import StereoCalibration
+    rig, calibration = _synthetic_calibration(args.width, args.height, settings.CALIBRATION_SETTINGS['map_format'])
+    calibration.calibrated = True
+    left = rig.render('left', 0.0)
+    right = rig.render('right', 0.0)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        legacy = os.path.join(directory, 'legacy.pkl')
+        with open(legacy, 'wb') as f:
+            pickle.dump(dict(calibration._parameters(), rect_map_left=calibration.rect_map_left,
+                             rect_map_right=calibration.rect_map_right), f)
+        bundle = os.path.join(directory, 'bundle')
+        calibration.save_calibration(bundle)
+        
+        def load(path, prefault=True):
+            loaded = StereoCalibration(calibration.map_format)
+            start = time.perf_counter()
+            if path.endswith('.pkl'):
+                # Paket yazmadan yalnızca eski yolun yükleme süresi
+                with open(path, 'rb') as f:
+                    data = pickle.load(f)
+                loaded.rect_map_left, loaded.rect_map_right = data['rect_map_left'], data['rect_map_right']
+                loaded.calibrated = True
+            else:
+                loaded.load_calibration(path, prefault)
+            loaded_time = time.perf_counter() - start
+            loaded.rectify_images(left, right)
+            return loaded_time, time.perf_counter() - start
+            
+        print(f"Kalibrasyon yükleme ({args.width}x{args.height}, {calibration.map_format} haritalar)")
+        for name, path, prefault in (('pkl', legacy, True), ('paket', bundle, False), ('paket+prefault', bundle, True)):
+            results = [load(path, prefault) for _ in range(args.repeat)]
+            loaded_time = min(r[0] for r in results)
+            first_frame = min(r[1] for r in results)
+            print(f"  {name:<15} yükleme {1000 * loaded_time:7.2f} ms | ilk rektifiye kare {1000 * first_frame:7.2f} ms")
+        # Sayfa önbelleği ısınmış olduğundan soğuk açılıştaki disk okuma farkı burada görünmez
+
+def _synthetic_corner_views(args):
+    """Sentetik sahnedeki tahtanın bilinen köşeleri, gürültü ve birkaç aykırı görünüm eklenmiş"""
+    rig = _synthetic_rig(args)
+    random = np.random.default_rng(0)
+    corners_left, corners_right = [], []
+    index = 0
+    while len(corners_left) < args.views:
+        # Otomatik yakalamaya benzer şekilde birkaç saniyede bir görünüm
+        index += int(random.integers(10, 90))
+        truth = rig.ground_truth(index)
+        left, right = truth['chessboard_left'], truth['chessboard_right']
+        inside = [(p[:, 0].min() > 5) & (p[:, 1].min() > 5) & (p[:, 0].max() < args.width - 5) &
+                  (p[:, 1].max() < args.height - 5) for p in (left, right)]
+        if not all(inside):
+            continue
+        noise = 2.0 if random.random() < args.outliers else 0.15
+        corners_left.append((left + random.normal(0, noise, left.shape)).astype(np.float32).reshape(-1, 1, 2))
+        corners_right.append((right + random.normal(0, noise, right.shape)).astype(np.float32).reshape(-1, 1, 2))
+    return rig, corners_left, corners_right
+
+def benchmark_calibration_select(args):
+    """Tüm görünümlerle çözüm ile seçilen alt küme (ve iyileştirme) çözümünü karşılaştır"""
+    from calibration import StereoCalibration
+    rig, corners_left, corners_right = _synthetic_corner_views(args)
+    board_size = settings.CALIBRATION_SETTINGS['board_size']
+    square_size = settings.CALIBRATION_SETTINGS['square_size']
+    outlier_factor = settings.CALIBRATION_SETTINGS['outlier_factor']
+    true_focal = rig.camera_matrix[0, 0]
+    
+    print(f"Kalibrasyon görünüm seçimi: {len(corners_left)} görünüm, %{100 * args.outliers:.0f} aykırı, "
+          f"{args.width}x{args.height}")
+    for name, max_views, factor, refine in (('tümü', None, None, False),
+                                            ('seçim', args.max_views, outlier_factor, False),
+                                            ('seçim+iyileştirme', args.max_views, outlier_factor, True)):
+        calibration = StereoCalibration(settings.CALIBRATION_SETTINGS['map_format'])
+        start = time.perf_counter()
+        calibration.calibrate_from_corners(corners_left, corners_right, (args.width, args.height), board_size,
+                                           square_size, max_views, factor, refine)
+        elapsed = time.perf_counter() - start
+        focal_error = abs(calibration.camera_matrix_left[0, 0] - true_focal) / true_focal
+        baseline_error = abs(np.linalg.norm(calibration.T) - rig.baseline)
+        print(f"  {name:<18} {elapsed:6.2f} s | stereo RMS {calibration.rms:.3f} px | "
+              f"odak hatası %{100 * focal_error:.2f} | taban çizgisi hatası {baseline_error:.2f} mm")
+
+def benchmark_drift(args):
+    """Sapma izleyicisinin örnek maliyeti ve bozulmuş kalibrasyonlarda ölçtüğü dikey hata"""
+    from calibration import StereoCalibration
+    from drift_monitor import DriftMonitor
+    rig = SyntheticStereoRig(args.width, args.height, 30, realtime=False)
+    frames = [(rig.render('left', rig.scene_time(i * 11)), rig.render('right', rig.scene_time(i * 11)))
+              for i in range(args.samples)]
+    config = dict(settings.DRIFT_SETTINGS, interval=0.0, min_samples=1, log_file=None)
+    
+    print(f"Kalibrasyon sapması izleyicisi ({args.width}x{args.height}, {args.samples} örnek)")
+    # Sağ kameranın sol kameraya göre dönmesi: (eksen, derece)
+    for name, axis, degrees in (('doğru', 0, 0.0), ('yunuslama 0.1°', 0, 0.1), ('yunuslama 0.3°', 0, 0.3),
+                                ('yuvarlanma 0.3°', 2, 0.3)):
+        calibration = rig.apply_to_calibration(StereoCalibration(settings.CALIBRATION_SETTINGS['map_format']))
+        rvec = np.zeros(3)
+        rvec[axis] = np.radians(degrees)
+        calibration.R = cv2.Rodrigues(rvec)[0] @ calibration.R
+        calibration.init_rectification()
+        calibration.calibrated = True
+        
+        monitor = DriftMonitor(config)
+        caller_times, sample_times = [], []
+        for left, right in frames:
+            rect_left, rect_right = calibration.rectify_images(left, right)
+            start = time.perf_counter()
+            monitor.submit(rect_left, rect_right)
+            caller_times.append(time.perf_counter() - start)
+            while monitor.busy:
+                time.sleep(0.001)
+            sample_times.append(monitor.sample_time)
+        status = monitor.get_status()
+        print(f"  {name:<16} dikey hata {status['vertical_error_px']:5.2f} px, kaydırma {status['offset_px']:+5.2f} px, "
+              f"yuvarlanma {status['roll_px']:+5.2f} px ({status['points']} nokta) | çağıran {1000 * np.median(caller_times):.2f} ms, "
+              f"arka plan {1000 * np.median(sample_times):.1f} ms/örnek | uyarı: {'evet' if status['alert'] else 'hayır'}")
+
+def benchmark_depth(args):
+    """Her derinlik seviyesinin her çözünürlükte süresi ve gerçek disparite ile hatası"""
+    from depth import DepthEngine
+    budget = 1000.0 / 30
+    print(f"Derinlik seviyeleri (rektifiye çiftten disparite + derinlik, {args.frames} kare, 30 FPS bütçesi {budget:.1f} ms)")
+    for width, height in settings.RESOLUTION_OPTIONS:
+        # Sentetik düzen distorsiyonsuz ve paralel: ham kareler zaten rektifiyedir
+        rig = SyntheticStereoRig(width, height, 30, realtime=False)
+        P1 = np.hstack((rig.camera_matrix, np.zeros((3, 1))))
+        P2 = np.hstack((rig.camera_matrix, rig.camera_matrix @ rig.T))
+        frames = [(rig.render('left', rig.scene_time(i * 13)), rig.render('right', rig.scene_time(i * 13)),
+                   rig.render_disparity(i * 13)) for i in range(args.frames)]
+        print(f"  {width}x{height}:")
+        for tier in settings.DEPTH_TIERS:
+            engine = DepthEngine(tier)
+            times, bad, coverage, depth_errors = [], [], [], []
+            for left, right, truth in frames:
+                elapsed, result = _timeit(lambda: engine.compute(left, right, P1, P2), args.repeat)
+                times.append(elapsed)
+                # Gerçek disparite çalışma çözünürlüğüne küçültülür (değerler de ölçeklenir)
+                size = result.disparity.shape[1::-1]
+                expected = cv2.resize(truth, size, interpolation=cv2.INTER_NEAREST) * result.scale
+                valid = result.disparity > 0
+                error = np.abs(result.disparity - expected)[valid] / result.scale
+                coverage.append(valid.mean())
+                bad.append(np.mean(error > 1.0))
+                truth_depth = rig.camera_matrix[0, 0] * rig.baseline / np.maximum(truth, 1e-6)
+                truth_depth = cv2.resize(truth_depth.astype(np.float32), size, interpolation=cv2.INTER_NEAREST)
+                depth_errors.append(np.median(np.abs(result.depth[valid] - truth_depth[valid]) / truth_depth[valid]))
+            ms = 1000 * np.median(times)
+            print(f"    {tier:<9} {result.disparity.shape[1]}x{result.disparity.shape[0]} {ms:7.1f} ms "
+                  f"({1000 / ms:5.1f} FPS{', 30 FPS içinde' if ms <= budget else ''}) | geçerli %{100 * np.mean(coverage):.0f} | "
+                  f"hatalı (>1 px) %{100 * np.mean(bad):.1f} | derinlik hatası ortanca %{100 * np.median(depth_errors):.2f}")
+
+def benchmark_depth_bands(args):
+    """Yatay bantlı disparitenin 1..N iş parçacığıyla ölçeklenmesi ve tek çağrıyla eşdeğerliği"""
+    from depth import DepthEngine
+    rig = SyntheticStereoRig(args.width, args.height, 30, realtime=False)
+    left, right = rig.render('left', 0.0), rig.render('right', 0.0)
+    print(f"Bantlı disparite ({args.width}x{args.height}, {os.cpu_count()} çekirdek, "
+          f"OpenCV iş parçacığı {cv2.getNumThreads()}); eşdeğerlik sınırı: >1 px farklı piksel %{args.tolerance}")
+    for tier in settings.DEPTH_TIERS:
+        engine = DepthEngine(tier, workers=args.max_workers)
+        single_time, (single, _) = _timeit(lambda: engine.compute_disparity(left, right, bands=1), args.repeat)
+        print(f"  {tier} (bant payı {engine.band_margin()} satır): tek çağrı {1000 * single_time:.1f} ms")
+        for workers in range(1, args.max_workers + 1):
+            engine.set_workers(workers)
+            elapsed, (banded, _) = _timeit(lambda: engine.compute_disparity(left, right), args.repeat)
+            difference = np.abs(banded - single)
+            different = 100 * np.mean(difference > 1.0)
+            mismatch = 100 * np.mean((banded > 0) != (single > 0))
+            print(f"    {workers} iş parçacığı: {1000 * elapsed:7.1f} ms (x{single_time / elapsed:.2f}) | "
+                  f">1 px farklı %{different:.3f}, geçerlilik farkı %{mismatch:.3f} | "
+                  f"{'eşdeğer' if different <= args.tolerance else 'SINIR AŞILDI'}")
+
+def _depth_sequences(args):
+    """Senaryo adı -> (sol, sağ) kare listesi; kayıtlı oturum verildiyse yalnızca o"""
+    if args.session:
+        calibration = None
+        if args.calibration:
+            from calibration import StereoCalibration
+            calibration = StereoCalibration()
+            if not calibration.load_calibration(args.calibration):
+                calibration = None
+        frames = []
+        for _, left_path, right_path in find_image_pairs(args.session)[:args.frames]:
+            left, right = cv2.imread(left_path), cv2.imread(right_path)
+            if calibration is not None:
+                calibration.rescale(left.shape[1::-1])
+                left, right = calibration.rectify_images(left, right)
+            frames.append((left, right))
+        return {'kayıt': frames}
+        
+    # Sentetik düzenin kareleri zaten rektifiyedir; algılayıcı gürültüsü eklenir
+    rig = _synthetic_rig(args)
+    rng = np.random.default_rng(0)
+    
+    def noisy(image):
+        noise = rng.normal(0.0, args.noise, image.shape)
+        return np.clip(image + noise, 0, 255).astype(np.uint8)
+        
+    sequences = {'durağan': [], 'hareketli': []}
+    for i in range(args.frames):
+        for name, t in (('durağan', 0.0), ('hareketli', rig.scene_time(i))):
+            sequences[name].append((noisy(rig.render('left', t)), noisy(rig.render('right', t))))
+    return sequences
+
+def benchmark_depth_incremental(args):
+    """Artımlı disparitenin tam hesaplamaya göre hızı ve farkı"""
+    from depth import DepthEngine
+    sequences = _depth_sequences(args)
+    incremental_settings = dict(settings.DEPTH_SETTINGS, incremental=True)
+    print(f"Artımlı disparite ({args.frames} kare, karo {incremental_settings['tile_size']} px, "
+          f"her {incremental_settings['refresh_interval']} karede tam yenileme)")
+    for name, frames in sequences.items():
+        if not frames:
+            print(f"  {name}: kare bulunamadı")
+            continue
+        print(f"  {name} ({frames[0][0].shape[1]}x{frames[0][0].shape[0]}):")
+        for tier in args.tiers.split(','):
+            full = DepthEngine(tier)
+            incremental = DepthEngine(tier, incremental_settings)
+            full_times, incremental_times, recomputed, different, errors = [], [], [], [], []
+            for left, right in frames:
+                start = time.perf_counter()
+                expected, _ = full.compute_disparity(left, right)
+                full_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                disparity, _ = incremental.compute_disparity(left, right)
+                incremental_times.append(time.perf_counter() - start)
+                recomputed.append(incremental.recomputed)
+                difference = np.abs(disparity - expected)
+                different.append(np.mean(difference > 1.0))
+                errors.append(difference.mean())
+            full_ms, incremental_ms = 1000 * np.mean(full_times), 1000 * np.mean(incremental_times)
+            print(f"    {tier:<9} tam {full_ms:6.1f} ms, artımlı {incremental_ms:6.1f} ms (x{full_ms / incremental_ms:.1f}) | "
+                  f"yeniden hesaplanan alan %{100 * np.mean(recomputed):.0f} (ilk tam hesap hariç "
+                  f"%{100 * np.mean(recomputed[1:] or [0.0]):.0f}) | tam hesaptan >1 px farklı "
+                  f"%{100 * np.mean(different):.3f} (en fazla %{100 * np.max(different):.3f}), ortalama fark {np.mean(errors):.3f} px")
+
+def benchmark_pointcloud(args):
+    """Nokta bulutu: vektörel yeniden izdüşüm, voksel seyreltme ve akışlı yazma; bellek sınırı"""
+    import tracemalloc
+    from depth import DepthEngine
+    from pointcloud import PointCloudWriter, reproject, voxel_downsample
+    config = settings.POINTCLOUD_SETTINGS
+    print(f"Nokta bulutu ({args.frames} kare, voksel {config['voxel_size']} mm, biçim {args.format})")
+    for width, height in settings.RESOLUTION_OPTIONS:
+        rig = SyntheticStereoRig(width, height, 30, realtime=False)
+        P1 = np.hstack((rig.camera_matrix, np.zeros((3, 1))))
+        P2 = np.hstack((rig.camera_matrix, rig.camera_matrix @ rig.T))
+        engine = DepthEngine()
+        left = rig.render('left', 0.0)
+        depth = engine.compute(left, rig.render('right', 0.0), P1, P2)
+        
+        def full_frame():
+            # Karşılaştırma: tüm kareyi 3B'ye çevirip sonra maskele
+            points = cv2.reprojectImageTo3D(depth.disparity, depth.Q)
+            mask = (depth.disparity > 0) & (points[:, :, 2] > config['min_depth']) & (points[:, :, 2] < config['max_depth'])
+            return points[mask]
+            
+        full_time, _ = _timeit(full_frame, args.repeat)
+        reproject_time, (points, valid) = _timeit(
+            lambda: reproject(depth.disparity, depth.Q, config['min_depth'], config['max_depth']), args.repeat)
+        small = cv2.resize(left, depth.disparity.shape[::-1], interpolation=cv2.INTER_AREA)
+        colors = small[valid]
+        voxel_time, (reduced, reduced_colors) = _timeit(
+            lambda: voxel_downsample(points, config['voxel_size'], colors), args.repeat)
+            
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f"bulut.{args.format}")
+            tracemalloc.start()
+            start = time.perf_counter()
+            with PointCloudWriter(path) as writer:
+                for frame in range(args.frames):
+                    writer.write(reduced, reduced_colors, frame)
+                    if frame == 0:
+                        first_peak = tracemalloc.get_traced_memory()[1]
+            write_time = (time.perf_counter() - start) / args.frames
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            size = os.path.getsize(path)
+            
+        print(f"  {width}x{height} (derinlik {depth.disparity.shape[1]}x{depth.disparity.shape[0]}): "
+              f"izdüşüm {1000 * reproject_time:.1f} ms (tüm kare + maske {1000 * full_time:.1f} ms), "
+              f"voksel {1000 * voxel_time:.1f} ms ({len(points)} -> {len(reduced)} nokta), "
+              f"yazma {1000 * write_time:.1f} ms/kare | dosya {size / 2**20:.1f} MB, "
+              f"bellek tepesi 1 kare {first_peak / 2**20:.1f} MB, {args.frames} kare {peak / 2**20:.1f} MB")
+
+def benchmark_aruco_stereo(args):
+    """Marker uzaklığı: göz başına PnP ile iki gözden üçgenleme, süre ve gerçek değerden hata"""
+    from aruco_detector import ArucoDetector
+    options = settings.get_synthetic_options()
+    rig = SyntheticStereoRig(args.width, args.height, 30, realtime=False, **{
+        'marker_count': options['marker_count'], 'marker_length': options['marker_length']})
+    aruco = ArucoDetector(settings.ARUCO_SETTINGS['dictionary'])
+    marker_length = settings.ARUCO_SETTINGS['marker_length']
+    # Sentetik kareler rektifiyedir: P1 = K [I | 0], P2 = K [I | T]
+    P1 = np.hstack((rig.camera_matrix, np.zeros((3, 1))))
+    P2 = np.hstack((rig.camera_matrix, rig.camera_matrix @ rig.T))
+    dist_coeffs = np.zeros(5)
+    
+    pnp_times, stereo_times, pnp_errors, stereo_errors = [], [], [], []
+    for i in range(args.frames):
+        t = rig.scene_time(i * 9)
+        corners_left, ids_left, _ = aruco.detect_markers(rig.render('left', t))
+        corners_right, ids_right, _ = aruco.detect_markers(rig.render('right', t))
+        truth = {marker_id: corners.mean(axis=0) / 1000.0 for marker_id, corners in rig.marker_corners(t).items()}
+        
+        start = time.perf_counter()
+        _, tvecs_left = aruco.estimate_pose(corners_left, ids_left, rig.camera_matrix, dist_coeffs, marker_length)
+        aruco.estimate_pose(corners_right, ids_right, rig.camera_matrix, dist_coeffs, marker_length)
+        distances = aruco.calculate_distance(tvecs_left) if tvecs_left is not None else []
+        pnp_times.append(time.perf_counter() - start)
+        if ids_left is not None:
+            pnp_errors += [abs(d - np.linalg.norm(truth[int(m)])) for m, d in zip(np.ravel(ids_left), distances)]
+            
+        start = time.perf_counter()
+        ids, points_left, points_right = aruco.match_stereo(corners_left, ids_left, corners_right, ids_right)
+        _, _, distances = aruco.triangulate_markers(points_left, points_right, P1, P2)
+        stereo_times.append(time.perf_counter() - start)
+        stereo_errors += [abs(d - np.linalg.norm(truth[int(m)])) for m, d in zip(ids, distances)]
+        
+    print(f"ArUco uzaklığı ({args.width}x{args.height}, {args.frames} kare, "
+          f"{len(stereo_errors)} stereo / {len(pnp_errors)} tek göz ölçümü)")
+    for name, times, errors in (("göz başına PnP (iki göz)", pnp_times, pnp_errors),
+                                ("stereo üçgenleme", stereo_times, stereo_errors)):
+        errors = np.array(errors) * 1000.0
+        print(f"  {name:<26} {1000 * np.median(times):6.3f} ms/kare | uzaklık hatası ortanca {np.median(errors):6.2f} mm, "
+              f"en fazla {errors.max():6.2f} mm")
+
+def _legacy_aruco(aruco):
+    """Eski yol: her karede kurulan tespit nesnesi, marker başına poz, eksen ve uzaklık döngüleri
+    
+    OpenCV'de eski fonksiyonlar varsa onlar kullanılır; yoksa (4.7+ çekirdek)
+    eski sarmalayıcıların yaptığı gibi her çağrıda ArucoDetector kurulur ve
+    her marker için ayrı solvePnP (varsayılan yinelemeli yöntem) çağrılır.
+    """
+    def detect(gray):
+        if hasattr(cv2.aruco, 'detectMarkers'):
+            return cv2.aruco.detectMarkers(gray, aruco.aruco_dict, parameters=aruco.parameters)
+        return cv2.aruco.ArucoDetector(aruco.aruco_dict, aruco.parameters).detectMarkers(gray)
+        
+    def pose(corners, camera_matrix, dist_coeffs, marker_length):
+        if hasattr(cv2.aruco, 'estimatePoseSingleMarkers'):
+            rvecs, tvecs, _ = cv2.aruco.estimatePoseSingleMarkers(corners, marker_length, camera_matrix, dist_coeffs)
+            return rvecs, tvecs
+        half = marker_length / 2.0
+        model = np.array([[-half, half, 0], [half, half, 0], [half, -half, 0], [-half, -half, 0]], np.float32)
+        rvecs, tvecs = [], []
+        for marker_corners in corners:
+            _, rvec, tvec = cv2.solvePnP(model, marker_corners.reshape(4, 2), camera_matrix, dist_coeffs)
+            rvecs.append(rvec.reshape(1, 3))
+            tvecs.append(tvec.reshape(1, 3))
+        return np.array(rvecs), np.array(tvecs)
+        
+    def axes(image, camera_matrix, dist_coeffs, rvecs, tvecs, marker_length):
+        result = image.copy()
+        for rvec, tvec in zip(rvecs, tvecs):
+            cv2.drawFrameAxes(result, camera_matrix, dist_coeffs, rvec, tvec, marker_length / 2)
+        return result
+        
+    def distance(tvecs):
+        return [np.linalg.norm(tvec) for tvec in tvecs]
+        
+    return detect, pose, axes, distance
+
+def benchmark_aruco_pose(args):
+    """1, 10, 50 görünür markerda tespit, poz, eksen çizimi ve uzaklık: eski yol ile yeniden kullanılan/toplu yol"""
+    from aruco_detector import ArucoDetector
+    marker_length = settings.ARUCO_SETTINGS['marker_length']
+    dist_coeffs = np.zeros(5)
+    print(f"ArUco tespit ve poz ({args.width}x{args.height}, {args.frames} kare, kare başına ms: eski / yeni)")
+    print(f"  {'marker':>6} {'tespit':>17} {'poz':>17} {'eksen':>17} {'uzaklık':>17} {'uzaklık hatası (mm)':>20}")
+    for count in [int(value) for value in args.markers.split(',')]:
+        rig = SyntheticStereoRig(args.width, args.height, 30, realtime=False,
+                                 marker_count=count, marker_length=marker_length)
+        camera_matrix = rig.camera_matrix
+        aruco = ArucoDetector(settings.ARUCO_SETTINGS['dictionary'])
+        legacy_detect, legacy_pose, legacy_axes, legacy_distance = _legacy_aruco(aruco)
+        times = [rig.scene_time(i * 9) for i in range(args.frames)]
+        frames = [rig.render('left', t) for t in times]
+        detections = [aruco.detect_markers(frame)[:2] for frame in frames]
+        visible = np.mean([0 if ids is None else len(ids) for _, ids in detections])
+        
+        def per_frame(function, items):
+            return lambda: [function(*item) for item in items]
+            
+        columns = [(_timeit(per_frame(legacy_detect, [(frame,) for frame in frames]), args.repeat)[0],
+                    _timeit(per_frame(aruco.detect_markers, [(frame,) for frame in frames]), args.repeat)[0])]
+                    
+        found = [(t, frame, corners, ids) for t, frame, (corners, ids) in zip(times, frames, detections) if ids is not None]
+        old_time, old_poses = _timeit(per_frame(
+            lambda corners: legacy_pose(corners, camera_matrix, dist_coeffs, marker_length),
+            [(corners,) for _, _, corners, _ in found]), args.repeat)
+        new_time, new_poses = _timeit(per_frame(
+            lambda corners, ids: aruco.estimate_pose(corners, ids, camera_matrix, dist_coeffs, marker_length),
+            [(corners, ids) for _, _, corners, ids in found]), args.repeat)
+        columns.append((old_time, new_time))
+        
+        # detect_and_draw'daki gibi eksenler draw_detected_markers'ın döndürdüğü kopyaya çizilir
+        drawn = [aruco.draw_detected_markers(frame, corners, ids) for _, frame, corners, ids in found]
+        columns.append((
+            _timeit(per_frame(legacy_axes, [(image, camera_matrix, dist_coeffs, rvecs, tvecs, marker_length)
+                                            for image, (rvecs, tvecs) in zip(drawn, new_poses)]), args.repeat)[0],
+            _timeit(per_frame(lambda *item: aruco.draw_axes(*item, inplace=True),
+                              [(image, camera_matrix, dist_coeffs, rvecs, tvecs, marker_length)
+                               for image, (rvecs, tvecs) in zip(drawn, new_poses)]), args.repeat)[0]))
+                               
+        old_distances = _timeit(per_frame(legacy_distance, [(tvecs,) for _, tvecs in old_poses]), args.repeat)
+        new_distances = _timeit(per_frame(aruco.calculate_distance, [(tvecs,) for _, tvecs in new_poses]), args.repeat)
+        columns.append((old_distances[0], new_distances[0]))
+        
+        errors = []
+        for distances in (old_distances[1], new_distances[1]):
+            error = [abs(distance - np.linalg.norm(rig.marker_corners(t)[int(marker_id)].mean(axis=0) / 1000.0))
+                     for (t, _, _, ids), frame_distances in zip(found, distances)
+                     for marker_id, distance in zip(np.ravel(ids), frame_distances)]
+            errors.append(1000 * np.median(error) if error else 0.0)
+            
+        cells = [f"{1000 * old / args.frames:6.3f} / {1000 * new / args.frames:6.3f}" for old, new in columns]
+        print(f"  {visible:6.1f} " + " ".join(f"{cell:>17}" for cell in cells)
+              + f" {errors[0]:9.2f} / {errors[1]:6.2f}")
+
+def _write_replay_session(directory, pairs, fps, timestamp_file):
+    """Aynı saniyede birden çok çift içeren calib_left_N_<zaman>.png oturumu yaz"""
+    start = 1700000000.0
+    lines = []
+    for number in range(1, pairs + 1):
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(start + (number - 1) // 5))
+        image = np.full((48, 64, 3), number, dtype=np.uint8)
+        for side in ('left', 'right'):
+            cv2.imwrite(os.path.join(directory, f"calib_{side}_{number}_{stamp}.png"), image)
+        lines.append(f"calib_left_{number}_{stamp}.png,{start + (number - 1) / fps:.6f}\n")
+    if timestamp_file:
+        with open(os.path.join(directory, 'timestamps.csv'), 'w') as f:
+            f.writelines(lines)
+
+def benchmark_replay(args):
+    """Döngülü gerçek zamanlı oynatmada sıra, zaman damgası aralıkları ve duvar saati"""
+    from replay_camera import SessionReplay
+    interval = 1.0 / args.fps
+    expected = list(range(1, args.pairs + 1)) * args.passes
+    failures = []
+    print(f"Oturum oynatma ({args.pairs} çift, {args.passes} tur, {args.fps} FPS, gerçek zamanlı)")
+    for name, timestamp_file in (('dosya adı', False), ('timestamps.csv', True)):
+        with tempfile.TemporaryDirectory() as directory:
+            _write_replay_session(directory, args.pairs, args.fps, timestamp_file)
+            replay = SessionReplay(directory, fps=args.fps, realtime=True, loop=True, prefetch=4)
+            items = []
+            start = time.perf_counter()
+            while len(items) < len(expected):
+                left = replay.grab('left', timeout=5.0)
+                right = replay.grab('right', timeout=5.0)
+                if left is None or right is None or left is not right:
+                    break
+                items.append(left)
+            elapsed = time.perf_counter() - start
+            replay.release()
+            
+        order = [int(item.left[0, 0, 0]) for item in items]
+        deltas = np.diff([item.timestamp for item in items])
+        budget = (len(expected) - 1) * interval
+        ok = order == expected and len(deltas) > 0 and deltas.min() > 0 and deltas.max() < 2 * interval \
+            and elapsed < budget + 0.5
+        print(f"  {name:<15} {len(items)} kare, sıra {'doğru' if order == expected else 'YANLIŞ'}, "
+              f"aralık {1000 * deltas.min():.1f}-{1000 * deltas.max():.1f} ms, "
+              f"süre {elapsed:.2f} s (beklenen {budget:.2f} s) | {'tamam' if ok else 'HATA'}")
+        if not ok:
+            failures.append(name)
+    if failures:
+        raise SystemExit(f"Oynatma doğrulaması başarısız: {', '.join(failures)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Stereo kamera performans ölçümleri")
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--repeat', type=int, default=3, help="Her ölçüm için tekrar sayısı (en iyisi alınır)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    chessboard = subparsers.add_parser('chessboard', help="Kaba-ince dama tahtası tespiti")
+    chessboard.add_argument('--images', help="Sentetik sahne yerine bu oturumdaki sol görüntüleri kullan")
+    chessboard.add_argument('--count', type=int, default=10)
+    chessboard.add_argument('--coarse-width', type=int, default=None)
+    chessboard.set_defaults(function=benchmark_chessboard)
+    
+    remap = subparsers.add_parser('remap', help="Sabit noktalı / kayan noktalı rektifikasyon haritaları")
+    remap.set_defaults(function=benchmark_remap)
+    
+    calibration_load = subparsers.add_parser('calibration-load', help="Kalibrasyon paketi yükleme süresi")
+    calibration_load.set_defaults(function=benchmark_calibration_load)
+    
+    calibration_select = subparsers.add_parser('calibration-select', help="Kalibrasyon görünüm seçimi")
+    calibration_select.add_argument('--views', type=int, default=200)
+    calibration_select.add_argument('--max-views', type=int, default=settings.CALIBRATION_SETTINGS['max_views'])
+    calibration_select.add_argument('--outliers', type=float, default=0.05, help="Aykırı görünüm oranı")
+    calibration_select.set_defaults(function=benchmark_calibration_select)
+    
+    drift = subparsers.add_parser('drift', help="Kalibrasyon sapması izleyicisi")
+    drift.add_argument('--samples', type=int, default=10)
+    drift.set_defaults(function=benchmark_drift)
+    
+    depth = subparsers.add_parser('depth', help="Derinlik motoru seviyeleri")
+    depth.add_argument('--frames', type=int, default=5)
+    depth.set_defaults(function=benchmark_depth)
+    
+    depth_bands = subparsers.add_parser('depth-bands', help="Bantlı çok çekirdekli disparite")
+    depth_bands.add_argument('--max-workers', type=int, default=max(4, os.cpu_count() or 1))
+    depth_bands.add_argument('--tolerance', type=float, default=0.5, help="İzin verilen >1 px farklı piksel yüzdesi")
+    depth_bands.set_defaults(function=benchmark_depth_bands)
+    
+    depth_incremental = subparsers.add_parser('depth-incremental', help="Durağan sahnelerde artımlı disparite")
+    depth_incremental.add_argument('--frames', type=int, default=30)
+    depth_incremental.add_argument('--tiers', default='fast,balanced', help="Virgülle ayrılmış DEPTH_TIERS adları")
+    depth_incremental.add_argument('--noise', type=float, default=2.0, help="Sentetik karelere eklenen gürültü (gri düzey)")
+    depth_incremental.add_argument('--session', help="Sentetik sahne yerine bu kayıtlı oturumun kareleri")
+    depth_incremental.add_argument('--calibration', help="Kayıtlı kareleri bu kalibrasyonla rektifiye et")
+    depth_incremental.set_defaults(function=benchmark_depth_incremental)
+    
+    pointcloud = subparsers.add_parser('pointcloud', help="Nokta bulutu dışa aktarımı")
+    pointcloud.add_argument('--frames', type=int, default=30)
+    pointcloud.add_argument('--format', choices=('ply', 'raw'), default=settings.POINTCLOUD_SETTINGS['format'])
+    pointcloud.set_defaults(function=benchmark_pointcloud)
+    
+    aruco_stereo = subparsers.add_parser('aruco-stereo', help="İki gözden marker üçgenleme")
+    aruco_stereo.add_argument('--frames', type=int, default=20)
+    aruco_stereo.set_defaults(function=benchmark_aruco_stereo)
+    
+    aruco_pose = subparsers.add_parser('aruco-pose', help="Tespit nesnesi ve toplu poz/uzaklık")
+    aruco_pose.add_argument('--markers', default='1,10,50', help="Virgülle ayrılmış görünür marker sayıları")
+    aruco_pose.add_argument('--frames', type=int, default=10)
+    aruco_pose.set_defaults(function=benchmark_aruco_pose)
+    
+    replay = subparsers.add_parser('replay', help="Döngülü oturum oynatma sırası ve zamanlaması")
+    replay.add_argument('--pairs', type=int, default=12)
+    replay.add_argument('--passes', type=int, default=3)
+    replay.add_argument('--fps', type=int, default=30)
+    replay.set_defaults(function=benchmark_replay)
+    
+    args = parser.parse_args()
+    args.function(args)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -4,10 +4,311 @@
 import cv2
 import numpy as np
 import os
+import time
+import json
 import pickle
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import utils
+import view_selection
+from depth import disparity_to_depth_matrix
+
+CORNER_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+CHESSBOARD_FLAGS = cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_NORMALIZE_IMAGE
+
+# Rektifikasyon haritası biçimleri: 'fixed' (CV_16SC2 + CV_16UC1, 1/32 piksel) remap'te
+# belirgin şekilde hızlıdır ve yarı bellek kullanır; 'float' (2 x CV_32FC1) tam hassasiyettir
+MAP_FORMATS = {'fixed': cv2.CV_16SC2, 'float': cv2.CV_32FC1}
+
+# Kalibrasyon paketi: params.json + maps.json + belleğe eşlenebilir .npy haritalar
+BUNDLE_VERSION = 1
+PARAM_KEYS = ('camera_matrix_left', 'dist_coeffs_left', 'camera_matrix_right', 'dist_coeffs_right',
+              'R', 'T', 'E', 'F', 'img_size', 'R1', 'R2', 'P1', 'P2', 'Q', 'roi_left', 'roi_right')
+PAGE_SIZE = 4096
+
+# Köşe önbelleği anahtarına girer; tespit algoritması değişince artırılır
+DETECTION_VERSION = 1
+
+def find_chessboard(gray, board_size=(9, 6), coarse_width=None):
+    """Tek görüntüde dama tahtası köşelerini bul (iyileştirilmemiş, tam çözünürlük koordinatları)
+    
+    coarse_width verilirse ve görüntü daha genişse arama önce bu genişliğe
+    küçültülmüş kopyada CALIB_CB_FAST_CHECK ile yapılır: tahta yoksa görüntü
+    hemen reddedilir, varsa köşeler tam çözünürlüğe ölçeklenir ve
+    cornerSubPix ile tam çözünürlükte iyileştirilir.
+    """
+    if not coarse_width or gray.shape[1] <= coarse_width:
+        return cv2.findChessboardCorners(gray, board_size, None)
+        
+    scale = coarse_width / float(gray.shape[1])
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    ret, corners = cv2.findChessboardCorners(small, board_size, CHESSBOARD_FLAGS + cv2.CALIB_CB_FAST_CHECK)
+    if not ret:
+        return False, None
+    # Piksel merkezleri (x + 0.5) ölçeklenir
+    return True, ((corners + 0.5) / scale - 0.5).astype(np.float32)
+
+def detection_params(board_size, coarse_width):
+    """Köşe önbelleği anahtarına giren tespit parametreleri"""
+    return (DETECTION_VERSION, tuple(board_size), coarse_width, CHESSBOARD_FLAGS, CORNER_CRITERIA, (11, 11))
+
+def find_stereo_corners(img_left, img_right, board_size=(9, 6), coarse_width=None, cache=None):
+    """Bir stereo çiftte dama tahtası köşelerini bul ve alt piksele iyileştir
+    
+    (bulundu, sol köşeler, sağ köşeler, görüntü boyutu) döndürür. OpenCV
+    çağrıları GIL'i bıraktığı için thread havuzunda paralel çalışır. cache
+    (CornerCache) verilirse aynı içerikli çift için tespit yeniden yapılmaz.
+    """
+    if cache is None:
+        return _detect_stereo_corners(img_left, img_right, board_size, coarse_width)
+    key = cache.key(img_left, img_right, detection_params(board_size, coarse_width))
+    result = cache.load(key)
+    cache.record(result is not None)
+    if result is None:
+        result = _detect_stereo_corners(img_left, img_right, board_size, coarse_width)
+        cache.store(key, result)
+    return result
+
+def _detect_stereo_corners(img_left, img_right, board_size, coarse_width):
+    # Tek kanallı (gray modu) görüntüler dönüştürülmeden kullanılır
+    gray_left = img_left if img_left.ndim == 2 else cv2.cvtColor(img_left, cv2.COLOR_BGR2GRAY)
+    gray_right = img_right if img_right.ndim == 2 else cv2.cvtColor(img_right, cv2.COLOR_BGR2GRAY)
+    img_size = gray_left.shape[::-1]
+    
+    # Sol görüntüde tahta yoksa sağ görüntü hiç aranmaz
+    ret_left, corners_left = find_chessboard(gray_left, board_size, coarse_width)
+    if not ret_left:
+        return False, None, None, img_size
+    ret_right, corners_right = find_chessboard(gray_right, board_size, coarse_width)
+    if not ret_right:
+        return False, None, None, img_size
+        
+    # Alt piksel doğruluk için köşeleri iyileştir
+    corners_left = cv2.cornerSubPix(gray_left, corners_left, (11, 11), (-1, -1), CORNER_CRITERIA)
+    corners_right = cv2.cornerSubPix(gray_right, corners_right, (11, 11), (-1, -1), CORNER_CRITERIA)
+    return True, corners_left, corners_right, img_size
+
+def _find_stereo_corners_in_files(left, right, board_size, coarse_width, cache):
+    """Dosya yolu verilen çifti iş parçacığında oku; bellekte aynı anda yalnızca işlenen çiftler bulunur"""
+    if not isinstance(left, str):
+        return find_stereo_corners(left, right, board_size, coarse_width, cache)
+        
+    path_left, path_right = left, right
+    file_key = None
+    if cache is not None:
+        # Dosya baytlarıyla bulunursa görüntüler hiç çözülmez
+        file_key = cache.file_key(path_left, path_right, detection_params(board_size, coarse_width))
+        result = cache.load(file_key)
+        if result is not None:
+            cache.record(True)
+            return result
+            
+    # Kaydedilen kareler aynen (gri ise tek kanal) okunur, içerik anahtarı yakalamadakiyle aynı kalır
+    left = cv2.imread(path_left, cv2.IMREAD_UNCHANGED)
+    right = cv2.imread(path_right, cv2.IMREAD_UNCHANGED)
+    if left is None or right is None:
+        print(f"Görüntü okunamadı: {path_left if left is None else path_right}")
+        return False, None, None, None
+    result = find_stereo_corners(left, right, board_size, coarse_width, cache)
+    if file_key is not None:
+        cache.store(file_key, result)
+    return result
+
+def detect_stereo_corners(images_left, images_right, board_size=(9, 6), workers=None, progress=None,
+                          coarse_width=None, cache=None):
+    """Tüm çiftlerde köşeleri paralel bul; sonuçlar giriş sırasıyla döner
+    
+    Görüntüler dizi veya dosya yolu olabilir. progress verilirse her çift
+    bittiğinde progress(biten, toplam) çağrılır. coarse_width için bkz.
+    find_chessboard, cache için bkz. find_stereo_corners.
+    """
+    total = len(images_left)
+    workers = workers or os.cpu_count() or 1
+    results = [None] * total
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_find_stereo_corners_in_files, img_left, img_right, board_size, coarse_width, cache): i
+                   for i, (img_left, img_right) in enumerate(zip(images_left, images_right))}
+        done = 0
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            done += 1
+            if progress is not None:
+                progress(done, total)
+    return results
+
+class RectificationMaps:
+    """Ham kareden doğrudan istenen çıkış boyutuna giden rektifikasyon haritaları
+    
+    roi rektifiye tam çözünürlükteki kaynak bölgedir (x, y, genişlik, yükseklik);
+    P1/P2 ve camera_matrix_* bu çıkışın projeksiyonlarıdır, Q bu çıkıştaki
+    disparitenin 3B dönüşümüdür. Rektifiye görüntü distorsiyonsuz olduğundan
+    poz kestirimi dist_coeffs (sıfır) ile yapılır.
+    """
+    def __init__(self, size, roi, map_left, map_right, P1, P2):
+        self.size = size
+        self.roi = roi
+        self.map_left = map_left
+        self.map_right = map_right
+        self.P1 = P1
+        self.P2 = P2
+        self.camera_matrix_left = P1[:, :3]
+        self.camera_matrix_right = P2[:, :3]
+        self.dist_coeffs = np.zeros(5)
+        self.Q = disparity_to_depth_matrix(P1, P2)
+
+class CalibrationView:
+    """Kabul edilmiş bir kalibrasyon görünümü: iyileştirilmiş köşeler ve diske yazılan kareler"""
+    def __init__(self, index, corners_left, corners_right, left_path=None, right_path=None):
+        self.index = index  # Yakalama sırası
+        self.corners_left = corners_left
+        self.corners_right = corners_right
+        self.left_path = left_path
+        self.right_path = right_path
+
+class CalibrationSession:
+    """Yakalanan her görünümde köşeleri arka planda bul, bellekte yalnızca köşeleri tut
+    
+    Tam kareler tespit biter bitmez spill_dir altında oturuma özel bir alt klasöre
+    (spill_dir/<zaman damgası>/) yazılır ve bellekten atılır; sonunda
+    calibrate() yalnızca çözücüleri çalıştırır. Otomatik yakalamada (offer)
+    tahta iki gözde bulunan ve önceki görünümlerden yeterince farklı pozdaki
+    kareler kendiliğinden kabul edilir.
+    """
+    def __init__(self, board_size=(9, 6), square_size=25.0, coarse_width=None, spill_dir="calibration",
+                 workers=None, min_pose_change=0.05, capture_delay=2.0, max_pending=4, max_views=None,
+                 outlier_factor=None, refine=False, cache=None):
+        self.board_size = board_size
+        self.square_size = square_size
+        self.coarse_width = coarse_width
+        # Her oturum kendi klasörüne yazar; recalibrate.py tek bir oturuma yönlendirilebilir
+        self.spill_dir = os.path.join(spill_dir, utils.get_timestamp()) if spill_dir else None
+        self.min_pose_change = min_pose_change  # Köşelerin görüntü köşegenine göre ortalama yer değiştirmesi
+        self.capture_delay = capture_delay      # Otomatik kabuller arası en az süre (saniye)
+        self.max_pending = max_pending
+        # Çözücüler için görünüm seçimi (bkz. StereoCalibration.calibrate_from_corners)
+        self.max_views = max_views
+        self.outlier_factor = outlier_factor
+        self.refine = refine
+        self.cache = cache  # Köşe önbelleği (CornerCache); kaydedilen kareler sonradan yeniden kullanılır
+        # workers None ise CALIBRATION_SETTINGS['detection_workers'] varsayılanı gibi çekirdek sayısı kullanılır
+        workers = workers or os.cpu_count() or 1
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="calib-corners")
+        self.lock = threading.Lock()
+        self.views = []
+        self.futures = []
+        self.img_size = None
+        self.submitted = 0
+        self.pending = 0
+        self.rejected = 0
+        self.last_accept = 0.0
+        if self.spill_dir:
+            print(f"Kalibrasyon görüntüleri {self.spill_dir} klasörüne yazılacak "
+                  f"(yeniden hesap: python recalibrate.py {self.spill_dir})")
+        
+    def submit(self, img_left, img_right, auto=False):
+        """Görünümü kopyala ve köşe tespitini arka planda başlat"""
+        with self.lock:
+            if self.pending >= self.max_pending:
+                return False
+            self.pending += 1
+            self.submitted += 1
+            index = self.submitted
+        # Görüntüler halka tampon yuvası olabilir; tespit sürerken değişmesin diye kopyalanır
+        future = self.executor.submit(self._process, index, img_left.copy(), img_right.copy(), auto)
+        with self.lock:
+            # Yalnızca bekleyen tespitler tutulur; bitenlerin sonucu views içindedir
+            self.futures = [pending for pending in self.futures if not pending.done()]
+            self.futures.append(future)
+        return True
+        
+    def offer(self, img_left, img_right):
+        """Otomatik yakalama: tespit boştaysa ve son kabulden beri yeterli süre geçtiyse kareyi dene"""
+        if self.pending > 0 or time.monotonic() - self.last_accept < self.capture_delay:
+            return False
+        return self.submit(img_left, img_right, auto=True)
+        
+    def is_new_pose(self, corners):
+        """Köşeler kabul edilmiş tüm görünümlerden yeterince uzak mı"""
+        diagonal = np.hypot(*self.img_size) if self.img_size else 1.0
+        with self.lock:
+            for view in self.views:
+                change = np.mean(np.linalg.norm(view.corners_left - corners, axis=-1)) / diagonal
+                if change < self.min_pose_change:
+                    return False
+        return True
+        
+    def _process(self, index, img_left, img_right, auto):
+        try:
+            ret, corners_left, corners_right, img_size = find_stereo_corners(
+                img_left, img_right, self.board_size, self.coarse_width, self.cache)
+            if not ret:
+                with self.lock:
+                    self.rejected += 1
+                if not auto:
+                    print(f"Görünüm {index}: dama tahtası iki görüntüde birden bulunamadı.")
+                return False
+                
+            with self.lock:
+                if self.img_size is None:
+                    self.img_size = img_size
+                size_changed = tuple(img_size) != tuple(self.img_size)
+                if size_changed:
+                    self.rejected += 1
+            if size_changed:
+                # Çözücüler tek bir görüntü boyutu varsayar
+                print(f"Görünüm {index}: görüntü boyutu {img_size[0]}x{img_size[1]} oturumun "
+                      f"{self.img_size[0]}x{self.img_size[1]} boyutundan farklı, reddedildi.")
+                return False
+            if auto and not self.is_new_pose(corners_left):
+                return False
+                
+            # Tam kareler diske yazılır, bellekte yalnızca köşeler kalır
+            with self.lock:
+                number = len(self.views) + 1
+                view = CalibrationView(index, corners_left, corners_right)
+                self.views.append(view)
+                self.last_accept = time.monotonic()
+            if self.spill_dir:
+                timestamp = utils.get_timestamp()
+                view.left_path = utils.save_image(img_left, self.spill_dir, f"calib_left_{number}", timestamp)
+                view.right_path = utils.save_image(img_right, self.spill_dir, f"calib_right_{number}", timestamp)
+            print(f"Kalibrasyon görünümü kabul edildi: {number}{' (otomatik)' if auto else ''}")
+            return True
+        except Exception as e:
+            print(f"Kalibrasyon görünümü işlenemedi: {e}")
+            return False
+        finally:
+            with self.lock:
+                self.pending -= 1
+                
+    @property
+    def count(self):
+        """Kabul edilmiş görünüm sayısı"""
+        with self.lock:
+            return len(self.views)
+            
+    def calibrate(self, calibration, progress=None):
+        """Bekleyen tespitleri bitir ve yalnızca çözücüleri çalıştır"""
+        with self.lock:
+            futures = list(self.futures)
+        for done, future in enumerate(futures, 1):
+            future.result()
+            if progress is not None:
+                progress(done, len(futures))
+                
+        # Tespitler paralel bittiğinden sonuç yakalama sırasına göre dizilir
+        with self.lock:
+            views = sorted(self.views, key=lambda view: view.index)
+        return calibration.calibrate_from_corners(
+            [view.corners_left for view in views], [view.corners_right for view in views],
+            self.img_size, self.board_size, self.square_size, self.max_views, self.outlier_factor, self.refine)
+            
+    def close(self):
+        self.executor.shutdown(wait=False)
 
 class StereoCalibration:
-    def __init__(self):
+    def __init__(self, map_format='fixed', alpha=0.9):
         self.calibrated = False
         self.camera_matrix_left = None
         self.dist_coeffs_left = None
@@ -20,117 +321,426 @@ class StereoCalibration:
         self.img_size = None
         self.rect_map_left = None
         self.rect_map_right = None
+        self.interpolation = cv2.INTER_LINEAR  # Rektifikasyon enterpolasyonu
+        self.map_format = map_format           # 'fixed' veya 'float' (bkz. MAP_FORMATS)
+        self.alpha = alpha                     # stereoRectify ölçeklemesi: 0 yalnızca geçerli pikseller, 1 tüm pikseller
         
-    def calibrate(self, images_left, images_right, board_size=(9, 6), square_size=25.0):
-        """Stereo kamera kalibrasyonu"""
-        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+        # stereoRectify çıktıları (rektifiye görüntülerde derinlik ve üçgenleme için)
+        self.R1 = None
+        self.R2 = None
+        self.P1 = None
+        self.P2 = None
+        self.Q = None
+        self.roi_left = None
+        self.roi_right = None
         
-        # Satranç tahtası köşe noktaları için dünya koordinatları
-        objp = np.zeros((board_size[0] * board_size[1], 3), np.float32)
-        objp[:, :2] = np.mgrid[0:board_size[0], 0:board_size[1]].T.reshape(-1, 2) * square_size
+        # Ek çıkış boyutları için harita takımları, (boyut, kırpma) ile önbelleklenir
+        self.map_sets = {}
         
-        # Her iki kamera için köşe noktalarını ve obje noktalarını sakla
-        objpoints = []
-        imgpoints_left = []
-        imgpoints_right = []
+        # Son çözümün stereo RMS hatası ve görünüm seçimi raporu
+        self.rms = None
+        self.selection_report = None
         
-        for img_left, img_right in zip(images_left, images_right):
-            gray_left = cv2.cvtColor(img_left, cv2.COLOR_BGR2GRAY)
-            gray_right = cv2.cvtColor(img_right, cv2.COLOR_BGR2GRAY)
-            
-            self.img_size = gray_left.shape[::-1]
-            
-            # Her iki görüntüde de köşeleri bul
-            ret_left, corners_left = cv2.findChessboardCorners(gray_left, board_size, None)
-            ret_right, corners_right = cv2.findChessboardCorners(gray_right, board_size, None)
-            
-            # Eğer her iki görüntüde de köşeler bulunduysa
-            if ret_left and ret_right:
-                # Alt piksel doğruluk için köşeleri iyileştir
-                corners_left_refined = cv2.cornerSubPix(gray_left, corners_left, (11, 11), (-1, -1), criteria)
-                corners_right_refined = cv2.cornerSubPix(gray_right, corners_right, (11, 11), (-1, -1), criteria)
-                
-                objpoints.append(objp)
-                imgpoints_left.append(corners_left_refined)
-                imgpoints_right.append(corners_right_refined)
+    def calibrate(self, images_left, images_right, board_size=(9, 6), square_size=25.0, workers=None, progress=None,
+                  coarse_width=None, max_views=None, outlier_factor=None, refine=False, cache=None):
+        """Stereo kamera kalibrasyonu
         
-        if not objpoints:
+        Köşe tespiti çiftler üzerinde paralel yapılır (workers: iş parçacığı
+        sayısı, varsayılan çekirdek sayısı); progress(biten, toplam) ile
+        ilerleme bildirilir. coarse_width verilirse tahta önce küçültülmüş
+        kopyada aranır. Görüntüler dosya yolu olabilir; cache (CornerCache)
+        verilirse önceden tespit edilmiş çiftler yeniden aranmaz. max_views,
+        outlier_factor ve refine için bkz. calibrate_from_corners.
+        """
+        results = detect_stereo_corners(images_left, images_right, board_size, workers, progress, coarse_width,
+                                        cache)
+        
+        # Sonuçlar giriş sırasındadır, kalibrasyon sonucu çalışma sırasından bağımsızdır
+        imgpoints_left = [corners_left for ok, corners_left, _, _ in results if ok]
+        imgpoints_right = [corners_right for ok, _, corners_right, _ in results if ok]
+        sizes = [img_size for _, _, _, img_size in results if img_size is not None]
+        if sizes:
+            self.img_size = sizes[-1]
+        print(f"Köşeler {len(imgpoints_left)}/{len(results)} çiftte bulundu.")
+        
+        return self.calibrate_from_corners(imgpoints_left, imgpoints_right, self.img_size, board_size, square_size,
+                                           max_views, outlier_factor, refine)
+        
+    def calibrate_from_corners(self, imgpoints_left, imgpoints_right, img_size, board_size=(9, 6), square_size=25.0,
+                               max_views=None, outlier_factor=None, refine=False):
+        """Önceden bulunmuş köşe noktalarından stereo kalibrasyonu hesapla
+        
+        max_views verilir ve görünüm sayısı bunu aşarsa çözücüler poz
+        çeşitliliği ve kapsamaya göre seçilen en fazla max_views görünümde
+        çalışır. outlier_factor verilirse görünüm başına hatası medyanın bu
+        katını aşan görünümler atılır. refine açıksa seçilen alt kümenin
+        sonucu tüm (aykırı olmayan) görünümlerde başlangıç tahmini olarak
+        iyileştirilir. Süreler ve RMS değişimi selection_report'a yazılır.
+        """
+        self.img_size = img_size
+        
+        if not imgpoints_left:
             print("Kalibrasyon için yeterli veri bulunamadı!")
             return False
         
+        # Satranç tahtası köşe noktaları için dünya koordinatları
+        objp = np.zeros((board_size[0] * board_size[1], 3), np.float32)
+        objp[:, :2] = np.mgrid[0:board_size[0], 0:board_size[1]].T.reshape(-1, 2) * square_size
+        
+        started = time.perf_counter()
+        views = list(range(len(imgpoints_left)))
+        selected = view_selection.select_diverse(imgpoints_left, imgpoints_right, board_size, self.img_size,
+                                                 max_views) if max_views else views
+        select_time = time.perf_counter() - started
+        
         # Her kamera için ayrı ayrı kalibrasyon yap
-        ret_left, self.camera_matrix_left, self.dist_coeffs_left, rvecs_left, tvecs_left = cv2.calibrateCamera(
-            objpoints, imgpoints_left, self.img_size, None, None)
+        self._solve_intrinsics(objp, imgpoints_left, imgpoints_right, selected)
         
-        ret_right, self.camera_matrix_right, self.dist_coeffs_right, rvecs_right, tvecs_right = cv2.calibrateCamera(
-            objpoints, imgpoints_right, self.img_size, None, None)
+        outliers = set()
+        if outlier_factor:
+            # Tüm görünümler alt kümenin iç parametreleriyle değerlendirilir
+            errors = self._view_errors(objp, imgpoints_left, imgpoints_right)
+            outliers = set(view_selection.find_outliers(errors, outlier_factor))
+            if outliers & set(selected):
+                start = time.perf_counter()
+                inliers = [i for i in views if i not in outliers]
+                selected = view_selection.select_diverse(imgpoints_left, imgpoints_right, board_size, self.img_size,
+                                                         max_views or len(inliers), inliers)
+                select_time += time.perf_counter() - start
+                self._solve_intrinsics(objp, imgpoints_left, imgpoints_right, selected)
         
         # Stereo kalibrasyon
+        self.rms = self._solve_stereo(objp, imgpoints_left, imgpoints_right, selected)
+        solve_time = time.perf_counter() - started - select_time
+        
+        if max_views or outlier_factor:
+            inliers = [i for i in views if i not in outliers]
+            errors = self._view_errors(objp, imgpoints_left, imgpoints_right)
+            report = {
+                'views': len(views),
+                'selected': len(selected),
+                'outliers': len(outliers),
+                'select_time': select_time,
+                'solve_time': solve_time,
+                # Görünüm başına hatalardan RMS: seçilen alt kümede ve tüm aykırı olmayan görünümlerde
+                'rms_selected': view_selection.rms(errors[selected]),
+                'rms_all': view_selection.rms(errors[inliers]),
+                'rms_refined': None,
+                'refine_time': None
+            }
+            
+            if refine and len(selected) < len(inliers):
+                start = time.perf_counter()
+                self._solve_intrinsics(objp, imgpoints_left, imgpoints_right, inliers, use_guess=True)
+                self.rms = self._solve_stereo(objp, imgpoints_left, imgpoints_right, inliers)
+                report['refine_time'] = time.perf_counter() - start
+                report['rms_refined'] = view_selection.rms(
+                    self._view_errors(objp, imgpoints_left, imgpoints_right)[inliers])
+                    
+            self.selection_report = report
+            print(format_selection_report(report))
+        
+        # Stereo rektifikasyon ve haritalar
+        self.init_rectification()
+        
+        self.calibrated = True
+        return True
+        
+    def _solve_intrinsics(self, objp, imgpoints_left, imgpoints_right, views, use_guess=False):
+        """Seçilen görünümlerde iki kamerayı ayrı ayrı kalibre et"""
+        objpoints = [objp] * len(views)
+        flags = cv2.CALIB_USE_INTRINSIC_GUESS if use_guess else 0
+        guess_left = (self.camera_matrix_left, self.dist_coeffs_left) if use_guess else (None, None)
+        guess_right = (self.camera_matrix_right, self.dist_coeffs_right) if use_guess else (None, None)
+        
+        _, self.camera_matrix_left, self.dist_coeffs_left, _, _ = cv2.calibrateCamera(
+            objpoints, [imgpoints_left[i] for i in views], self.img_size, *guess_left, flags=flags)
+            
+        _, self.camera_matrix_right, self.dist_coeffs_right, _, _ = cv2.calibrateCamera(
+            objpoints, [imgpoints_right[i] for i in views], self.img_size, *guess_right, flags=flags)
+            
+    def _solve_stereo(self, objp, imgpoints_left, imgpoints_right, views):
+        """İç parametreler sabitken iki kamera arasındaki dönüşümü bul; RMS hatayı döndür"""
         retval, self.camera_matrix_left, self.dist_coeffs_left, self.camera_matrix_right, self.dist_coeffs_right, \
         self.R, self.T, self.E, self.F = cv2.stereoCalibrate(
-            objpoints, imgpoints_left, imgpoints_right,
+            [objp] * len(views), [imgpoints_left[i] for i in views], [imgpoints_right[i] for i in views],
             self.camera_matrix_left, self.dist_coeffs_left,
             self.camera_matrix_right, self.dist_coeffs_right,
             self.img_size, None, None, None, None,
-            cv2.CALIB_FIX_INTRINSIC, criteria)
+            cv2.CALIB_FIX_INTRINSIC, CORNER_CRITERIA)
+        return retval
         
-        # Stereo rektifikasyon
-        R1, R2, P1, P2, Q, roi_left, roi_right = cv2.stereoRectify(
+    def _view_errors(self, objp, imgpoints_left, imgpoints_right):
+        """Görünüm başına iki gözün kötü olanının RMS hatası"""
+        errors_left = view_selection.view_errors(objp, imgpoints_left, self.camera_matrix_left, self.dist_coeffs_left)
+        errors_right = view_selection.view_errors(objp, imgpoints_right, self.camera_matrix_right,
+                                                  self.dist_coeffs_right)
+        return np.maximum(errors_left, errors_right)
+        
+    def stereo_rectify(self):
+        """Rektifikasyon dönüşümlerini (R1, R2, P1, P2, Q, geçerli ROI'ler) hesapla"""
+        self.R1, self.R2, self.P1, self.P2, self.Q, self.roi_left, self.roi_right = cv2.stereoRectify(
             self.camera_matrix_left, self.dist_coeffs_left,
             self.camera_matrix_right, self.dist_coeffs_right,
             self.img_size, self.R, self.T,
-            flags=cv2.CALIB_ZERO_DISPARITY, alpha=0.9)
+            flags=cv2.CALIB_ZERO_DISPARITY, alpha=self.alpha)
+        
+    def init_rectification(self):
+        """Mevcut kamera parametrelerinden rektifikasyon haritalarını oluştur"""
+        # Stereo rektifikasyon
+        self.stereo_rectify()
         
         # Rektifikasyon haritaları
-        self.rect_map_left = cv2.initUndistortRectifyMap(
-            self.camera_matrix_left, self.dist_coeffs_left, R1, P1, self.img_size, cv2.CV_32FC1)
+        self._init_maps()
         
+    def _init_maps(self):
+        """Kayıtlı rektifikasyon dönüşümlerinden yalnızca haritaları oluştur"""
+        self.map_sets = {}
+        map_type = MAP_FORMATS[self.map_format]
+        self.rect_map_left = cv2.initUndistortRectifyMap(
+            self.camera_matrix_left, self.dist_coeffs_left, self.R1, self.P1, self.img_size, map_type)
         self.rect_map_right = cv2.initUndistortRectifyMap(
-            self.camera_matrix_right, self.dist_coeffs_right, R2, P2, self.img_size, cv2.CV_32FC1)
+            self.camera_matrix_right, self.dist_coeffs_right, self.R2, self.P2, self.img_size, map_type)
+            
+    def set_map_format(self, map_format):
+        """Harita biçimini değiştir; mevcut haritalar yeniden hesaplanmadan dönüştürülür"""
+        self.map_format = map_format
+        self._convert_maps()
         
-        self.calibrated = True
-        return True
+    def _convert_maps(self):
+        """Yüklenen haritalar seçili biçimde değilse cv2.convertMaps ile dönüştür"""
+        map_type = MAP_FORMATS[self.map_format]
+        maps = []
+        for rect_map in (self.rect_map_left, self.rect_map_right):
+            if rect_map is None:
+                return
+            map1, map2 = rect_map
+            is_fixed = map1.dtype == np.int16
+            if is_fixed != (map_type == cv2.CV_16SC2):
+                rect_map = cv2.convertMaps(map1, map2, map_type)
+            maps.append(tuple(rect_map))
+        self.rect_map_left, self.rect_map_right = maps
+        self.map_sets = {}
     
-    def rectify_images(self, img_left, img_right):
-        """Görüntüleri rektifiye et"""
+    def valid_roi(self):
+        """İki gözün de geçerli piksel içerdiği ortak bölge (x, y, genişlik, yükseklik)
+        
+        Satırlar hizalı kalsın diye iki göz için tek bölge kullanılır; ROI
+        bilinmiyorsa veya kesişim boşsa tüm görüntü döndürülür.
+        """
+        full = (0, 0, int(self.img_size[0]), int(self.img_size[1]))
+        if self.roi_left is None or self.roi_right is None:
+            return full
+        (xl, yl, wl, hl), (xr, yr, wr, hr) = self.roi_left, self.roi_right
+        x0, y0 = max(xl, xr), max(yl, yr)
+        x1, y1 = min(xl + wl, xr + wr), min(yl + hl, yr + hr)
+        if x1 <= x0 or y1 <= y0:
+            return full
+        return (int(x0), int(y0), int(x1 - x0), int(y1 - y0))
+        
+    def output_size(self, width, crop=False):
+        """Kaynak bölgenin en-boy oranını koruyan çıkış boyutu; tam boyuttan büyütülmez"""
+        _, _, region_width, region_height = self.valid_roi() if crop else (0, 0, *self.img_size)
+        width = int(min(width, region_width))
+        return (width, max(1, int(round(width * region_height / float(region_width)))))
+        
+    def get_map_set(self, size=None, crop=False):
+        """Ham kareden size boyutuna (crop: geçerli ROI'ye kırpılmış) tek remap'lik haritalar"""
+        roi = self.valid_roi() if crop else (0, 0, int(self.img_size[0]), int(self.img_size[1]))
+        size = (roi[2], roi[3]) if size is None else (int(size[0]), int(size[1]))
+        key = (size, bool(crop))
+        if key in self.map_sets:
+            return self.map_sets[key]
+            
+        x0, y0, region_width, region_height = roi
+        sx = size[0] / float(region_width)
+        sy = size[1] / float(region_height)
+        # Rektifiye tam çözünürlükten çıkışa: kırp, ölçekle (piksel merkezleri korunur)
+        transform = np.array([[sx, 0.0, sx * (0.5 - x0) - 0.5],
+                              [0.0, sy, sy * (0.5 - y0) - 0.5],
+                              [0.0, 0.0, 1.0]])
+        P1 = transform @ self.P1
+        P2 = transform @ self.P2
+        
+        if tuple(size) == tuple(self.img_size) and not crop:
+            # Tam boyut mevcut haritaları paylaşır (paketten belleğe eşlenmiş olabilir)
+            map_left, map_right = self.rect_map_left, self.rect_map_right
+        else:
+            map_type = MAP_FORMATS[self.map_format]
+            map_left = cv2.initUndistortRectifyMap(
+                self.camera_matrix_left, self.dist_coeffs_left, self.R1, P1, size, map_type)
+            map_right = cv2.initUndistortRectifyMap(
+                self.camera_matrix_right, self.dist_coeffs_right, self.R2, P2, size, map_type)
+                
+        map_set = RectificationMaps(size, roi, map_left, map_right, P1, P2)
+        self.map_sets[key] = map_set
+        return map_set
+        
+    def rectify_images(self, img_left, img_right, map_set=None):
+        """Görüntüleri rektifiye et
+        
+        map_set (get_map_set) verilirse görüntüler tek remap ile doğrudan o
+        takımın boyutuna ve bölgesine rektifiye edilir.
+        """
         if not self.calibrated or self.rect_map_left is None or self.rect_map_right is None:
             return img_left, img_right
         
-        rect_left = cv2.remap(img_left, self.rect_map_left[0], self.rect_map_left[1], cv2.INTER_LINEAR)
-        rect_right = cv2.remap(img_right, self.rect_map_right[0], self.rect_map_right[1], cv2.INTER_LINEAR)
+        return self.rectify_image(img_left, 'left', map_set), self.rectify_image(img_right, 'right', map_set)
+        
+    def rectify_image(self, image, side, map_set=None):
+        """Tek bir gözün görüntüsünü rektifiye et (side: 'left' veya 'right')"""
+        if not self.calibrated or self.rect_map_left is None or self.rect_map_right is None:
+            return image
+        if map_set is None:
+            rect_map = self.rect_map_left if side == 'left' else self.rect_map_right
+        else:
+            rect_map = map_set.map_left if side == 'left' else map_set.map_right
+        return cv2.remap(image, rect_map[0], rect_map[1], self.interpolation)
+        
+    def rescale(self, image_size):
+        """Kamera çözünürlüğü değiştiğinde iç parametreleri ölçekle ve haritaları yeniden oluştur
         
-        return rect_left, rect_right
+        Piksel koordinatları x' = A x ile değişir (A ölçek ve piksel merkezi
+        kayması); K' = A K, F' = A^-T F A^-1. E normalize koordinatlarda
+        tanımlı olduğundan değişmez.
+        """
+        if not self.calibrated or tuple(image_size) == tuple(self.img_size):
+            return False
+        sx = image_size[0] / float(self.img_size[0])
+        sy = image_size[1] / float(self.img_size[1])
+        # Piksel merkezleri (x + 0.5) ölçeklenir
+        A = np.array([[sx, 0.0, 0.5 * (sx - 1)], [0.0, sy, 0.5 * (sy - 1)], [0.0, 0.0, 1.0]])
+        self.camera_matrix_left = A @ self.camera_matrix_left
+        self.camera_matrix_right = A @ self.camera_matrix_right
+        if self.F is not None:
+            A_inv = np.linalg.inv(A)
+            self.F = A_inv.T @ self.F @ A_inv
+        self.img_size = tuple(image_size)
+        self.init_rectification()
+        print(f"Kalibrasyon {image_size[0]}x{image_size[1]} çözünürlüğüne ölçeklendi.")
+        return True
     
-    def save_calibration(self, filename="calibration/stereo_calibration.pkl"):
-        """Kalibrasyon verilerini kaydet"""
+    def _parameters(self):
+        """Haritaların dışındaki küçük parametreler"""
+        return {key: getattr(self, key) for key in PARAM_KEYS}
+        
+    def _load_parameters(self, params):
+        for key in PARAM_KEYS:
+            value = params.get(key)
+            if key in ('img_size', 'roi_left', 'roi_right'):
+                value = tuple(value) if value is not None else None
+            elif value is not None:
+                value = np.array(value, dtype=np.float64)
+            setattr(self, key, value)
+            
+    def save_calibration(self, filename="calibration/stereo_calibration"):
+        """Kalibrasyon verilerini paket dizinine kaydet
+        
+        params.json küçük parametreleri ve sürümü, maps.json harita dosyalarını
+        ve üretildikleri parametrelerin özetini tutar; haritalar ham .npy
+        dosyalarıdır ve yüklenirken belleğe eşlenir.
+        """
         if not self.calibrated:
             print("Kaydedilecek kalibrasyon verisi yok!")
             return False
         
-        calibration_data = {
-            'camera_matrix_left': self.camera_matrix_left,
-            'dist_coeffs_left': self.dist_coeffs_left,
-            'camera_matrix_right': self.camera_matrix_right,
-            'dist_coeffs_right': self.dist_coeffs_right,
-            'R': self.R,
-            'T': self.T,
-            'E': self.E,
-            'F': self.F,
-            'img_size': self.img_size,
-            'rect_map_left': self.rect_map_left,
-            'rect_map_right': self.rect_map_right
-        }
-        
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        
-        with open(filename, 'wb') as f:
-            pickle.dump(calibration_data, f)
-        
-        print(f"Kalibrasyon verileri {filename} dosyasına kaydedildi.")
+        if filename.endswith('.pkl'):
+            filename = filename[:-len('.pkl')]
+        os.makedirs(filename, exist_ok=True)
+        
+        # Önce haritalar, en son params.json yazılır; yarıda kalan kayıt eski paketi bozmaz
+        self._save_maps(filename)
+        params = {'version': BUNDLE_VERSION,
+                  'params': {key: _to_json(value) for key, value in self._parameters().items()}}
+        _write_json(os.path.join(filename, 'params.json'), params)
+        
+        print(f"Kalibrasyon verileri {filename} dizinine kaydedildi.")
         return True
     
-    def load_calibration(self, filename="calibration/stereo_calibration.pkl"):
-        """Kalibrasyon verilerini yükle"""
+    def _save_maps(self, bundle):
+        """Haritaları .npy olarak ve parametre özetini maps.json olarak yaz"""
+        files = {}
+        for side, rect_map in (('left', self.rect_map_left), ('right', self.rect_map_right)):
+            for index, array in enumerate(rect_map):
+                name = f"rect_map_{side}_{index}.npy"
+                temp = os.path.join(bundle, name + '.tmp')
+                with open(temp, 'wb') as f:
+                    np.save(f, np.ascontiguousarray(array))
+                os.replace(temp, os.path.join(bundle, name))
+                files[name] = [str(array.dtype), list(array.shape)]
+        _write_json(os.path.join(bundle, 'maps.json'), {
+            'checksum': parameter_checksum(self._parameters(), self.map_format),
+            'map_format': self.map_format,
+            'files': files})
+            
+    def load_calibration(self, filename="calibration/stereo_calibration", prefault=True):
+        """Kalibrasyon verilerini yükle
+        
+        Haritalar belleğe eşlenir ve prefault açıksa arka planda sayfalanır,
+        böylece ilk kare haritaların tamamı okunmadan gösterilebilir. Özet
+        tutmayan veya başka biçimdeki haritalar yeniden oluşturulup yazılır.
+        Eski .pkl dosyaları bulunursa pakete dönüştürülür.
+        """
+        path = find_calibration(filename)
+        if path is None:
+            print(f"Kalibrasyon verileri bulunamadı: {filename}")
+            return False
+        if path.endswith('.pkl'):
+            return self._migrate_pickle(path)
+            
+        try:
+            with open(os.path.join(path, 'params.json')) as f:
+                bundle = json.load(f)
+            if bundle.get('version', 0) > BUNDLE_VERSION:
+                print(f"Kalibrasyon paketi sürümü desteklenmiyor: {bundle.get('version')}")
+                return False
+            self._load_parameters(bundle['params'])
+            
+            if self._load_maps(path):
+                if prefault:
+                    prefault_maps((self.rect_map_left, self.rect_map_right))
+            else:
+                # Parametreler elle değiştirilmiş olabilir, rektifikasyon dönüşümleri de yenilenir
+                print("Rektifikasyon haritaları parametrelerle uyuşmuyor, yeniden oluşturuluyor...")
+                self.init_rectification()
+                self.calibrated = True
+                self.save_calibration(path)
+                
+            self.calibrated = True
+            print(f"Kalibrasyon verileri {path} dizininden yüklendi.")
+            return True
+        except Exception as e:
+            print(f"Kalibrasyon verileri yüklenemedi: {e}")
+            return False
+            
+    def _load_maps(self, bundle):
+        """Özet ve biçim tutuyorsa haritaları belleğe eşle; tutmuyorsa False döndür"""
+        try:
+            with open(os.path.join(bundle, 'maps.json')) as f:
+                maps = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if maps.get('checksum') != parameter_checksum(self._parameters(), maps.get('map_format')):
+            return False
+            
+        arrays = {}
+        for name, (dtype, shape) in maps['files'].items():
+            array = np.load(os.path.join(bundle, name), mmap_mode='r')
+            if str(array.dtype) != dtype or list(array.shape) != shape:
+                return False
+            arrays[name] = array
+        self.map_sets = {}
+        self.rect_map_left = (arrays['rect_map_left_0.npy'], arrays['rect_map_left_1.npy'])
+        self.rect_map_right = (arrays['rect_map_right_0.npy'], arrays['rect_map_right_1.npy'])
+        
+        # Başka biçimde kaydedilmiş haritalar dönüştürülüp pakete geri yazılır
+        if maps['map_format'] != self.map_format:
+            self._convert_maps()
+            self._save_maps(bundle)
+        return True
+        
+    def _migrate_pickle(self, filename):
+        """Eski .pkl kalibrasyonunu yükle ve yanına paket olarak kaydet"""
         try:
             with open(filename, 'rb') as f:
                 calibration_data = pickle.load(f)
@@ -143,27 +753,81 @@ class StereoCalibration:
             self.T = calibration_data['T']
             self.E = calibration_data['E']
             self.F = calibration_data['F']
-            self.img_size = calibration_data['img_size']
+            self.img_size = tuple(calibration_data['img_size'])
             self.rect_map_left = calibration_data.get('rect_map_left', None)
             self.rect_map_right = calibration_data.get('rect_map_right', None)
             
-            # Eğer rektifikasyon haritaları yoksa oluştur
+            # Eğer rektifikasyon haritaları yoksa oluştur, varsa seçili biçime dönüştür
             if self.rect_map_left is None or self.rect_map_right is None:
-                R1, R2, P1, P2, Q, roi_left, roi_right = cv2.stereoRectify(
-                    self.camera_matrix_left, self.dist_coeffs_left,
-                    self.camera_matrix_right, self.dist_coeffs_right,
-                    self.img_size, self.R, self.T,
-                    flags=cv2.CALIB_ZERO_DISPARITY, alpha=0.9)
-                
-                self.rect_map_left = cv2.initUndistortRectifyMap(
-                    self.camera_matrix_left, self.dist_coeffs_left, R1, P1, self.img_size, cv2.CV_32FC1)
-                
-                self.rect_map_right = cv2.initUndistortRectifyMap(
-                    self.camera_matrix_right, self.dist_coeffs_right, R2, P2, self.img_size, cv2.CV_32FC1)
+                self.init_rectification()
+            else:
+                self._convert_maps()
+                # Eski dosyalarda rektifikasyon dönüşümleri yoksa yalnızca onlar hesaplanır
+                for key in ('R1', 'R2', 'P1', 'P2', 'Q', 'roi_left', 'roi_right'):
+                    setattr(self, key, calibration_data.get(key))
+                if self.Q is None:
+                    self.stereo_rectify()
             
             self.calibrated = True
             print(f"Kalibrasyon verileri {filename} dosyasından yüklendi.")
-            return True
         except Exception as e:
             print(f"Kalibrasyon verileri yüklenemedi: {e}")
-            return False
\ No newline at end of file
+            return False
+            
+        self.save_calibration(filename[:-len('.pkl')])
+        return True
+
+def format_selection_report(report):
+    """Görünüm seçimi raporunu konsol için tek satıra çevir"""
+    text = (f"Görünüm seçimi: {report['selected']}/{report['views']} görünüm, {report['outliers']} aykırı atıldı | "
+            f"seçim {1000 * report['select_time']:.0f} ms, çözüm {1000 * report['solve_time']:.0f} ms | "
+            f"RMS seçilenlerde {report['rms_selected']:.3f} px, tüm görünümlerde {report['rms_all']:.3f} px")
+    if report['rms_refined'] is not None:
+        text += (f" | tüm görünümlerde iyileştirme {1000 * report['refine_time']:.0f} ms, "
+                 f"RMS {report['rms_all']:.3f} -> {report['rms_refined']:.3f} px")
+    return text
+
+def find_calibration(filename):
+    """Yüklenecek kalibrasyonu bul: paket dizini, yoksa aynı adlı eski .pkl dosyası"""
+    if filename.endswith('.pkl'):
+        bundle = filename[:-len('.pkl')]
+        legacy = filename
+    else:
+        bundle = filename
+        legacy = filename + '.pkl'
+    if os.path.isfile(os.path.join(bundle, 'params.json')):
+        return bundle
+    if os.path.isfile(legacy):
+        return legacy
+    return None
+
+def parameter_checksum(params, map_format):
+    """Haritaların üretildiği parametrelerin ve harita biçiminin SHA-256 özeti"""
+    digest = hashlib.sha256(f"v{BUNDLE_VERSION}:{map_format}".encode())
+    for key in PARAM_KEYS:
+        value = params.get(key)
+        digest.update(key.encode())
+        if value is not None:
+            digest.update(np.ascontiguousarray(value, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+def prefault_maps(maps):
+    """Belleğe eşlenmiş haritaların sayfalarını arka planda oku"""
+    def run():
+        for rect_map in maps:
+            for array in rect_map:
+                if isinstance(array, np.memmap):
+                    # Her sayfadan bir bayt okumak sayfayı belleğe getirir
+                    int(array.reshape(-1).view(np.uint8)[::PAGE_SIZE].sum())
+    threading.Thread(target=run, name="calibration-prefault", daemon=True).start()
+
+def _to_json(value):
+    if value is None:
+        return None
+    return np.asarray(value).tolist()
+
+def _write_json(filename, data):
+    temp = filename + '.tmp'
+    with open(temp, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp, filename)
\ No newline at end of file
@@ -7,6 +7,10 @@ import time
 import threading
 import os
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from synthetic_camera import SyntheticStereoRig
+from replay_camera import SessionReplay
 
 # ArduCam SDK desteği (opsiyonel)
 ARDUCAM_AVAILABLE = False
@@ -16,6 +20,519 @@ try:
 except ImportError:
     print("ArduCam SDK bulunamadı. OpenCV tabanlı kamera desteği kullanılacak.")
 
+class FrameRing:
+    """Tek kamera için önceden ayrılmış, sabit sayıda kare yuvası
+    
+    Kamera arka ucu doğrudan yuvalara yazar. Tüketicinin sabitlediği (pin)
+    yuvalar asla üzerine yazılmaz; yazıcı bunları atlar. Tüm yuvalar
+    sabitliyse yeni kare atılır ve overruns sayacı artar.
+    """
+    def __init__(self, size, shape, dtype=np.uint8):
+        self.size = max(3, size)
+        self.lock = threading.Lock()
+        self.pins = [0] * self.size
+        self.seqs = [0] * self.size  # Yuvadaki karenin sıra numarası (0: geçersiz)
+        self.next_index = 0
+        self.overruns = 0
+        self._allocate(shape, dtype)
+        
+    def _allocate(self, shape, dtype):
+        self.slots = [np.empty(shape, dtype) for _ in range(self.size)]
+        self.views = []
+        for slot in self.slots:
+            view = slot.view()
+            view.flags.writeable = False
+            self.views.append(view)
+            
+    def acquire_write(self, hold=False):
+        """Yazılacak bir yuva seç ve geçersiz işaretle, boş yuva yoksa None döndür
+        
+        hold=True ise yuva yazım bitene kadar sabitlenir (yazım başka bir
+        thread'de sürerken yuva yeniden seçilmesin diye); iş bitince unpin()
+        ile bırakılmalıdır.
+        """
+        with self.lock:
+            for k in range(self.size):
+                index = (self.next_index + k) % self.size
+                if self.pins[index] == 0:
+                    self.seqs[index] = 0
+                    self.next_index = (index + 1) % self.size
+                    if hold:
+                        self.pins[index] += 1
+                    return index
+            self.overruns += 1
+            return None
+            
+    def store(self, index, image):
+        """Arka uç yuvaya yazamadıysa görüntüyü yuvaya kopyala (gerekirse yeniden ayır)"""
+        slot = self.slots[index]
+        if image is slot:
+            return
+        if image.shape != slot.shape or image.dtype != slot.dtype:
+            # Kamera farklı çözünürlük döndürdü; sabitli eski diziler tutamaçlarda yaşamaya devam eder
+            with self.lock:
+                self._allocate(image.shape, image.dtype)
+                self.seqs = [0] * self.size
+            slot = self.slots[index]
+        np.copyto(slot, image)
+        
+    def commit(self, index, seq):
+        """Yazımı tamamlanan yuvayı geçerli yap"""
+        with self.lock:
+            self.seqs[index] = seq
+            
+    def pin(self, index, seq):
+        """Yuva hâlâ bu kareyi tutuyorsa sabitle"""
+        with self.lock:
+            if self.seqs[index] != seq:
+                return False
+            self.pins[index] += 1
+            return True
+            
+    def unpin(self, index):
+        with self.lock:
+            self.pins[index] -= 1
+
+class Frame:
+    """Tek bir kameradan gelen, zaman damgalı ve sıra numaralı kare"""
+    def __init__(self, image, seq, timestamp, ring=None, index=None, source_index=None):
+        self.image = image
+        self.seq = seq              # Kameranın kendi sıra numarası
+        self.timestamp = timestamp  # time.monotonic() cinsinden grab() anı (saniye)
+        self.ring = ring            # Kare bir halka tampon yuvasındaysa
+        self.index = index
+        self.source_index = source_index  # İki gözü birlikte üreten kaynakta ortak kare numarası
+        
+    def pin(self):
+        return self.ring is None or self.ring.pin(self.index, self.seq)
+        
+    def unpin(self):
+        if self.ring is not None:
+            self.ring.unpin(self.index)
+
+class StereoPair:
+    """Zaman damgasına göre eşleştirilmiş sol/sağ kare çifti"""
+    def __init__(self, left, right, seq):
+        self.left = left
+        self.right = right
+        self.seq = seq
+        self.skew = abs(left.timestamp - right.timestamp)  # Ölçülen sol/sağ kayması (saniye)
+        self.timestamp = max(left.timestamp, right.timestamp)
+
+class StereoFrameHandle:
+    """Halka tampondaki bir stereo çifti sabitleyen salt-okunur tutamaç
+    
+    release() çağrılana kadar yuvalar üzerine yazılmaz; with bloğu ile
+    kullanılabilir. left/right dizileri salt-okunurdur, üzerine çizim
+    yapılacaksa önce kopyalanmalıdır.
+    """
+    def __init__(self, pair):
+        self.pair = pair
+        self.seq = pair.seq
+        self.timestamp = pair.timestamp  # Yakalama anı (time.monotonic)
+        self.skew = pair.skew
+        self.left = pair.left.image
+        self.right = pair.right.image
+        self.released = False
+        
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.pair.left.unpin()
+            self.pair.right.unpin()
+            
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+class ArduCamSource:
+    """ArduCam mipi_camera nesnesine OpenCV benzeri grab()/retrieve() arayüzü sağla"""
+    def __init__(self, camera, width, height, color_mode='bgr'):
+        self.camera = camera
+        self.width = width
+        self.height = height
+        self.color_mode = color_mode
+        self.frame = None
+        
+    def isOpened(self):
+        return self.camera is not None
+        
+    def grab(self):
+        self.frame = self.camera.capture(arducam.FORMAT_GRAY, 1)
+        return self.frame is not None
+        
+    def raw_view(self):
+        """FORMAT_GRAY ham tamponunu kopyalamadan HxW uint8 diziye çevir"""
+        frame_buffer = self.frame.as_array.reshape(-1)
+        # Sürücü satırları 32 piksele hizalar; satır adımı genişlikten büyük olabilir
+        stride = (self.width + 31) & ~31
+        if frame_buffer.size < stride * self.height:
+            stride = self.width
+        rows = frame_buffer.size // stride
+        return frame_buffer[:rows * stride].reshape(rows, stride)[:self.height, :self.width]
+        
+    def retrieve(self, image=None):
+        if self.frame is None:
+            return False, None
+        gray = self.raw_view()
+        if self.color_mode == 'gray':
+            if image is None:
+                return True, gray.copy()
+            np.copyto(image, gray)
+            return True, image
+        # Renkli görüntüye dönüştür (verildiyse doğrudan hedef yuvaya)
+        return True, cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR, dst=image)
+
+class OpenCVGraySource:
+    """VideoCapture karelerini tek kanala çevirerek doğrudan hedef yuvaya yaz"""
+    def __init__(self, camera):
+        self.camera = camera
+        self.scratch = None  # Yeniden kullanılan BGR ara tamponu
+        
+    def isOpened(self):
+        return self.camera.isOpened()
+        
+    def grab(self):
+        return self.camera.grab()
+        
+    def retrieve(self, image=None):
+        ret, self.scratch = self.camera.retrieve(self.scratch)
+        if not ret or self.scratch is None:
+            return False, None
+        if self.scratch.ndim == 2:
+            if image is None:
+                return True, self.scratch.copy()
+            np.copyto(image, self.scratch)
+            return True, image
+        if image is not None and image.shape != self.scratch.shape[:2]:
+            image = None
+        return True, cv2.cvtColor(self.scratch, cv2.COLOR_BGR2GRAY, dst=image)
+
+MJPEG_DECODE_FLAGS = {
+    ('bgr', 1): cv2.IMREAD_COLOR,
+    ('bgr', 2): cv2.IMREAD_REDUCED_COLOR_2,
+    ('bgr', 4): cv2.IMREAD_REDUCED_COLOR_4,
+    ('bgr', 8): cv2.IMREAD_REDUCED_COLOR_8,
+    ('gray', 1): cv2.IMREAD_GRAYSCALE,
+    ('gray', 2): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    ('gray', 4): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    ('gray', 8): cv2.IMREAD_REDUCED_GRAYSCALE_8
+}
+
+class MJPEGSource:
+    """MJPEG VideoCapture'dan sıkıştırılmış kareleri al; çözme ayrı yapılabilir
+    
+    CAP_PROP_CONVERT_RGB=0 ile retrieve() JPEG baytlarını döndürür. Kareler
+    doğrudan tek kanala veya küçültülmüş ölçekte çözülebilir (JPEG
+    çözücüsünün DCT ölçeklemesi ile, tam çözüp küçültmekten çok daha ucuz).
+    """
+    def __init__(self, camera, color_mode='bgr', scale=1):
+        self.camera = camera
+        self.color_mode = color_mode
+        self.scale = scale
+        self.flags = MJPEG_DECODE_FLAGS[(color_mode, scale)]
+        
+    def isOpened(self):
+        return self.camera.isOpened()
+        
+    def grab(self):
+        return self.camera.grab()
+        
+    def retrieve_compressed(self):
+        """Kilitlenen karenin sıkıştırılmış baytlarını al (tampon yeniden kullanılmaz)"""
+        ret, data = self.camera.retrieve()
+        if not ret or data is None:
+            return False, None
+        return True, data
+        
+    def decode(self, data, image=None):
+        """Sıkıştırılmış kareyi çöz, boyut uyuyorsa doğrudan verilen yuvaya yaz"""
+        if data.ndim == 1 or data.shape[0] == 1:
+            decoded = cv2.imdecode(data.reshape(-1), self.flags)
+            if decoded is None:
+                return False, None
+        else:
+            # Arka uç CONVERT_RGB=0'ı yok saydı, kare zaten çözülmüş
+            decoded = data
+            if self.color_mode == 'gray' and decoded.ndim == 3:
+                decoded = cv2.cvtColor(decoded, cv2.COLOR_BGR2GRAY)
+            if self.scale > 1:
+                decoded = cv2.resize(decoded, (decoded.shape[1] // self.scale, decoded.shape[0] // self.scale),
+                                     interpolation=cv2.INTER_AREA)
+        if image is None or image.shape != decoded.shape:
+            return True, decoded
+        np.copyto(image, decoded)
+        return True, image
+        
+    def retrieve(self, image=None):
+        """Eşzamanlı yol: al ve aynı thread'de çöz"""
+        ret, data = self.retrieve_compressed()
+        if not ret:
+            return False, None
+        return self.decode(data, image)
+
+class FramePacer:
+    """Kareleri sabit aralıklı son tarihlere göre zamanla
+    
+    Bekleme süresi bir sonraki son tarihe göre hesaplanır, böylece kare
+    üretmek için harcanan süre aralıktan düşülür ve gerçek hız ayarlanan
+    FPS'in altına inmez. Bir aralıktan fazla geride kalınırsa takvim
+    şimdiye göre yeniden kurulur (birikmiş kareler topluca üretilmez).
+    """
+    def __init__(self, fps):
+        self.period = 1.0 / fps if fps > 0 else 0.0
+        self.deadline = None
+        
+    def wait(self):
+        if self.period <= 0:
+            return
+        now = time.monotonic()
+        if self.deadline is None or now - self.deadline > self.period:
+            self.deadline = now
+        elif self.deadline > now:
+            time.sleep(self.deadline - now)
+        self.deadline += self.period
+
+class DummySource:
+    """Kamera olmadığında sabit bir sahte kareyi FPS hızında üret"""
+    def __init__(self, image, fps):
+        self.image = image
+        self.pacer = FramePacer(fps)
+        
+    def isOpened(self):
+        return True
+        
+    def grab(self):
+        self.pacer.wait()
+        return True
+        
+    def retrieve(self, image=None):
+        if image is None:
+            return True, self.image
+        np.copyto(image, self.image)
+        return True, image
+
+class CameraGrabber:
+    """Tek bir kamerayı kendi thread'inde grab()/retrieve() ile sürekli oku
+    
+    decoder (ThreadPoolExecutor) verilirse ve kaynak sıkıştırılmış kare
+    sağlıyorsa çözme havuzda yapılır; kareler yine yakalama sırasıyla
+    yayınlanır.
+    """
+    def __init__(self, side, source, on_frame, ring, decoder=None, max_inflight=4):
+        self.side = side            # 'left' veya 'right'
+        self.source = source
+        self.on_frame = on_frame    # Her yeni Frame için çağrılır: on_frame(side, frame)
+        self.ring = ring
+        self.decoder = decoder
+        self.max_inflight = max(1, max_inflight)  # Aynı anda çözülen en fazla kare
+        self.inflight = deque()     # (future, yuva, zaman damgası), yakalama sırasıyla
+        self.complete_lock = threading.RLock()
+        self.seq = 0
+        self.errors = 0
+        self.is_running = False
+        self.thread = None
+        
+    def start(self):
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run, name=f"grab-{self.side}")
+        self.thread.daemon = True
+        self.thread.start()
+        
+    def stop(self):
+        self.is_running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+            
+    def _run(self):
+        """grab() ile kareyi kilitle, zaman damgası al, sonra retrieve() ile çöz"""
+        if self.decoder is not None and isinstance(self.source, MJPEGSource):
+            self._run_pipelined()
+            return
+            
+        while self.is_running:
+            try:
+                if not self.source.grab():
+                    if not self.source.isOpened():
+                        # Kaynak bitti (ör. oynatılan oturumun sonu)
+                        print(f"{self.side} kamera kaynağı kapandı.")
+                        break
+                    self._handle_error("grab() başarısız")
+                    continue
+                # Zaman damgası retrieve()'dan önce alınır, çözme süresi kaymaya eklenmez
+                timestamp = time.monotonic()
+                # Sentetik düzen ve oynatma gözleri aynı kareden üretir; numarası eşleştirmede kullanılır
+                source_index = getattr(self.source, 'frame_index', None)
+                
+                # Tüm yuvalar tüketicide sabitliyse kare çözülmeden atılır
+                index = self.ring.acquire_write()
+                if index is None:
+                    continue
+                    
+                ret, image = self.source.retrieve(self.ring.slots[index])
+                if not ret or image is None:
+                    self._handle_error("retrieve() başarısız")
+                    continue
+                self.ring.store(index, image)
+            except Exception as e:
+                self._handle_error(e)
+                continue
+                
+            self.seq += 1
+            self.ring.commit(index, self.seq)
+            self.on_frame(self.side, Frame(self.ring.views[index], self.seq, timestamp, self.ring, index,
+                                           source_index))
+            
+    def _run_pipelined(self):
+        """grab() ve sıkıştırılmış kareyi al, çözmeyi havuza ver; sonuçlar sırayla yayınlanır"""
+        while self.is_running:
+            # Havuzda çok kare varsa en eskisinin bitmesini bekle (bellek ve gecikme sınırı)
+            if len(self.inflight) >= self.max_inflight:
+                wait_futures([self.inflight[0][0]], timeout=1.0)
+                self._drain()
+                continue
+                
+            index = None
+            try:
+                if not self.source.grab():
+                    if not self.source.isOpened():
+                        print(f"{self.side} kamera kaynağı kapandı.")
+                        break
+                    self._handle_error("grab() başarısız")
+                    continue
+                timestamp = time.monotonic()
+                
+                # Yuva çözme bitene kadar tutulur
+                index = self.ring.acquire_write(hold=True)
+                if index is None:
+                    continue
+                    
+                ret, data = self.source.retrieve_compressed()
+                if not ret:
+                    self.ring.unpin(index)
+                    self._handle_error("retrieve() başarısız")
+                    continue
+            except Exception as e:
+                if index is not None:
+                    self.ring.unpin(index)
+                self._handle_error(e)
+                continue
+                
+            with self.complete_lock:
+                future = self.decoder.submit(self.source.decode, data, self.ring.slots[index])
+                self.inflight.append((future, index, timestamp))
+                future.add_done_callback(self._drain)
+                
+        # Havuzda kalan kareleri tamamla, yuvalar serbest kalsın
+        for future, _, _ in list(self.inflight):
+            wait_futures([future], timeout=1.0)
+        self._drain()
+        
+    def _drain(self, future=None):
+        """Baştan itibaren çözülmüş kareleri yakalama sırasıyla yayınla"""
+        with self.complete_lock:
+            while self.inflight and self.inflight[0][0].done():
+                self._complete(*self.inflight.popleft())
+                
+    def _complete(self, future, index, timestamp):
+        try:
+            ret, image = future.result()
+            if not ret or image is None:
+                raise ValueError("MJPEG karesi çözülemedi")
+            self.ring.store(index, image)
+        except Exception as e:
+            self.ring.unpin(index)
+            self._handle_error(e)
+            return
+            
+        self.seq += 1
+        self.ring.commit(index, self.seq)
+        self.ring.unpin(index)
+        self.on_frame(self.side, Frame(self.ring.views[index], self.seq, timestamp, self.ring, index))
+            
+    def _handle_error(self, error):
+        self.errors += 1
+        if self.errors == 1 or self.errors % 100 == 0:
+            print(f"{self.side} kamera yakalama hatası ({self.errors}): {error}")
+        time.sleep(0.01)
+
+class StereoPairer:
+    """Sol ve sağ kareleri zaman damgalarına göre eşleştir, toleransı aşanları at
+    
+    Kareler kaynağın ortak kare numarasını taşıyorsa (source_index; iki gözü
+    aynı sahne karesinden üreten sentetik düzen ve oynatma) zaman yerine
+    eşit numaralar eşleştirilir: olabildiğince hızlı üretimde komşu
+    kareler de zaman toleransına girer.
+    """
+    def __init__(self, max_skew=0.010, history=4):
+        self.max_skew = max_skew  # saniye
+        self.pending = {'left': deque(maxlen=history), 'right': deque(maxlen=history)}
+        self.static = {'left': None, 'right': None}
+        self.seq = 0
+        self.dropped = {'left': 0, 'right': 0}
+        self.last_skew = None
+        self.max_seen_skew = 0.0
+        
+    def set_static(self, side, frame):
+        """Bu taraf sabit kare üretiyor (kamera yok), her kareyle eşleşebilir"""
+        self.static[side] = frame
+        
+    def push(self, side, frame):
+        """Yeni kareyi ekle, eşleşme bulunduysa StereoPair döndür"""
+        other = 'right' if side == 'left' else 'left'
+        
+        if self.static[other] is not None:
+            # Sabit kare zaman damgası olarak yeni kareninkini alır, kayma sıfırdır
+            static = self.static[other]
+            return self._emit(side, frame, Frame(static.image, static.seq, frame.timestamp))
+            
+        best_index = None
+        best_skew = None
+        if frame.source_index is not None:
+            # Aynı kaynak karesinden gelen eş, zaman kaymasından bağımsız olarak kabul edilir
+            for i, candidate in enumerate(self.pending[other]):
+                if candidate.source_index == frame.source_index:
+                    best_index, best_skew = i, 0.0
+                    break
+        else:
+            # Diğer taraftaki en yakın zamanlı kareyi bul
+            for i, candidate in enumerate(self.pending[other]):
+                skew = abs(candidate.timestamp - frame.timestamp)
+                if best_skew is None or skew < best_skew:
+                    best_index = i
+                    best_skew = skew
+                
+        if best_index is None or best_skew > self.max_skew:
+            # Eşleşme yok, beklet; kuyruk doluysa en eski kare düşer
+            if len(self.pending[side]) == self.pending[side].maxlen:
+                self.dropped[side] += 1
+            self.pending[side].append(frame)
+            return None
+            
+        # Eşleşen kareden eski kareler artık hiç eşleşemez
+        for _ in range(best_index):
+            self.pending[other].popleft()
+            self.dropped[other] += 1
+        match = self.pending[other].popleft()
+        self.dropped[side] += len(self.pending[side])
+        self.pending[side].clear()
+        
+        return self._emit(side, frame, match)
+        
+    def _emit(self, side, frame, match):
+        self.seq += 1
+        if side == 'left':
+            pair = StereoPair(frame, match, self.seq)
+        else:
+            pair = StereoPair(match, frame, self.seq)
+            
+        self.last_skew = pair.skew
+        self.max_seen_skew = max(self.max_seen_skew, pair.skew)
+        return pair
+
 class CameraController:
     def __init__(self):
         self.left_camera = None
@@ -24,16 +541,47 @@ class CameraController:
         self.frame_width = 640
         self.frame_height = 480
         self.fps = 30
-        self.capture_thread = None
+        self.max_skew = 0.010  # Sol/sağ arası izin verilen en büyük kayma (saniye)
+        self.ring_size = 5     # Kamera başına önceden ayrılan kare yuvası sayısı
+        self.color_mode = 'bgr'  # 'bgr' veya 'gray' (uçtan uca tek kanal)
+        self.backend = 'auto'    # 'auto', 'arducam', 'opencv', 'synthetic', 'replay'
+        self.capture_format = 'raw'  # OpenCV kameraları için 'raw' veya 'mjpeg'
+        self.decode_threads = 4      # MJPEG çözme havuzu boyutu
+        self.decode_scale = 1        # MJPEG çözme ölçeği (1, 2, 4, 8)
+        self.decoder = None
+        self.synthetic_options = {}  # SyntheticStereoRig parametreleri
+        self.synthetic_rig = None
+        self.replay_options = {}     # SessionReplay parametreleri
+        self.replay = None
+        self.grabbers = []
+        self.pairer = None
         self.lock = threading.Lock()
-        self.last_frame_left = None
-        self.last_frame_right = None
+        self.new_pair = threading.Condition(self.lock)  # Yeni çift yayınlanınca uyandırılır
+        self.last_pair = None
+        
+    def configure(self, camera_settings):
+        """CAMERA_SETTINGS biçimindeki bir sözlükten kamera parametrelerini ayarla"""
+        self.frame_width = camera_settings['width']
+        self.frame_height = camera_settings['height']
+        self.fps = camera_settings['fps']
+        self.max_skew = camera_settings['max_skew_ms'] / 1000.0
+        self.ring_size = camera_settings['ring_size']
+        self.color_mode = camera_settings['color_mode']
+        self.backend = camera_settings['backend']
+        self.capture_format = camera_settings['capture_format']
+        self.decode_threads = camera_settings['decode_threads']
+        self.decode_scale = camera_settings['decode_scale']
         
     def init_cameras(self, left_id=0, right_id=1):
-        """Kamera sistemini başlat (ArduCam veya standart OpenCV)"""
+        """Kamera sistemini başlat (ArduCam, standart OpenCV veya sentetik)"""
+        
+        if self.backend == 'synthetic':
+            return self._init_synthetic_cameras()
+        if self.backend == 'replay':
+            return self._init_replay_cameras()
         
         # ArduCam SDK mevcut ise onu kullan
-        if ARDUCAM_AVAILABLE:
+        if ARDUCAM_AVAILABLE and self.backend in ('auto', 'arducam'):
             try:
                 print("ArduCam kameraları başlatılıyor...")
                 return self._init_arducam_cameras()
@@ -72,6 +620,31 @@ class CameraController:
                 self.right_camera.close_camera()
                 self.right_camera = None
             return False
+            
+    def _init_synthetic_cameras(self):
+        """Bilinen taban çizgisi ve iç parametrelerle sentetik stereo kamera başlat"""
+        self.synthetic_rig = SyntheticStereoRig(self.frame_width, self.frame_height, self.fps,
+                                                color_mode=self.color_mode, **self.synthetic_options)
+        self.left_camera = self.synthetic_rig.sources['left']
+        self.right_camera = self.synthetic_rig.sources['right']
+        print(f"Sentetik stereo kamera başlatıldı (taban çizgisi {self.synthetic_rig.baseline:.1f} mm).")
+        return True
+        
+    def _init_replay_cameras(self):
+        """Kayıtlı bir stereo oturumu kamera yerine oynat"""
+        try:
+            self.replay = SessionReplay(fps=self.fps, color_mode=self.color_mode, **self.replay_options)
+        except Exception as e:
+            print(f"Oynatma oturumu açılamadı: {e}")
+            return False
+            
+        # Kare yuvaları kayıttaki çözünürlüğe göre ayrılır
+        if self.replay.frame_size is not None:
+            self.frame_width, self.frame_height = self.replay.frame_size
+        self.left_camera = self.replay.sources['left']
+        self.right_camera = self.replay.sources['right']
+        print(f"Oturum oynatılıyor: {self.replay.path} ({'gerçek zamanlı' if self.replay.realtime else 'olabildiğince hızlı'})")
+        return True
     
     def _init_opencv_cameras(self, left_id=0, right_id=1):
         """Standart OpenCV kameralarını başlat"""
@@ -83,17 +656,13 @@ class CameraController:
             if self.left_camera.isOpened():
                 print("Sol kamera başarıyla başlatıldı.")
                 # Kamera ayarlarını yap
-                self.left_camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
-                self.left_camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
-                self.left_camera.set(cv2.CAP_PROP_FPS, self.fps)
+                self._configure_opencv_camera(self.left_camera, "Sol")
                 
                 try:
                     self.right_camera = cv2.VideoCapture(right_id)
                     if self.right_camera.isOpened():
                         # Kamera ayarlarını yap
-                        self.right_camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
-                        self.right_camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
-                        self.right_camera.set(cv2.CAP_PROP_FPS, self.fps)
+                        self._configure_opencv_camera(self.right_camera, "Sağ")
                         print("Sağ kamera başarıyla başlatıldı.")
                     else:
                         print("Sağ kamera başlatılamadı, test moduna geçiliyor.")
@@ -115,164 +684,270 @@ class CameraController:
             print(f"Kamera başlatma hatası: {e}")
             return False
     
-    def _capture_thread_function(self):
-        """Arka planda sürekli kameralardan görüntü yakala"""
-        while self.is_running:
-            if ARDUCAM_AVAILABLE and isinstance(self.left_camera, arducam.mipi_camera):
-                self._capture_arducam_frames()
-            else:
-                self._capture_opencv_frames()
+    def reconfigure(self, width=None, height=None, fps=None):
+        """Çözünürlük ve/veya FPS'i değiştir; yakalama çalışıyorsa yeniden başlatılır"""
+        resize = width is not None and height is not None and (width, height) != (self.frame_width, self.frame_height)
+        if resize and self.replay is not None:
+            print("Oynatılan oturumun çözünürlüğü değiştirilemez.")
+            resize = False
             
-            time.sleep(1.0 / self.fps)  # FPS değerine göre bekle
-    
-    def _capture_arducam_frames(self):
-        """ArduCam kameralarından görüntü yakala"""
-        try:
-            if self.left_camera:
-                # Sol kameradan görüntü al
-                frame = self.left_camera.capture(arducam.FORMAT_GRAY, 1)
-                frame_buffer = frame.as_array
-                left_frame = cv2.imdecode(frame_buffer, cv2.IMREAD_GRAYSCALE)
-                # Renkli görüntüye dönüştür
-                left_frame = cv2.cvtColor(left_frame, cv2.COLOR_GRAY2BGR)
-            else:
-                left_frame = self._create_dummy_frame("Sol Kamera Yok")
-            
-            if self.right_camera:
-                # Sağ kameradan görüntü al
-                frame = self.right_camera.capture(arducam.FORMAT_GRAY, 1)
-                frame_buffer = frame.as_array
-                right_frame = cv2.imdecode(frame_buffer, cv2.IMREAD_GRAYSCALE)
-                # Renkli görüntüye dönüştür
-                right_frame = cv2.cvtColor(right_frame, cv2.COLOR_GRAY2BGR)
-            else:
-                right_frame = self._create_dummy_frame("Sağ Kamera Yok")
+        was_running = self.is_running
+        if was_running:
+            self.stop_capture()
+        if resize:
+            self.frame_width, self.frame_height = width, height
+        if fps is not None:
+            self.fps = fps
             
-            with self.lock:
-                self.last_frame_left = left_frame
-                self.last_frame_right = right_frame
-        except Exception as e:
-            print(f"ArduCam görüntü yakalama hatası: {e}")
-    
-    def _capture_opencv_frames(self):
-        """OpenCV kameralarından görüntü yakala"""
         try:
-            if self.left_camera is not None and self.left_camera.isOpened():
-                ret_left, left_frame = self.left_camera.read()
-                if not ret_left:
-                    left_frame = self._create_dummy_frame("Sol Kamera Hatası")
+            if self.synthetic_rig is not None:
+                self._init_synthetic_cameras()
+            elif self.replay is not None:
+                self.replay.fps = self.fps
             else:
-                left_frame = self._create_dummy_frame("Sol Kamera Yok")
+                for camera, name in ((self.left_camera, "Sol"), (self.right_camera, "Sağ")):
+                    if ARDUCAM_AVAILABLE and isinstance(camera, arducam.mipi_camera):
+                        camera.set_resolution(self.frame_width, self.frame_height)
+                        camera.set_control(arducam.v4l2.V4L2_CID_FRAME_RATE, self.fps)
+                    elif isinstance(camera, cv2.VideoCapture) and camera.isOpened():
+                        self._configure_opencv_camera(camera, name)
+        except Exception as e:
+            print(f"Kamera yeniden yapılandırma hatası: {e}")
             
-            if self.right_camera is not None and self.right_camera.isOpened():
-                ret_right, right_frame = self.right_camera.read()
-                if not ret_right:
-                    right_frame = self._create_dummy_frame("Sağ Kamera Hatası")
+        if was_running:
+            return self.start_capture()
+        return True
+        
+    def _configure_opencv_camera(self, camera, name):
+        """Çözünürlük/FPS ayarla; MJPEG istendiyse FOURCC'yi önce anlaş"""
+        if self.capture_format == 'mjpeg':
+            # V4L2'de FOURCC çözünürlükten önce ayarlanmalı
+            camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
+        camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
+        camera.set(cv2.CAP_PROP_FPS, self.fps)
+        
+        if self.capture_format == 'mjpeg':
+            if self._is_mjpeg(camera):
+                # Sıkıştırılmış kareler alınır, çözme havuzda yapılır
+                camera.set(cv2.CAP_PROP_CONVERT_RGB, 0)
             else:
-                right_frame = self._create_dummy_frame("Sağ Kamera Yok")
+                print(f"{name} kamera MJPEG desteklemiyor, ham formatla devam ediliyor.")
+                
+    def _is_mjpeg(self, camera):
+        fourcc = int(camera.get(cv2.CAP_PROP_FOURCC))
+        return fourcc == cv2.VideoWriter_fourcc(*'MJPG')
+        
+    def _make_source(self, camera, name):
+        """Kamera nesnesini grab()/retrieve() arayüzlü bir kaynağa çevir"""
+        if ARDUCAM_AVAILABLE and isinstance(camera, arducam.mipi_camera):
+            return ArduCamSource(camera, self.frame_width, self.frame_height, self.color_mode)
+        if camera is not None and camera.isOpened():
+            if self.capture_format == 'mjpeg' and isinstance(camera, cv2.VideoCapture) and self._is_mjpeg(camera):
+                return MJPEGSource(camera, self.color_mode, self._decode_scale())
+            if self.color_mode == 'gray' and isinstance(camera, cv2.VideoCapture):
+                return OpenCVGraySource(camera)
+            return camera
+        return DummySource(self._create_dummy_frame(f"{name} Kamera Yok"), self.fps)
             
-            with self.lock:
-                self.last_frame_left = left_frame
-                self.last_frame_right = right_frame
-        except Exception as e:
-            print(f"OpenCV görüntü yakalama hatası: {e}")
+    def _on_frame(self, side, frame):
+        """Grabber thread'lerinden gelen kareleri eşleştir ve son çifti yayınla"""
+        with self.lock:
+            pair = self.pairer.push(side, frame)
+            if pair is None:
+                return
+                
+            # Yayınlanan çiftin yuvaları sabitlenir, böylece acquire_stereo_frame her zaman başarır
+            if not pair.left.pin():
+                return
+            if not pair.right.pin():
+                pair.left.unpin()
+                return
+                
+            if self.last_pair is not None:
+                self.last_pair.left.unpin()
+                self.last_pair.right.unpin()
+            self.last_pair = pair
+            self.new_pair.notify_all()
     
+    def _decode_scale(self):
+        """MJPEG çözme ölçeği (yalnızca MJPEG yakalamada geçerli)"""
+        if self.capture_format == 'mjpeg' and self.decode_scale in (2, 4, 8):
+            return self.decode_scale
+        return 1
+        
+    def _frame_shape(self):
+        """Renk moduna ve çözme ölçeğine göre kare boyutu"""
+        scale = self._decode_scale()
+        height, width = self.frame_height // scale, self.frame_width // scale
+        if self.color_mode == 'gray':
+            return (height, width)
+        return (height, width, 3)
+        
     def _create_dummy_frame(self, message):
         """Test modu için sahte kare oluştur"""
-        dummy_frame = np.zeros((self.frame_height, self.frame_width, 3), dtype=np.uint8)
+        dummy_frame = np.zeros(self._frame_shape(), dtype=np.uint8)
+        height, width = dummy_frame.shape[:2]
         font = cv2.FONT_HERSHEY_SIMPLEX
         # Mesaj metnini ekranın ortasına yerleştir
         text_size = cv2.getTextSize(message, font, 1, 2)[0]
-        text_x = (self.frame_width - text_size[0]) // 2
-        text_y = (self.frame_height + text_size[1]) // 2
+        text_x = (width - text_size[0]) // 2
+        text_y = (height + text_size[1]) // 2
         cv2.putText(dummy_frame, message, (text_x, text_y), font, 1, (255, 255, 255), 2)
         
         # Çerçeveye bir grid ekle (demo görsel ilgi için)
-        for x in range(0, self.frame_width, 50):
-            cv2.line(dummy_frame, (x, 0), (x, self.frame_height), (50, 50, 50), 1)
-        for y in range(0, self.frame_height, 50):
-            cv2.line(dummy_frame, (0, y), (self.frame_width, y), (50, 50, 50), 1)
+        for x in range(0, width, 50):
+            cv2.line(dummy_frame, (x, 0), (x, height), (50, 50, 50), 1)
+        for y in range(0, height, 50):
+            cv2.line(dummy_frame, (0, y), (width, y), (50, 50, 50), 1)
             
         return dummy_frame
     
+    def get_stereo_pair(self):
+        """Son eşleştirilmiş StereoPair nesnesini getir (yoksa None)"""
+        with self.lock:
+            return self.last_pair
+            
+    def acquire_stereo_frame(self):
+        """Son stereo çifti kopyalamadan sabitle ve StereoFrameHandle döndür (yoksa None)
+        
+        Tutamaç işi bitince release() ile bırakılmalıdır.
+        """
+        with self.lock:
+            return self._pin_last_pair()
+            
+    def wait_for_new_pair(self, after_seq, timeout=None):
+        """Sıra numarası after_seq'ten büyük bir çift yayınlanana kadar bekle
+        
+        Yeni çift gelirse sabitlenmiş StereoFrameHandle, timeout dolarsa None
+        döndürür. Böylece tüketici aynı çifti tekrar tekrar işlemez.
+        """
+        with self.new_pair:
+            has_new_pair = self.new_pair.wait_for(
+                lambda: self.last_pair is not None and self.last_pair.seq > after_seq, timeout)
+            if not has_new_pair:
+                return None
+            return self._pin_last_pair()
+            
+    def _pin_last_pair(self):
+        """Son çifti sabitle (self.lock tutulurken çağrılmalı)"""
+        pair = self.last_pair
+        if pair is None:
+            return None
+        if not pair.left.pin():
+            return None
+        if not pair.right.pin():
+            pair.left.unpin()
+            return None
+        return StereoFrameHandle(pair)
+            
+    def get_sync_stats(self):
+        """Sol/sağ senkronizasyon istatistiklerini döndür"""
+        with self.lock:
+            if self.pairer is None:
+                return None
+            overruns = {grabber.side: grabber.ring.overruns for grabber in self.grabbers}
+            return {
+                'pairs': self.pairer.seq,
+                'last_skew': self.pairer.last_skew,
+                'max_skew': self.pairer.max_seen_skew,
+                'dropped_left': self.pairer.dropped['left'],
+                'dropped_right': self.pairer.dropped['right'],
+                'overruns_left': overruns.get('left', 0),
+                'overruns_right': overruns.get('right', 0)
+            }
+            
     def get_stereo_frame(self):
         """Sol ve sağ kameralardan son görüntüleri getir"""
         if not self.is_running:
-            if ARDUCAM_AVAILABLE and isinstance(self.left_camera, arducam.mipi_camera):
-                return self._get_arducam_frames()
-            else:
-                return self._get_opencv_frames()
+            return self._get_single_frames()
         else:
-            # Thread çalışıyorsa son kaydedilen frame'leri döndür
-            with self.lock:
-                if self.last_frame_left is None or self.last_frame_right is None:
-                    left_frame = self._create_dummy_frame("Sol Görüntü Yok")
-                    right_frame = self._create_dummy_frame("Sağ Görüntü Yok")
-                    return left_frame, right_frame
+            # Thread çalışıyorsa son eşleştirilen çiftin kopyasını döndür
+            handle = self.acquire_stereo_frame()
+            if handle is None:
+                left_frame = self._create_dummy_frame("Sol Görüntü Yok")
+                right_frame = self._create_dummy_frame("Sağ Görüntü Yok")
+                return left_frame, right_frame
                 
-                return self.last_frame_left.copy(), self.last_frame_right.copy()
+            with handle:
+                return handle.left.copy(), handle.right.copy()
     
-    def _get_arducam_frames(self):
-        """ArduCam kameralarından anlık görüntü al"""
+    def _get_single_frames(self):
+        """Kameralardan anlık görüntü al (önce iki grab(), sonra iki retrieve())"""
         try:
-            if self.left_camera:
-                frame = self.left_camera.capture(arducam.FORMAT_GRAY, 1)
-                frame_buffer = frame.as_array
-                left_frame = cv2.imdecode(frame_buffer, cv2.IMREAD_GRAYSCALE)
-                left_frame = cv2.cvtColor(left_frame, cv2.COLOR_GRAY2BGR)
-            else:
-                left_frame = self._create_dummy_frame("Sol Kamera Yok")
+            left_source = self._make_source(self.left_camera, "Sol")
+            right_source = self._make_source(self.right_camera, "Sağ")
             
-            if self.right_camera:
-                frame = self.right_camera.capture(arducam.FORMAT_GRAY, 1)
-                frame_buffer = frame.as_array
-                right_frame = cv2.imdecode(frame_buffer, cv2.IMREAD_GRAYSCALE)
-                right_frame = cv2.cvtColor(right_frame, cv2.COLOR_GRAY2BGR)
-            else:
-                right_frame = self._create_dummy_frame("Sağ Kamera Yok")
+            # İki kamerayı olabildiğince aynı anda kilitle
+            grabbed_left = left_source.grab()
+            grabbed_right = right_source.grab()
             
-            return left_frame, right_frame
-        except Exception as e:
-            print(f"ArduCam görüntü yakalama hatası: {e}")
-            return self._create_dummy_frame("Kamera Hatası"), self._create_dummy_frame("Kamera Hatası")
-    
-    def _get_opencv_frames(self):
-        """OpenCV kameralarından anlık görüntü al"""
-        # Kameralar yoksa veya açılamadıysa sahte görüntü üret
-        if self.left_camera is None or not self.left_camera.isOpened():
-            left_frame = self._create_dummy_frame("Sol Kamera Yok")
-        else:
-            ret_left, left_frame = self.left_camera.read()
+            ret_left, left_frame = left_source.retrieve() if grabbed_left else (False, None)
             if not ret_left:
                 left_frame = self._create_dummy_frame("Sol Kamera Hatası")
-        
-        if self.right_camera is None or not self.right_camera.isOpened():
-            right_frame = self._create_dummy_frame("Sağ Kamera Yok") 
-        else:
-            ret_right, right_frame = self.right_camera.read()
+                
+            ret_right, right_frame = right_source.retrieve() if grabbed_right else (False, None)
             if not ret_right:
                 right_frame = self._create_dummy_frame("Sağ Kamera Hatası")
-        
-        return left_frame, right_frame
+            
+            return left_frame, right_frame
+        except Exception as e:
+            print(f"Görüntü yakalama hatası: {e}")
+            return self._create_dummy_frame("Kamera Hatası"), self._create_dummy_frame("Kamera Hatası")
     
     def start_capture(self):
-        """Sürekli görüntü yakalama modunu başlat"""
+        """Sürekli görüntü yakalama modunu başlat (her kamera kendi thread'inde)"""
         if self.is_running:
             return True
         
+        # Yazılan yuva, yayınlanan çift ve tüketicinin tuttuğu çift dışında kalan yuvalar bekleyen karelere
+        self.pairer = StereoPairer(self.max_skew, history=max(1, self.ring_size - 3))
+        self.last_pair = None
+        
+        sources = {
+            'left': self._make_source(self.left_camera, "Sol"),
+            'right': self._make_source(self.right_camera, "Sağ")
+        }
+        
+        # Sahte kaynaklar sabit kare üretir; ikisi de sahteyse sol taraf FPS'i belirler
+        for side, source in sources.items():
+            if isinstance(source, DummySource):
+                self.pairer.set_static(side, Frame(source.image, 0, time.monotonic()))
+                
+        # MJPEG kaynakları iki kamera için ortak bir çözme havuzu kullanır
+        if any(isinstance(source, MJPEGSource) for source in sources.values()):
+            self.decoder = ThreadPoolExecutor(max_workers=max(1, self.decode_threads),
+                                              thread_name_prefix="mjpeg-decode")
+                                              
+        self.grabbers = []
+        for side, source in sources.items():
+            if isinstance(source, DummySource) and (side == 'right' or not isinstance(sources['right'], DummySource)):
+                continue
+            if isinstance(source, MJPEGSource):
+                # Çözülmekte olan kareler de birer yuva tutar
+                inflight = max(1, self.decode_threads)
+                ring = FrameRing(self.ring_size + inflight, self._frame_shape())
+                grabber = CameraGrabber(side, source, self._on_frame, ring, self.decoder, inflight)
+            else:
+                ring = FrameRing(self.ring_size, self._frame_shape())
+                grabber = CameraGrabber(side, source, self._on_frame, ring)
+            self.grabbers.append(grabber)
+            
         self.is_running = True
-        self.capture_thread = threading.Thread(target=self._capture_thread_function)
-        self.capture_thread.daemon = True
-        self.capture_thread.start()
+        for grabber in self.grabbers:
+            grabber.start()
         print("Kamera yakalama başlatıldı.")
         return True
     
     def stop_capture(self):
         """Sürekli görüntü yakalama modunu durdur"""
         self.is_running = False
-        if self.capture_thread is not None:
-            self.capture_thread.join(timeout=1.0)
-            self.capture_thread = None
+        for grabber in self.grabbers:
+            grabber.stop()
+        self.grabbers = []
+        if self.decoder is not None:
+            self.decoder.shutdown(wait=True)
+            self.decoder = None
         print("Kamera yakalama durduruldu.")
     
     def release(self):
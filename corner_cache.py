@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kalibrasyon köşe önbelleği
+Bulunan ve alt piksele iyileştirilen köşeler görüntü içeriği ve tespit
+parametrelerinin özetiyle anahtarlanıp diske yazılır. Yalnızca çözücü
+ayarları (kare boyutu, bayraklar, alpha, görünüm seçimi) değiştiğinde
+kalibrasyon tespiti hiç çalıştırmadan önbellekten yeniden hesaplanır.
+"""
+
+import os
+import hashlib
+import threading
+import numpy as np
+
+class CornerCache:
+    """Görünüm başına tespit sonucunu <özet>.npz dosyası olarak tutan disk önbelleği"""
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        
+    def key(self, img_left, img_right, params):
+        """Piksel içeriği, boyut/tür ve tespit parametrelerinin SHA-256 özeti"""
+        digest = hashlib.sha256(repr(params).encode())
+        for image in (img_left, img_right):
+            image = np.ascontiguousarray(image)
+            digest.update(f"{image.shape}{image.dtype}".encode())
+            digest.update(memoryview(image).cast('B'))
+        return digest.hexdigest()
+        
+    def file_key(self, path_left, path_right, params):
+        """Kayıtlı (kayıpsız) dosyaların bayt içeriğinin özeti
+        
+        Görüntü çözmek tespitten sonra en pahalı adım olduğundan dosyadan
+        yeniden kalibrasyonda sonuç bu anahtarla da saklanır; sonraki
+        çalıştırmalarda görüntüler hiç çözülmez.
+        """
+        digest = hashlib.sha256(("file" + repr(params)).encode())
+        for path in (path_left, path_right):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+        
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+        
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+                
+    def load(self, key):
+        """(bulundu, sol köşeler, sağ köşeler, görüntü boyutu) veya önbellekte yoksa None"""
+        try:
+            with np.load(self._path(key)) as data:
+                found = bool(data['found'])
+                result = (found,
+                          data['corners_left'] if found else None,
+                          data['corners_right'] if found else None,
+                          tuple(int(v) for v in data['img_size']))
+        except (OSError, KeyError, ValueError):
+            return None
+        return result
+        
+    def store(self, key, result):
+        """Tespit sonucunu yaz; tahtasız görünümler de saklanır, yeniden aranmaz"""
+        found, corners_left, corners_right, img_size = result
+        empty = np.zeros((0, 1, 2), np.float32)
+        temp = self._path(key) + '.tmp'
+        try:
+            with open(temp, 'wb') as f:
+                np.savez(f, found=found, img_size=np.array(img_size),
+                         corners_left=corners_left if found else empty,
+                         corners_right=corners_right if found else empty)
+            os.replace(temp, self._path(key))
+        except OSError as e:
+            print(f"Köşe önbelleğine yazılamadı: {e}")
+            
+    def clear(self):
+        """Tüm önbellek dosyalarını sil"""
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                os.remove(os.path.join(self.directory, name))
\ No newline at end of file
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Derinlik motoru
+Rektifiye çiftten disparite ve metrik derinlik haritası üretir. Disparite
+stereoRectify'ın Q matrisiyle (veya bir harita takımının projeksiyonlarından
+aynı tanımla kurulan Q ile) derinliğe çevrilir; birim kalibrasyonun birimidir
+(kare boyutu mm ise mm). Seviyeler (settings.DEPTH_TIERS) hız ile kaliteyi
+değiştirir: yarım çözünürlükte blok eşleme ile tam çözünürlükte SGBM ve
+son süzgeçler arasında seçim yapılır.
+
+Tek bir eşleyici çağrısı pratikte tek çekirdekte çalışır. Çift, üst üste
+binen yatay bantlara bölünür; bantlar GIL'i bırakan OpenCV çağrılarıyla iş
+parçacığı havuzunda hesaplanır ve yalnızca payı çıkarılmış iç satırları
+birleştirilir. Benek süzgeci bantlar birleştirildikten sonra tek seferde
+uygulanır, böylece bant sınırlarında dikiş oluşmaz.
+"""
+
+import os
+import cv2
+import numpy as np
+import time
+from concurrent.futures import ThreadPoolExecutor
+import settings
+
+WLS_AVAILABLE = hasattr(cv2, 'ximgproc')
+
+SGBM_MODES = {
+    'sgbm': cv2.STEREO_SGBM_MODE_SGBM,
+    '3way': cv2.STEREO_SGBM_MODE_SGBM_3WAY,
+    'hh': cv2.STEREO_SGBM_MODE_HH
+}
+
+def disparity_to_depth_matrix(P1, P2):
+    """İki rektifiye projeksiyondan stereoRectify ile aynı tanımlı Q matrisi"""
+    f = P1[0, 0]
+    cx, cy = P1[0, 2], P1[1, 2]
+    tx = P2[0, 3] / P2[0, 0]
+    return np.array([[1.0, 0.0, 0.0, -cx],
+                     [0.0, 1.0, 0.0, -cy],
+                     [0.0, 0.0, 0.0, f],
+                     [0.0, 0.0, -1.0 / tx, (cx - P2[0, 2]) / tx]])
+
+def scale_projection(P, scale):
+    """Görüntü scale oranında küçültüldüğünde projeksiyon (piksel merkezleri korunur)"""
+    offset = 0.5 * scale - 0.5
+    transform = np.array([[scale, 0.0, offset],
+                          [0.0, scale, offset],
+                          [0.0, 0.0, 1.0]])
+    return transform @ P
+
+def disparity_to_depth(disparity, Q):
+    """Disparite haritasından Z haritası; disparitesi olmayan pikseller 0"""
+    w = Q[3, 2] * disparity + Q[3, 3]
+    valid = (disparity > 0) & (w > 0)
+    depth = np.zeros(disparity.shape, np.float32)
+    depth[valid] = Q[2, 3] / w[valid]
+    return depth
+
+def band_ranges(height, count, margin):
+    """Satır bantları: (hesaplanan ilk, son satır, kopyalanan ilk, son satır)
+    
+    Her bant komşularına margin satır taşar; kopyalanan iç satırlar görüntüyü
+    boşluksuz ve örtüşmesiz kaplar.
+    """
+    edges = np.linspace(0, height, count + 1).round().astype(int)
+    return [(max(int(start) - margin, 0), min(int(stop) + margin, height), int(start), int(stop))
+            for start, stop in zip(edges[:-1], edges[1:])]
+
+def colorize_disparity(disparity, num_disparities):
+    """Disparite haritasını ekran için renklendir (yakın sıcak, uzak soğuk, geçersiz siyah)"""
+    scaled = np.clip(disparity * (255.0 / num_disparities), 0, 255).astype(np.uint8)
+    colored = cv2.applyColorMap(scaled, cv2.COLORMAP_TURBO)
+    colored[disparity <= 0] = 0
+    return colored
+
+class DepthResult:
+    """Bir çiftin derinlik çıktısı; haritalar seviyenin çalışma çözünürlüğündedir"""
+    def __init__(self, disparity, depth, Q, scale, num_disparities, elapsed):
+        self.disparity = disparity          # piksel (float32), geçersiz 0
+        self.depth = depth                  # kalibrasyon birimi (float32), geçersiz 0
+        self.Q = Q                          # Bu çözünürlüğün disparite -> 3B matrisi
+        self.scale = scale                  # Girdi görüntüsüne göre ölçek
+        self.num_disparities = num_disparities
+        self.elapsed = elapsed              # Hesap süresi (saniye)
+        
+    def depth_at(self, x, y, radius=2):
+        """Girdi görüntüsü koordinatındaki noktanın çevresindeki ortanca derinlik (yoksa None)"""
+        x = int(round((x + 0.5) * self.scale - 0.5))
+        y = int(round((y + 0.5) * self.scale - 0.5))
+        patch = self.depth[max(y - radius, 0):y + radius + 1, max(x - radius, 0):x + radius + 1]
+        values = patch[patch > 0]
+        return float(np.median(values)) if values.size else None
+        
+    def point_cloud(self):
+        """Her pikselin 3B noktası (reprojectImageTo3D); geçersiz piksellerde Z = 0"""
+        points = cv2.reprojectImageTo3D(self.disparity, self.Q)
+        points[self.depth <= 0] = 0
+        return points
+
+class DepthEngine:
+    """Seviyesi değiştirilebilen disparite/derinlik hesaplayıcı
+    
+    Eşleyiciler seviye, çalışma genişliği ve bant başına bir kez kurulur
+    (eşleyici nesneleri iş parçacıkları arasında paylaşılamaz); her çiftte
+    yalnızca compute çağrılır.
+    """
+    def __init__(self, tier=None, config=None, tiers=None, workers=None):
+        self.config = config or settings.DEPTH_SETTINGS
+        self.tiers = tiers or settings.DEPTH_TIERS
+        self.workers = max(1, workers or self.config['workers'] or os.cpu_count() or 1)
+        self.executor = None
+        self.matchers = {}
+        self.wls_filters = {}
+        # Artımlı mod: değişmeyen karolarda önceki disparite kullanılır
+        self.incremental = self.config['incremental']
+        self.cache = None
+        self.recomputed = 1.0   # Son çiftte yeniden hesaplanan alan oranı
+        self.tier_name = None
+        self.tier = None
+        self.last_time = None
+        self.set_tier(tier or self.config['tier'])
+        
+    def set_tier(self, name):
+        if name not in self.tiers:
+            print(f"Bilinmeyen derinlik seviyesi: {name}")
+            return False
+        tier = self.tiers[name]
+        if tier.get('wls') and not WLS_AVAILABLE:
+            print("cv2.ximgproc bulunamadı (opencv-contrib-python); WLS yerine medyan süzgeç kullanılacak.")
+        self.tier_name = name
+        self.tier = tier
+        return True
+        
+    def next_tier(self):
+        """Seviyeler arasında sırayla geç (GUI tuşu için)"""
+        names = list(self.tiers)
+        self.set_tier(names[(names.index(self.tier_name) + 1) % len(names)])
+        return self.tier_name
+        
+    @property
+    def scale(self):
+        """Seviyenin tam çözünürlüğe göre çalışma ölçeği"""
+        return self.tier['scale']
+        
+    def num_disparities(self, width):
+        """Çalışma genişliği için aranacak disparite sayısı (16'nın katı)"""
+        return max(16, int(np.ceil(width * self.config['max_disparity'] / 16.0)) * 16)
+        
+    def band_margin(self):
+        """Bant başına komşu satır payı
+        
+        Eşleme penceresi ve BM ön süzgeci yarım pencere kadar komşu satır
+        okur; SGBM'nin yol birikimi ise bandın dışından gelen maliyetleri
+        de taşıdığından band_margin satır eklenir. Bantlar tam genişlikte
+        olduğundan disparite arama aralığı için yatay pay gerekmez.
+        """
+        tier = self.tier
+        margin = tier['block_size'] // 2
+        if tier['matcher'] == 'bm':
+            margin += tier.get('prefilter_size', 9) // 2
+        else:
+            margin += self.config['band_margin']
+        return margin
+        
+    def set_workers(self, workers):
+        """Bant iş parçacığı sayısını değiştir (havuz bir sonraki çiftte yeniden kurulur)"""
+        self.workers = max(1, workers)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            
+    def _matcher(self, width, band=0):
+        """(sol eşleyici, sağ eşleyici veya None, disparite sayısı)
+        
+        Benek süzgeci eşleyicide kapalıdır; birleştirilmiş haritada uygulanır.
+        """
+        key = (self.tier_name, width, band)
+        if key in self.matchers:
+            return self.matchers[key]
+            
+        tier = self.tier
+        num_disparities = self.num_disparities(width)
+        block_size = tier['block_size']
+        if tier['matcher'] == 'bm':
+            matcher = cv2.StereoBM_create(num_disparities, block_size)
+            matcher.setPreFilterSize(tier.get('prefilter_size', 9))
+            matcher.setUniquenessRatio(tier.get('uniqueness', 15))
+        else:
+            channels = 1
+            matcher = cv2.StereoSGBM_create(
+                minDisparity=0, numDisparities=num_disparities, blockSize=block_size,
+                P1=8 * channels * block_size ** 2, P2=32 * channels * block_size ** 2,
+                disp12MaxDiff=1, uniquenessRatio=tier.get('uniqueness', 10),
+                mode=SGBM_MODES[tier.get('mode', 'sgbm')])
+        matcher.setSpeckleWindowSize(0)
+        
+        right_matcher = None
+        if tier.get('wls') and WLS_AVAILABLE:
+            right_matcher = cv2.ximgproc.createRightMatcher(matcher)
+        self.matchers[key] = (matcher, right_matcher, num_disparities)
+        return self.matchers[key]
+        
+    def _wls_filter(self, width):
+        key = (self.tier_name, width)
+        if key not in self.wls_filters:
+            wls = cv2.ximgproc.createDisparityWLSFilter(self._matcher(width)[0])
+            wls.setLambda(self.tier.get('wls_lambda', 8000.0))
+            wls.setSigmaColor(self.tier.get('wls_sigma', 1.5))
+            self.wls_filters[key] = wls
+        return self.wls_filters[key]
+        
+    def _compute_raw(self, gray_left, gray_right, bands=None):
+        """Eşleyicinin ham (16 katı sabit noktalı) sol ve varsa sağ disparitesi
+        
+        bands verilmezse iş parçacığı sayısı kadar bant kullanılır; bantlar
+        payın birkaç katından kısa olamaz.
+        """
+        height, width = gray_left.shape
+        margin = self.band_margin()
+        if bands is None:
+            bands = min(self.workers, max(1, height // (4 * margin)))
+        if bands == 1:
+            matcher, right_matcher, _ = self._matcher(width)
+            raw = matcher.compute(gray_left, gray_right)
+            raw_right = right_matcher.compute(gray_right, gray_left) if right_matcher is not None else None
+            return raw, raw_right
+            
+        raw = np.empty((height, width), np.int16)
+        raw_right = np.empty((height, width), np.int16) if self._matcher(width)[1] is not None else None
+        regions = [(start, stop, 0, width, copy_start, copy_stop, 0, width)
+                   for start, stop, copy_start, copy_stop in band_ranges(height, bands, margin)]
+        self._compute_regions(gray_left, gray_right, regions, raw, raw_right)
+        return raw, raw_right
+        
+    def _compute_regions(self, gray_left, gray_right, regions, raw, raw_right=None):
+        """Bölgeleri (paylı hesap ve kopyalanacak iç dikdörtgen) hesaplayıp raw içine yaz
+                                                                        
+        Bölge: (y0, y1, x0, x1, iç y0, iç y1, iç x0, iç x1). Birden fazla
+        bölge iş parçacığı havuzunda, her biri kendi eşleyicisiyle hesaplanır.
+        """
+        width = gray_left.shape[1]
+        
+        def run(index, region):
+            y0, y1, x0, x1, inner_y0, inner_y1, inner_x0, inner_x1 = region
+            matcher, right_matcher, _ = self._matcher(width, index)
+            inner = (slice(inner_y0 - y0, inner_y1 - y0), slice(inner_x0 - x0, inner_x1 - x0))
+            left, right = gray_left[y0:y1, x0:x1], gray_right[y0:y1, x0:x1]
+            raw[inner_y0:inner_y1, inner_x0:inner_x1] = matcher.compute(left, right)[inner]
+            if right_matcher is not None and raw_right is not None:
+                raw_right[inner_y0:inner_y1, inner_x0:inner_x1] = right_matcher.compute(right, left)[inner]
+                
+        if len(regions) == 1 or self.workers == 1:
+            for region in regions:
+                run(0, region)
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="depth-band")
+        # list() bölgelerin bitmesini bekler ve hataları çağırana taşır
+        list(self.executor.map(run, range(len(regions)), regions))
+        
+    def reset(self):
+        """Artımlı önbelleği at; sonraki çift tamamen hesaplanır"""
+        self.cache = None
+        
+    def _changed_tiles(self, current, reference):
+        """Karoların değişip değişmediği (satır x sütun bool ızgarası)
+        
+        Bir karo, pikselleri change_threshold gri düzeyinden fazla değişen
+        alanı change_fraction oranını aşınca değişmiş sayılır. Fark önce
+        change_blur penceresinde ortalanır: algılayıcı gürültüsü komşu
+        piksellerde ilintisiz olduğundan söner, sahne değişikliği kalır.
+        """
+        tile = self.config['tile_size']
+        height, width = current.shape
+        rows, cols = -(-height // tile), -(-width // tile)
+        difference = cv2.subtract(current, reference, dtype=cv2.CV_16S)
+        blur = self.config['change_blur']
+        if blur > 1:
+            difference = cv2.blur(difference, (blur, blur))
+        _, moved = cv2.threshold(cv2.convertScaleAbs(difference), self.config['change_threshold'], 255,
+                                 cv2.THRESH_BINARY)
+        moved = cv2.copyMakeBorder(moved, 0, rows * tile - height, 0, cols * tile - width,
+                                   cv2.BORDER_CONSTANT, value=0)
+        # INTER_AREA tam katlı küçültmede karo ortalamasıdır
+        fraction = cv2.resize(moved, (cols, rows), interpolation=cv2.INTER_AREA)
+        return fraction > 255 * self.config['change_fraction']
+        
+    def _incremental_regions(self, affected, shape, num_disparities):
+        """Etkilenen karo satırı dizilerinden paylı hesap bölgeleri
+        
+        Ardışık karo satırları birleştirilir; aradaki boşluk bölgenin payından
+        (disparite aralığı ve eşleme payı) kısa olan sütun grupları da tek
+        bölgede hesaplanır, çünkü ayrı hesap aynı pikselleri iki kez okur.
+        Eşleyiciler disparite aralığı ve pencereden dar görüntü kabul etmez;
+        dar bölgeler bu genişliğe açılır, görüntü daha darsa None döner
+        (tam hesap).
+        """
+        tile = self.config['tile_size']
+        height, width = shape
+        margin = self.band_margin()
+        min_width = num_disparities + self.tier['block_size']
+        if width < min_width:
+            return None
+        min_gap = -(-(num_disparities + 2 * margin) // tile)
+        regions = []
+        rows = np.flatnonzero(affected.any(axis=1))
+        for row_run in np.split(rows, np.flatnonzero(np.diff(rows) > 1) + 1):
+            columns = np.flatnonzero(affected[row_run[0]:row_run[-1] + 1].any(axis=0))
+            inner_y0, inner_y1 = row_run[0] * tile, min((row_run[-1] + 1) * tile, height)
+            for column_run in np.split(columns, np.flatnonzero(np.diff(columns) > min_gap) + 1):
+                inner_x0, inner_x1 = column_run[0] * tile, min((column_run[-1] + 1) * tile, width)
+                # Sol kenardaki piksellerin araması için disparite aralığı kadar sola taşılır
+                x0, x1 = max(inner_x0 - num_disparities - margin, 0), min(inner_x1 + margin, width)
+                if x1 - x0 < min_width:
+                    x1 = min(x0 + min_width, width)
+                    x0 = x1 - min_width
+                regions.append((max(inner_y0 - margin, 0), min(inner_y1 + margin, height), x0, x1,
+                                inner_y0, inner_y1, inner_x0, inner_x1))
+        return regions
+        
+    def _compute_incremental(self, gray_left, gray_right):
+        """Önceki çiftten değişen karoları yeniden hesapla, diğerlerinde önbelleği kullan
+        
+        Sağ gözdeki bir değişiklik, disparite aralığı kadar sağdaki sol göz
+        piksellerini etkiler; etkilenen karolar bir karo genişletilir.
+        Önbellek her refresh_interval çiftte bir (ve görüntü eşleyici için
+        bölge açılamayacak kadar darsa) tamamen yenilenir.
+        """
+        key = (self.tier_name, gray_left.shape)
+        cache = self.cache
+        tile = self.config['tile_size']
+        num_disparities = self.num_disparities(gray_left.shape[1])
+        regions = []
+        if cache is not None and cache['key'] == key and cache['frames'] < self.config['refresh_interval']:
+            affected = self._changed_tiles(gray_left, cache['left'])
+            changed_right = self._changed_tiles(gray_right, cache['right'])
+            for shift in range(-(-num_disparities // tile) + 1):
+                affected[:, shift:] |= changed_right[:, :affected.shape[1] - shift]
+            if affected.any():
+                affected = cv2.dilate(affected.astype(np.uint8), np.ones((3, 3), np.uint8)).astype(bool)
+                regions = self._incremental_regions(affected, gray_left.shape, num_disparities)
+        else:
+            regions = None
+            
+        if regions is None:
+            raw, _ = self._compute_raw(gray_left, gray_right)
+            self.cache = {'key': key, 'left': gray_left.copy(), 'right': gray_right.copy(), 'raw': raw, 'frames': 1}
+            self.recomputed = 1.0
+            return raw.copy()
+            
+        self._compute_regions(gray_left, gray_right, regions, cache['raw'])
+        area = 0
+        for _, _, _, _, y0, y1, x0, x1 in regions:
+            # Referans, önbellekteki disparitenin hesaplandığı görüntüdür
+            cache['left'][y0:y1, x0:x1] = gray_left[y0:y1, x0:x1]
+            cache['right'][y0:y1, x0:x1] = gray_right[y0:y1, x0:x1]
+            area += (y1 - y0) * (x1 - x0)
+        cache['frames'] += 1
+        self.recomputed = area / float(gray_left.size)
+        return cache['raw'].copy()
+        
+    def _filter_speckles(self, raw):
+        """Eşleyicinin kendi benek süzgeciyle aynı parametreler, birleştirilmiş haritada"""
+        window = self.tier.get('speckle_window', 0)
+        if window <= 0:
+            return raw
+        speckle_range = self.tier.get('speckle_range', 2)
+        # SGBM aralığı 16 ile çarpar, BM ham sabit noktalı değeri kullanır
+        max_diff = speckle_range if self.tier['matcher'] == 'bm' else 16 * speckle_range
+        cv2.filterSpeckles(raw, -16, window, max_diff)
+        return raw
+        
+    @staticmethod
+    def _prepare(image, scale):
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if scale != 1.0:
+            size = (int(round(gray.shape[1] * scale)), int(round(gray.shape[0] * scale)))
+            gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        return gray
+        
+    def compute_disparity(self, left, right, scale=None, bands=None):
+        """Rektifiye çiftin sol göz referanslı disparitesi (çalışma çözünürlüğünde piksel)
+        
+        scale verilmezse seviyenin ölçeği kullanılır; görüntüler zaten
+        seviye çözünürlüğünde rektifiye edildiyse 1.0 verilir.
+        """
+        scale = self.scale if scale is None else scale
+        gray_left = self._prepare(left, scale)
+        gray_right = self._prepare(right, scale)
+        num_disparities = self.num_disparities(gray_left.shape[1])
+        
+        if self.incremental and self._matcher(gray_left.shape[1])[1] is None:
+            raw, raw_right = self._compute_incremental(gray_left, gray_right), None
+        else:
+            raw, raw_right = self._compute_raw(gray_left, gray_right, bands)
+        raw = self._filter_speckles(raw)
+        wls = raw_right is not None
+        if wls:
+            raw = self._wls_filter(gray_left.shape[1]).filter(raw, gray_left, disparity_map_right=raw_right)
+            
+        # Eşleyiciler 4 bit kesirli sabit noktalı disparite döndürür; geçersizler negatif
+        disparity = raw.astype(np.float32) * (1.0 / 16.0)
+        disparity[disparity < 0] = 0
+        median = self.tier.get('median', 0)
+        if median and not wls:
+            disparity = cv2.medianBlur(disparity, median)
+        return disparity, num_disparities
+        
+    def compute(self, left, right, P1, P2, scale=None):
+        """Disparite ve metrik derinlik
+        
+        P1/P2 girdi görüntülerinin rektifiye projeksiyonlarıdır (tam
+        çözünürlükte kalibrasyonun P1/P2'si, bir harita takımında takımın
+        P1/P2'si).
+        """
+        start = time.perf_counter()
+        scale = self.scale if scale is None else scale
+        disparity, num_disparities = self.compute_disparity(left, right, scale)
+        if scale != 1.0:
+            # Yeniden boyutlandırmanın gerçek ölçeği yuvarlamadan etkilenir
+            scale = disparity.shape[1] / float(left.shape[1])
+            P1, P2 = scale_projection(P1, scale), scale_projection(P2, scale)
+        Q = disparity_to_depth_matrix(P1, P2)
+        depth = disparity_to_depth(disparity, Q)
+        self.last_time = time.perf_counter() - start
+        return DepthResult(disparity, depth, Q, scale, num_disparities, self.last_time)
+        
+    def format_line(self, result):
+        """Ekran katmanı için tek satır (ASCII)"""
+        valid = 100.0 * np.count_nonzero(result.depth) / result.depth.size
+        line = (f"Derinlik: {self.tier_name} {result.disparity.shape[1]}x{result.disparity.shape[0]} "
+                f"{1000 * result.elapsed:.0f} ms, gecerli %{valid:.0f}")
+        if self.incremental:
+            line += f", yeniden hesaplanan %{100 * self.recomputed:.0f}"
+        return line
\ No newline at end of file
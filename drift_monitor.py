@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Canlı yayında kalibrasyon sapması izleyicisi
+Kalibrasyon doğruysa rektifiye çiftte eşlenik noktalar aynı satırdadır; R ve
+T taşıma veya sıcaklıkla kayınca dikey hata büyür. Belirli aralıklarla
+küçültülmüş gri çiftte seyrek köşeler sol gözden sağ göze optik akışla
+eşlenir (iki gözde görülen ArUco köşeleri de eklenir), dikey hata kayan
+pencerede izlenir ve eşik aşılınca uyarı verilir. Örnekleme arka planda
+yapılır; çağıran iş parçacığının karedeki maliyeti yalnızca bir gri
+küçültmedir.
+"""
+
+import os
+import cv2
+import numpy as np
+import time
+import datetime
+import threading
+from collections import deque
+import settings
+
+LK_PARAMS = dict(winSize=(21, 21), maxLevel=3,
+                 criteria=(cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+def vertical_errors(points_left, points_right):
+    """Rektifiye eşlenik noktalar için dikey hata (sağ y - sol y, piksel)"""
+    return points_right[:, 1] - points_left[:, 1]
+
+def summarize_errors(points_left, dy, width):
+    """Dikey hatalardan dayanıklı özet
+    
+    offset: ortanca işaretli hata (göreli yunuslama), roll: dikey hatanın
+    görüntü genişliği boyunca doğrusal değişimi (göreli yuvarlanma),
+    error: ortanca mutlak hata.
+    """
+    median = float(np.median(dy))
+    spread = 1.4826 * float(np.median(np.abs(dy - median))) + 0.5
+    inliers = np.abs(dy - median) <= 3.0 * spread
+    roll = 0.0
+    x = points_left[inliers, 0]
+    if inliers.sum() >= 8 and np.ptp(x) > width * 0.25:
+        roll = float(np.polyfit(x, dy[inliers], 1)[0] * width)
+    return {'error': float(np.median(np.abs(dy[inliers]))), 'offset': median, 'roll': roll,
+            'points': int(inliers.sum())}
+
+class DriftMonitor:
+    """Rektifiye akıştan dikey rektifikasyon hatasını izle ve eşik aşılınca uyar"""
+    def __init__(self, config=None, on_alert=None):
+        self.config = config or settings.DRIFT_SETTINGS
+        self.on_alert = on_alert  # on_alert(durum) uyarı başlayınca ve bitince çağrılır
+        self.lock = threading.Lock()
+        self.samples = deque(maxlen=self.config['window'])
+        self.marker_points = None
+        self.alert = False
+        self.busy = False
+        self.last_submit = 0.0
+        self.sample_time = None   # Son örneğin arka plandaki işlem süresi (saniye)
+        
+    def reset(self):
+        """Kalibrasyon değiştiğinde eski örnekleri at"""
+        with self.lock:
+            self.samples.clear()
+            self.marker_points = None
+            self.alert = False
+            
+    def add_markers(self, corners_left, ids_left, corners_right, ids_right, scale=1.0):
+        """İki gözde birden görülen ArUco köşelerini bir sonraki örneğe ekle"""
+        if ids_left is None or ids_right is None:
+            return
+        right = {int(marker_id): corners for marker_id, corners in zip(np.ravel(ids_right), corners_right)}
+        left_points, right_points = [], []
+        for marker_id, corners in zip(np.ravel(ids_left), corners_left):
+            if int(marker_id) in right:
+                left_points.append(np.reshape(corners, (-1, 2)))
+                right_points.append(np.reshape(right[int(marker_id)], (-1, 2)))
+        if left_points:
+            with self.lock:
+                self.marker_points = (np.vstack(left_points) * scale, np.vstack(right_points) * scale)
+                
+    def submit(self, left, right, scale=1.0):
+        """Aralık dolduysa ve önceki örnek bittiyse çifti arka planda örnekle
+        
+        left/right aynı bölgeden rektifiye edilmiş görüntülerdir; boyutları
+        farklıysa ikisi de ortak bir genişliğe getirilir. scale sol görüntünün
+        bir pikselinin tam çözünürlükteki piksel karşılığıdır (hata tam
+        çözünürlük pikseli cinsinden tutulur). Örnek alındıysa True döndürür.
+        """
+        now = time.monotonic()
+        if self.busy or now - self.last_submit < self.config['interval']:
+            return False
+        self.last_submit = now
+        self.busy = True
+        
+        # Kareler çağıranda küçültülür; çizim ve yeniden kullanım arka plandaki örneği bozmaz
+        width = min(self.config['work_width'], left.shape[1], right.shape[1])
+        gray_left = self._prepare(left, width)
+        gray_right = self._prepare(right, width)
+        factor = width / float(left.shape[1])
+        with self.lock:
+            markers = self.marker_points
+            self.marker_points = None
+        thread = threading.Thread(target=self._sample, args=(gray_left, gray_right, scale / factor, markers),
+                                  name="drift-monitor")
+        thread.daemon = True
+        thread.start()
+        return True
+        
+    @staticmethod
+    def _prepare(image, width):
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if gray.shape[1] != width:
+            height = int(round(gray.shape[0] * width / float(gray.shape[1])))
+            gray = cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+        elif gray is image:
+            gray = gray.copy()
+        return gray
+        
+    def _feature_correspondences(self, gray_left, gray_right):
+        """Sol gözdeki seyrek köşeleri optik akışla sağ göze eşle; ileri-geri tutarlı olanları döndür"""
+        points = cv2.goodFeaturesToTrack(gray_left, self.config['max_features'], 0.01, 8)
+        if points is None:
+            return np.empty((0, 2)), np.empty((0, 2))
+        matched, status, _ = cv2.calcOpticalFlowPyrLK(gray_left, gray_right, points, None, **LK_PARAMS)
+        back, status_back, _ = cv2.calcOpticalFlowPyrLK(gray_right, gray_left, matched, None, **LK_PARAMS)
+        points, matched, back = points.reshape(-1, 2), matched.reshape(-1, 2), back.reshape(-1, 2)
+        good = (status.ravel() == 1) & (status_back.ravel() == 1)
+        good &= np.linalg.norm(back - points, axis=1) < 0.5
+        # Sol göz referanslı rektifiye çiftte disparite pozitiftir
+        good &= points[:, 0] - matched[:, 0] > -1.0
+        return points[good].astype(np.float64), matched[good].astype(np.float64)
+        
+    def _sample(self, gray_left, gray_right, scale, markers):
+        start = time.perf_counter()
+        try:
+            points_left, points_right = self._feature_correspondences(gray_left, gray_right)
+            points_left, points_right = points_left * scale, points_right * scale
+            if markers is not None:
+                points_left = np.vstack((points_left, markers[0]))
+                points_right = np.vstack((points_right, markers[1]))
+            if len(points_left) < self.config['min_points']:
+                return
+            width = gray_left.shape[1] * scale
+            summary = summarize_errors(points_left, vertical_errors(points_left, points_right), width)
+            summary['time'] = time.time()
+            with self.lock:
+                self.samples.append(summary)
+            self._check_alert()
+        except Exception as e:
+            print(f"Sapma örneği alınamadı: {e}")
+        finally:
+            self.sample_time = time.perf_counter() - start
+            self.busy = False
+            
+    def get_status(self):
+        """Penceredeki örneklerin ortancaları ve uyarı durumu"""
+        with self.lock:
+            samples = list(self.samples)
+            alert = self.alert
+        if not samples:
+            return {'samples': 0, 'alert': alert}
+        return {
+            'samples': len(samples),
+            'points': int(np.median([s['points'] for s in samples])),
+            'vertical_error_px': float(np.median([s['error'] for s in samples])),
+            'offset_px': float(np.median([s['offset'] for s in samples])),
+            'roll_px': float(np.median([s['roll'] for s in samples])),
+            'sample_ms': 1000.0 * self.sample_time if self.sample_time is not None else None,
+            'alert': alert
+        }
+        
+    def _check_alert(self):
+        """Eşik aşılınca uyarıyı aç, eşiğin clear_ratio katının altına inince kapat"""
+        status = self.get_status()
+        if status['samples'] < self.config['min_samples']:
+            return
+        error = status['vertical_error_px']
+        threshold = self.config['threshold_px']
+        if not self.alert and error > threshold:
+            with self.lock:
+                self.alert = True
+            message = (f"Kalibrasyon sapması: dikey hata {error:.2f} px > {threshold:.2f} px "
+                       f"(dikey kaydırma {status['offset_px']:+.2f} px, yuvarlanma {status['roll_px']:+.2f} px); "
+                       f"yeniden kalibrasyon önerilir")
+        elif self.alert and error < threshold * self.config['clear_ratio']:
+            with self.lock:
+                self.alert = False
+            message = f"Kalibrasyon sapması uyarısı kalktı: dikey hata {error:.2f} px"
+        else:
+            return
+        status['alert'] = self.alert
+        print(message)
+        self._write_log(message)
+        if self.on_alert is not None:
+            self.on_alert(status)
+            
+    def format_line(self, status=None):
+        """Ekran katmanı için tek satır"""
+        status = status or self.get_status()
+        if not status['samples']:
+            return "Sapma: olculuyor"
+        return (f"Sapma: dikey {status['vertical_error_px']:.2f} px ({status['points']} nokta)"
+                + (" UYARI" if status['alert'] else ""))
+                
+    def _write_log(self, message):
+        log_file = self.config.get('log_file')
+        if not log_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+            with open(log_file, 'a') as f:
+                f.write(f"{datetime.datetime.now().isoformat(timespec='seconds')} {message}\n")
+        except Exception as e:
+            print(f"Sapma kaydı yazılamadı: {e}")
\ No newline at end of file
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Yük ve sıcaklığa duyarlı kalite yöneticisi
+Kalite seviyeleri en ucuz kayıptan başlayarak sıralanır: önce ArUco tespit
+sıklığı, sonra rektifikasyon enterpolasyonu, sonra yakalama FPS'i, en son
+çözünürlük. Gecikme (p95), sıcaklık veya CPU bütçesi aşılınca bir seviye
+düşülür; uzun süre pay kalınca bir seviye geri çıkılır. Her değişiklik
+konsola ve kayıt dosyasına yazılır.
+"""
+
+import os
+import time
+import datetime
+import settings
+
+def build_levels(camera_settings=None, governor_settings=None):
+    """Ayar tablolarından en yüksekten en düşüğe kalite seviyelerini oluştur"""
+    camera_settings = camera_settings or settings.CAMERA_SETTINGS
+    governor_settings = governor_settings or settings.GOVERNOR_SETTINGS
+    
+    width, height, fps = camera_settings['width'], camera_settings['height'], camera_settings['fps']
+    level = {'width': width, 'height': height, 'fps': fps,
+             'aruco_interval': governor_settings['aruco_intervals'][0],
+             'rectify_interpolation': governor_settings['rectify_interpolations'][0]}
+    levels = [dict(level)]
+    
+    for interval in governor_settings['aruco_intervals'][1:]:
+        level['aruco_interval'] = interval
+        levels.append(dict(level))
+    for interpolation in governor_settings['rectify_interpolations'][1:]:
+        level['rectify_interpolation'] = interpolation
+        levels.append(dict(level))
+        
+    # Mevcut değerden küçük FPS ve çözünürlük seçenekleri, büyükten küçüğe
+    for option in sorted((f for f in settings.FPS_OPTIONS if f < fps), reverse=True):
+        if option >= governor_settings['min_fps']:
+            level['fps'] = option
+            levels.append(dict(level))
+    for option_width, option_height in sorted(settings.RESOLUTION_OPTIONS, reverse=True):
+        if option_width < width and option_height < height:
+            level['width'], level['height'] = option_width, option_height
+            levels.append(dict(level))
+    return levels
+
+def describe_level(level):
+    return (f"{level['width']}x{level['height']}@{level['fps']}, "
+            f"ArUco her {level['aruco_interval']} karede, {level['rectify_interpolation']} rektifikasyon")
+
+class QualityGovernor:
+    """Gecikme ve sıcaklık bütçesini korumak için kalite seviyesini adım adım değiştir"""
+    def __init__(self, camera_settings=None, governor_settings=None):
+        self.config = governor_settings or settings.GOVERNOR_SETTINGS
+        self.levels = build_levels(camera_settings, self.config)
+        self.level = 0
+        self.history = []  # (zaman, eski seviye, yeni seviye, neden)
+        self.last_check = time.monotonic()
+        self.last_change = self.last_check
+        self.healthy_since = None
+        
+    @property
+    def current(self):
+        return self.levels[self.level]
+        
+    def _overload_reason(self, latency_p95, temperature, cpu_percent):
+        """Bütçe aşılıyorsa nedenini döndür"""
+        if temperature is not None and temperature >= self.config['max_temperature']:
+            return f"sıcaklık {temperature:.1f}°C"
+        if latency_p95 is not None and latency_p95 > self.config['target_latency_ms']:
+            return f"gecikme p95 {latency_p95:.0f} ms"
+        if cpu_percent is not None and cpu_percent > self.config['max_cpu_percent']:
+            return f"CPU %{cpu_percent:.0f}"
+        return None
+        
+    def _has_headroom(self, latency_p95, temperature, cpu_percent):
+        """Bir üst seviyeyi kaldırabilecek kadar pay var mı"""
+        headroom = self.config['headroom']
+        if temperature is not None and temperature >= self.config['resume_temperature']:
+            return False
+        if latency_p95 is not None and latency_p95 > self.config['target_latency_ms'] * headroom:
+            return False
+        if cpu_percent is not None and cpu_percent > self.config['max_cpu_percent'] * headroom:
+            return False
+        return True
+        
+    def update(self, metrics_summary, system_info):
+        """Ölçümleri değerlendir; seviye değiştiyse yeni seviyeyi, yoksa None döndür
+        
+        metrics_summary PipelineMetrics.get_summary(), system_info
+        utils.get_system_info() biçimindedir.
+        """
+        now = time.monotonic()
+        if now - self.last_check < self.config['check_interval']:
+            return None
+        self.last_check = now
+        
+        total = (metrics_summary or {}).get('latency_ms', {}).get('total')
+        latency_p95 = total['p95'] if total else None
+        temperature = system_info.get('temperature') if system_info else None
+        cpu_percent = system_info.get('cpu_percent') if system_info else None
+        
+        reason = self._overload_reason(latency_p95, temperature, cpu_percent)
+        if reason is not None:
+            self.healthy_since = None
+            # Bir önceki değişikliğin etkisi ölçülmeden yeniden düşülmez
+            if self.level < len(self.levels) - 1 and now - self.last_change >= self.config['check_interval']:
+                return self._set_level(self.level + 1, reason)
+            return None
+            
+        if self.level == 0 or not self._has_headroom(latency_p95, temperature, cpu_percent):
+            self.healthy_since = None
+            return None
+        if self.healthy_since is None:
+            self.healthy_since = now
+        if now - self.healthy_since >= self.config['upgrade_delay']:
+            self.healthy_since = None
+            return self._set_level(self.level - 1, "bütçe içinde")
+        return None
+        
+    def reset(self, reason):
+        """Tam kaliteye dön; seviye değiştiyse yeni seviyeyi, yoksa None döndür"""
+        self.healthy_since = None
+        if self.level == 0:
+            return None
+        return self._set_level(0, reason)
+        
+    def _set_level(self, level, reason):
+        old_level = self.level
+        self.level = level
+        self.last_change = time.monotonic()
+        self.history.append((time.time(), old_level, level, reason))
+        
+        direction = "düşürüldü" if level > old_level else "yükseltildi"
+        message = (f"Kalite seviyesi {direction}: {old_level} -> {level} ({reason}); "
+                   f"{describe_level(self.current)}")
+        print(message)
+        self._write_log(message)
+        return self.current
+        
+    def _write_log(self, message):
+        log_file = self.config.get('log_file')
+        if not log_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+            with open(log_file, 'a') as f:
+                f.write(f"{datetime.datetime.now().isoformat(timespec='seconds')} {message}\n")
+        except Exception as e:
+            print(f"Kalite kaydı yazılamadı: {e}")
\ No newline at end of file
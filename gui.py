@@ -7,8 +7,14 @@ import time
 import threading
 import os
 from camera import CameraController
-from calibration import StereoCalibration
+from calibration import StereoCalibration, CalibrationSession, find_calibration
+from corner_cache import CornerCache
 from aruco_detector import ArucoDetector
+from metrics import PipelineMetrics
+from governor import QualityGovernor
+from drift_monitor import DriftMonitor
+from depth import DepthEngine, colorize_disparity
+from pointcloud import PointCloudWriter, frame_points, save_point_cloud
 import settings
 import utils
 
@@ -24,7 +30,8 @@ class GUI:
         
         # Kamera, kalibrasyon ve ArUco kontrolcüleri
         self.camera = CameraController()
-        self.calibration = StereoCalibration()
+        self.calibration = StereoCalibration(settings.CALIBRATION_SETTINGS['map_format'],
+                                             settings.CALIBRATION_SETTINGS['alpha'])
         self.aruco = ArucoDetector(settings.ARUCO_SETTINGS['dictionary'])
         
         # Uygulama durumu
@@ -32,6 +39,7 @@ class GUI:
         self.view_mode = settings.APP_SETTINGS['view_mode']
         self.show_fps = settings.APP_SETTINGS['show_fps']
         self.show_system_info = settings.APP_SETTINGS['show_system_info']
+        self.show_metrics = settings.APP_SETTINGS['show_metrics']
         
         # FPS hesaplama için değişkenler
         self.fps = 0
@@ -39,10 +47,42 @@ class GUI:
         self.start_time = time.time()
         self.fps_update_interval = 1.0  # saniye
         
-        # Kalibrasyon durumu
-        self.calibration_images_left = []
-        self.calibration_images_right = []
+        # Olay güdümlü kare teslimi: işlenen son çift
+        self.last_pair_seq = 0
+        self.frame_wait_timeout = 0.05  # saniye, klavye olaylarının gecikmemesi için kısa tutulur
+        
+        # Aşama gecikmeleri ve atlanan/tekrarlanan/bayat kare sayaçları
+        self.metrics = PipelineMetrics(settings.APP_SETTINGS['metrics_window'])
+        self.timeline = None  # Ekrana gelmeyi bekleyen çiftin zaman çizelgesi
+        
+        # Sistem bilgisi her karede değil, FPS aralığında bekletmeden örneklenir
+        self.system_info = utils.get_system_info(cpu_interval=None)
+        
+        # Yük/sıcaklık kalite yöneticisi ve uygulanan kalite
+        self.governor = None
+        self.governor_enabled = settings.GOVERNOR_SETTINGS['enabled']
+        self.held_quality_level = None  # Kalibrasyon sürerken bekletilen çözünürlük/FPS değişikliği
+        self.aruco_interval = 1   # ArUco tespiti her N karede bir
+        self.aruco_frame_index = 0
+        self.last_markers = {'left': ([], None), 'right': ([], None)}
+        self.last_stereo_markers = None   # (id'ler, sol köşeler, uzaklıklar) yeniden çizim için
+        
+        # Canlı yayında kalibrasyon sapması (rektifiye çiftte dikey hata) izleyicisi
+        self.drift_monitor = DriftMonitor() if settings.DRIFT_SETTINGS['enabled'] else None
+        
+        # Derinlik motoru yalnızca 'depth' görüntüleme modunda veya nokta bulutu kaydında çalışır
+        self.depth_engine = DepthEngine()
+        self.last_depth = None
+        self.point_cloud_writer = None    # Sürekli nokta bulutu kaydı
+        self.point_cloud_frames = 0
+        
+        # Kalibrasyon durumu: köşeler yakalama sırasında arka planda bulunur
+        self.calibration_session = None
+        self.auto_capture = settings.CALIBRATION_SETTINGS['auto_capture']
         self.calibration_in_progress = False
+        self.calibration_thread = None    # Arka planda çalışan kalibrasyon hesabı
+        self.calibration_progress = (0, 0)
+        self.calibration_result = None    # (başarılı, StereoCalibration), ana döngüde uygulanır
         
         # ArUco tespit durumu
         self.aruco_detection_enabled = False
@@ -54,91 +94,198 @@ class GUI:
         camera_settings = settings.CAMERA_SETTINGS
         
         # Kamera parametrelerini ayarla
-        self.camera.frame_width = camera_settings['width']
-        self.camera.frame_height = camera_settings['height']
-        self.camera.fps = camera_settings['fps']
+        self.camera.configure(camera_settings)
+        self.camera.synthetic_options = settings.get_synthetic_options()
+        self.camera.replay_options = dict(settings.REPLAY_SETTINGS)
         
         # Kameraları başlat
         if not self.camera.init_cameras(camera_settings['left_id'], camera_settings['right_id']):
             print("Kameralar başlatılamadı!")
             return False
+            
+        # Sentetik kamerada gerçek parametreler bilindiği için kalibrasyon gerekmez
+        if self.camera.synthetic_rig is not None and settings.SYNTHETIC_SETTINGS['use_ground_truth_calibration']:
+            self.camera.synthetic_rig.apply_to_calibration(self.calibration)
+            print("Sentetik kameranın bilinen kalibrasyonu yüklendi.")
         
         # Kamera yakalamayı başlat
         if not self.camera.start_capture():
             print("Kamera yakalama başlatılamadı!")
             return False
         
+        # Seviyeler gerçek kamera değerlerinden kurulur (oynatmada çözünürlük kayıttan gelir)
+        governor_camera_settings = dict(camera_settings, width=self.camera.frame_width,
+                                        height=self.camera.frame_height, fps=self.camera.fps)
+        self.governor = QualityGovernor(governor_camera_settings)
+        
         return True
+        
+    def apply_quality_level(self, level):
+        """Kalite yöneticisinin seçtiği seviyeyi kamera, rektifikasyon ve tespite uygula"""
+        self.aruco_interval = level['aruco_interval']
+        self.calibration.interpolation = (cv2.INTER_NEAREST if level['rectify_interpolation'] == 'nearest'
+                                          else cv2.INTER_LINEAR)
+                                          
+        self.held_quality_level = None
+        if (level['width'], level['height'], level['fps']) != \
+                (self.camera.frame_width, self.camera.frame_height, self.camera.fps):
+            if self.calibration_in_progress:
+                # Kalibrasyon görünümleri tek çözünürlükte toplanır; değişiklik kalibrasyon bitince uygulanır
+                self.held_quality_level = level
+                print(f"Kalibrasyon sürüyor, {level['width']}x{level['height']} @ {level['fps']} FPS geçişi bekletiliyor.")
+            else:
+                self.camera.reconfigure(level['width'], level['height'], level['fps'])
+                # Yakalama yeniden başladı, sıra numaraları 1'den başlar
+                self.last_pair_seq = 0
+                self.timeline = None
+                self.reset_drift_monitor()
+        self.metrics.reset_window()
+        
+    def reset_drift_monitor(self):
+        """Kalibrasyon veya çözünürlük değişince sapma örneklerini at"""
+        if self.drift_monitor is not None:
+            self.drift_monitor.reset()
+        
+    def update_governor(self):
+        """Ölçümleri kalite yöneticisine ver, seviye değiştiyse uygula"""
+        if self.held_quality_level is not None and not self.calibration_in_progress:
+            self.apply_quality_level(self.held_quality_level)
+            return
+        if self.governor is None or not self.governor_enabled:
+            return
+        level = self.governor.update(self.metrics.get_summary(), self.system_info)
+        if level is not None:
+            self.apply_quality_level(level)
     
     def load_calibration(self):
         """Kalibrasyon verilerini yükle"""
         calibration_file = settings.CALIBRATION_SETTINGS['calibration_file']
-        if os.path.exists(calibration_file):
+        if find_calibration(calibration_file):
             if self.calibration.load_calibration(calibration_file):
                 print("Kalibrasyon verileri yüklendi.")
+                self.reset_drift_monitor()
                 return True
         
         print("Kalibrasyon verileri yüklenemedi. Lütfen önce kalibrasyon yapın.")
         return False
     
     def capture_calibration_image(self):
-        """Kalibrasyon için görüntü yakala"""
+        """Kalibrasyon için görüntü yakala; köşeler arka planda bulunur"""
         if not self.calibration_in_progress:
             return False
         
         # Stereo görüntü al
-        left_frame, right_frame = self.camera.get_stereo_frame()
+        handle = self.camera.acquire_stereo_frame()
         
-        if left_frame is None or right_frame is None:
+        if handle is None:
             print("Görüntü alınamadı!")
             return False
         
-        # Görüntüleri listeye ekle
-        self.calibration_images_left.append(left_frame.copy())
-        self.calibration_images_right.append(right_frame.copy())
-        
-        # Görüntüleri kaydet
-        timestamp = utils.get_timestamp()
-        utils.save_image(left_frame, "calibration", f"calib_left_{len(self.calibration_images_left)}", timestamp)
-        utils.save_image(right_frame, "calibration", f"calib_right_{len(self.calibration_images_right)}", timestamp)
+        # Oturum kareyi kopyalar; köşeler bulununca kareler diske yazılır
+        with handle:
+            submitted = self.calibration_session.submit(handle.left, handle.right)
         
-        print(f"Kalibrasyon görüntüsü yakalandı: {len(self.calibration_images_left)}")
+        if not submitted:
+            print("Önceki görünümlerin köşeleri hâlâ aranıyor, lütfen bekleyin.")
+            return False
+        print("Kalibrasyon görüntüsü yakalandı, köşeler aranıyor...")
         return True
     
+    def corner_cache(self):
+        """Ayarlarda açıksa köşe önbelleği; kaydedilen görünümler recalibrate.py ile yeniden tespitsiz çözülür"""
+        cache_dir = settings.CALIBRATION_SETTINGS['corner_cache_dir']
+        return CornerCache(cache_dir) if cache_dir else None
+        
     def start_calibration(self):
         """Kalibrasyon işlemini başlat"""
-        self.calibration_images_left = []
-        self.calibration_images_right = []
+        if self.calibration_session is not None:
+            self.calibration_session.close()
+        self.calibration_session = CalibrationSession(
+            settings.CALIBRATION_SETTINGS['board_size'],
+            settings.CALIBRATION_SETTINGS['square_size'],
+            settings.CALIBRATION_SETTINGS['coarse_width'],
+            spill_dir=settings.CALIBRATION_SETTINGS['spill_dir'],
+            workers=settings.CALIBRATION_SETTINGS['detection_workers'],
+            min_pose_change=settings.CALIBRATION_SETTINGS['min_pose_change'],
+            capture_delay=settings.CALIBRATION_SETTINGS['capture_delay'],
+            max_views=settings.CALIBRATION_SETTINGS['max_views'],
+            outlier_factor=settings.CALIBRATION_SETTINGS['outlier_factor'],
+            refine=settings.CALIBRATION_SETTINGS['refine_all_views'],
+            cache=self.corner_cache())
         self.calibration_in_progress = True
         print("Kalibrasyon başlatıldı. Lütfen dama tahtasını farklı açılardan gösterin.")
+        if self.auto_capture:
+            print("Otomatik yakalama açık: tahta yeni bir pozda görününce kare kendiliğinden alınır.")
         return True
     
     def perform_calibration(self):
-        """Kalibrasyon işlemini gerçekleştir"""
-        if len(self.calibration_images_left) < settings.CALIBRATION_SETTINGS['min_captures']:
+        """Kalibrasyon hesabını arka planda başlat; canlı önizleme çalışmaya devam eder"""
+        if self.calibration_session is None or \
+                self.calibration_session.count < settings.CALIBRATION_SETTINGS['min_captures']:
             print(f"Kalibrasyon için en az {settings.CALIBRATION_SETTINGS['min_captures']} görüntü gerekli!")
             return False
         
+        if self.calibration_thread is not None:
+            print("Kalibrasyon zaten hesaplanıyor...")
+            return False
+            
         print("Kalibrasyon hesaplanıyor...")
-        board_size = settings.CALIBRATION_SETTINGS['board_size']
-        square_size = settings.CALIBRATION_SETTINGS['square_size']
+        self.calibration_progress = (0, 0)
+        self.calibration_result = None
+        
+        self.calibration_thread = threading.Thread(
+            target=self._calibration_worker, args=(self.calibration_session,), name="calibration")
+        self.calibration_thread.daemon = True
+        self.calibration_thread.start()
+        return True
+        
+    def _calibration_worker(self, session):
+        """Yeni bir StereoCalibration nesnesinde hesapla, sonucu ana döngüye bırak"""
+        calibration = StereoCalibration(self.calibration.map_format, self.calibration.alpha)
+        calibration.interpolation = self.calibration.interpolation
+        try:
+            # Köşeler yakalama sırasında bulundu; yalnızca bekleyenler tamamlanır ve çözücüler çalışır
+            success = session.calibrate(calibration, self._on_calibration_progress)
+        except Exception as e:
+            print(f"Kalibrasyon hatası: {e}")
+            success = False
+        self.calibration_result = (success, calibration)
         
-        if self.calibration.calibrate(self.calibration_images_left, self.calibration_images_right, board_size, square_size):
+    def _on_calibration_progress(self, done, total):
+        self.calibration_progress = (done, total)
+        if done == total or done % max(1, total // 10) == 0:
+            print(f"Bekleyen köşe tespiti: {done}/{total}")
+            
+    def check_calibration_result(self):
+        """Arka plandaki kalibrasyon bittiyse sonucu ana thread'de uygula"""
+        if self.calibration_result is None:
+            return None
+        success, calibration = self.calibration_result
+        self.calibration_result = None
+        self.calibration_thread = None
+        
+        if success:
+            self.calibration = calibration
+            self.reset_drift_monitor()
             print("Kalibrasyon başarılı!")
             
             # Otomatik kaydet
             if settings.APP_SETTINGS['auto_save_calibration']:
-                self.calibration.save_calibration()
+                self.calibration.save_calibration(settings.CALIBRATION_SETTINGS['calibration_file'])
             
             self.calibration_in_progress = False
-            return True
+            self.calibration_session.close()
+            self.calibration_session = None
         else:
             print("Kalibrasyon başarısız!")
-            return False
+        return success
     
     def stop_calibration(self):
         """Kalibrasyon işlemini durdur"""
         self.calibration_in_progress = False
+        if self.calibration_session is not None and self.calibration_thread is None:
+            self.calibration_session.close()
+            self.calibration_session = None
         print("Kalibrasyon durduruldu.")
         return True
     
@@ -167,24 +314,75 @@ class GUI:
     
     def process_frame(self):
         """Kameradan gelen görüntüleri işle"""
-        # Stereo görüntü al
-        left_frame, right_frame = self.camera.get_stereo_frame()
+        # Yeni bir stereo çift gelene kadar bekle, halka tampondan kopyalamadan al
+        handle = self.camera.wait_for_new_pair(self.last_pair_seq, self.frame_wait_timeout)
         
-        if left_frame is None or right_frame is None:
-            print("Görüntü alınamadı!")
+        if handle is None:
+            # Aynı çift yeniden işlenmez
+            self.metrics.count_stale()
             return None
+            
+        self.timeline = self.metrics.begin(handle.seq, handle.timestamp, handle.skew)
+        self.last_pair_seq = handle.seq
         
+        try:
+            # Otomatik kalibrasyon yakalama: tespit boştaysa kare arka planda denenir
+            if self.calibration_in_progress and self.auto_capture and self.calibration_thread is None:
+                self.calibration_session.offer(handle.left, handle.right)
+            return self._process_images(handle.left, handle.right, self.timeline)
+        finally:
+            handle.release()
+            
+    def _process_images(self, left_frame, right_frame, timeline=None):
+        """Stereo görüntüleri rektifiye et, işaretle ve ekran görüntüsünü oluştur"""
         # Eğer kalibrasyon yapıldıysa, görüntüleri rektifiye et
         if self.calibration.calibrated:
-            left_frame, right_frame = self.calibration.rectify_images(left_frame, right_frame)
+            # Kamera çözünürlüğü değiştiyse kalibrasyon ölçeklenir
+            if left_frame.shape[1::-1] != tuple(self.calibration.img_size):
+                self.calibration.rescale(left_frame.shape[1::-1])
+            # Rektifikasyon ve küçültme tek remap'te yapılır
+            map_set = self.rectification_maps()
+            left_frame, right_frame = self.calibration.rectify_images(left_frame, right_frame, map_set)
+            if timeline is not None:
+                timeline.mark('rectified')
         
+            # Sapma örneği üzerine çizim yapılmadan alınır (aralık dolmadıysa maliyeti yok)
+            drift_scale = map_set.roi[3] / float(map_set.size[1])
+            if self.drift_monitor is not None:
+                self.drift_monitor.submit(left_frame, right_frame, drift_scale)
+                
+        # Derinlik, markerlar çizilmeden önce seviye çözünürlüğündeki çiftte hesaplanır
+        depth = None
+        if self.depth_needed() and self.calibration.calibrated:
+            depth = self.depth_engine.compute(left_frame, right_frame, map_set.P1, map_set.P2, 1.0)
+            self.last_depth = depth
+            if self.point_cloud_writer is not None:
+                self.record_point_cloud(depth, left_frame)
+            
         # ArUco tespit etkinse
+        detect_markers = False
         if self.aruco_detection_enabled and self.calibration.calibrated:
+            # Kalite düşürüldüyse tespit her aruco_interval karede bir yapılır
+            detect_markers = self.aruco_frame_index % self.aruco_interval == 0
+            self.aruco_frame_index += 1
+            if not detect_markers:
+                # Atlanan karelerde son tespitler yeniden çizilir
+                left_frame = self.aruco.draw_detected_markers(left_frame, *self.last_markers['left'])
+                right_frame = self.aruco.draw_detected_markers(right_frame, *self.last_markers['right'])
+                if self.last_stereo_markers is not None:
+                    left_frame = self.aruco.draw_marker_distances(left_frame, *self.last_stereo_markers)
+                
+        if detect_markers and settings.ARUCO_SETTINGS['stereo']:
+            left_frame, right_frame = self.detect_stereo_markers(left_frame, right_frame, map_set, drift_scale)
+            if timeline is not None:
+                timeline.mark('detected')
+        elif detect_markers:
             # Sol görüntüdeki markerları tespit et
+            # Rektifiye görüntünün iç parametreleri: takımın projeksiyonu, distorsiyon yok
             left_frame, corners_left, ids_left, distances_left = self.aruco.detect_and_draw(
                 left_frame, 
-                self.calibration.camera_matrix_left, 
-                self.calibration.dist_coeffs_left,
+                map_set.camera_matrix_left,
+                map_set.dist_coeffs,
                 True,  # Eksen çiz
                 settings.ARUCO_SETTINGS['marker_length']
             )
@@ -192,11 +390,16 @@ class GUI:
             # Sağ görüntüdeki markerları tespit et
             right_frame, corners_right, ids_right, distances_right = self.aruco.detect_and_draw(
                 right_frame, 
-                self.calibration.camera_matrix_right, 
-                self.calibration.dist_coeffs_right,
+                map_set.camera_matrix_right,
+                map_set.dist_coeffs,
                 True,  # Eksen çiz
                 settings.ARUCO_SETTINGS['marker_length']
             )
+            self.last_markers = {'left': (corners_left, ids_left), 'right': (corners_right, ids_right)}
+            if self.drift_monitor is not None:
+                self.drift_monitor.add_markers(corners_left, ids_left, corners_right, ids_right, drift_scale)
+            if timeline is not None:
+                timeline.mark('detected')
         
         # Görüntüleri birleştir
         if self.view_mode == 'side_by_side':
@@ -205,17 +408,170 @@ class GUI:
             result = left_frame
         elif self.view_mode == 'right_only':
             result = right_frame
+        elif self.view_mode == 'depth' and depth is not None:
+            result = self.draw_depth(left_frame, depth)
         else:
             result = utils.create_side_by_side(left_frame, right_frame)
+            
+        # Tek kanallı hat yalnızca ekran katmanları için BGR'ye genişletilir;
+        # halka tampon yuvaları salt-okunurdur, üzerine çizmeden önce kopyala
+        if result.ndim == 2:
+            result = utils.to_bgr(result)
+        elif not result.flags.writeable:
+            result = result.copy()
         
         # FPS ve sistem bilgilerini ekle
         if self.show_fps:
             result = utils.draw_fps(result, self.fps)
         
         if self.show_system_info:
-            result = utils.draw_system_info(result)
+            result = utils.draw_system_info(result, self.system_info)
+        
+        if self.show_metrics:
+            result = self.metrics.draw_overlay(result)
+            
+        if self.drift_monitor is not None and self.calibration.calibrated:
+            drift = self.drift_monitor.get_status()
+            # Uyarı her zaman, ölçüm yalnızca metrik katmanı açıkken gösterilir
+            if drift['alert'] or self.show_metrics:
+                cv2.putText(result, self.drift_monitor.format_line(drift), (10, result.shape[0] - 50),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255) if drift['alert'] else (0, 255, 255), 1)
+            
+        if self.point_cloud_writer is not None:
+            cv2.putText(result, f"Nokta bulutu kaydi: {self.point_cloud_writer.frames} kare, "
+                        f"{self.point_cloud_writer.count} nokta", (10, result.shape[0] - 110),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+                        
+        if self.depth_needed() and not self.calibration.calibrated:
+            cv2.putText(result, "Derinlik icin kalibrasyon gerekli", (10, result.shape[0] - 80),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                        
+        if self.calibration_thread is not None:
+            done, total = self.calibration_progress
+            cv2.putText(result, f"Kalibrasyon hesaplaniyor: {done}/{total}", (10, result.shape[0] - 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        elif self.calibration_in_progress:
+            text = f"Kalibrasyon: {self.calibration_session.count} gorunum"
+            if self.auto_capture:
+                text += " (otomatik)"
+            cv2.putText(result, text, (10, result.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                        
+        if timeline is not None:
+            timeline.mark('composed')
+            
+        return result
+        
+    def detect_stereo_markers(self, left_frame, right_frame, map_set, drift_scale=1.0):
+        """İki gözde markerları bul, ortak olanları üçgenleyip uzaklıklarını sol göze yaz"""
+        corners_left, ids_left, _ = self.aruco.detect_markers(left_frame)
+        corners_right, ids_right, _ = self.aruco.detect_markers(right_frame)
+        left_frame = self.aruco.draw_detected_markers(left_frame, corners_left, ids_left)
+        right_frame = self.aruco.draw_detected_markers(right_frame, corners_right, ids_right)
+        
+        # Köşeler rektifiye görüntülerde bulunduğundan takımın projeksiyonlarıyla üçgenlenir
+        ids, points_left, points_right = self.aruco.match_stereo(corners_left, ids_left, corners_right, ids_right)
+        _, _, distances = self.aruco.triangulate_markers(points_left, points_right, map_set.P1, map_set.P2)
+        self.last_stereo_markers = (ids, points_left, distances)
+        left_frame = self.aruco.draw_marker_distances(left_frame, *self.last_stereo_markers)
         
+        self.last_markers = {'left': (corners_left, ids_left), 'right': (corners_right, ids_right)}
+        if self.drift_monitor is not None:
+            self.drift_monitor.add_markers(corners_left, ids_left, corners_right, ids_right, drift_scale)
+        return left_frame, right_frame
+        
+    def draw_depth(self, left_frame, depth):
+        """Sol görüntü ile renklendirilmiş disparite yan yana, merkez derinliğiyle"""
+        colored = colorize_disparity(depth.disparity, depth.num_disparities)
+        height, width = colored.shape[:2]
+        center = depth.depth_at(width // 2, height // 2, settings.DEPTH_SETTINGS['cursor_radius'])
+        cv2.drawMarker(colored, (width // 2, height // 2), (255, 255, 255), cv2.MARKER_CROSS, 20, 1)
+        text = f"{center:.0f} mm" if center is not None else "--"
+        cv2.putText(colored, text, (width // 2 + 8, height // 2 - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                    (255, 255, 255), 1)
+        result = utils.create_side_by_side(left_frame, colored)
+        cv2.putText(result, self.depth_engine.format_line(depth), (10, result.shape[0] - 80),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
         return result
+        
+    def depth_needed(self):
+        """Bu karede derinlik hesaplanacak mı"""
+        return self.view_mode == 'depth' or self.point_cloud_writer is not None
+        
+    def depth_map_set(self):
+        """Derinlik seviyesinin çalışma çözünürlüğündeki harita takımı"""
+        crop = settings.CALIBRATION_SETTINGS['crop_to_roi']
+        region_width = self.calibration.output_size(self.calibration.img_size[0], crop)[0]
+        width = region_width * self.depth_engine.scale
+        return self.calibration.get_map_set(self.calibration.output_size(width, crop), crop)
+        
+    def save_point_cloud(self, left_frame, right_frame):
+        """Ham çiftten tek karelik nokta bulutu kaydet (yakalama tuşu)"""
+        if not self.calibration.calibrated:
+            return None
+        if left_frame.shape[1::-1] != tuple(self.calibration.img_size):
+            self.calibration.rescale(left_frame.shape[1::-1])
+        map_set = self.depth_map_set()
+        left, right = self.calibration.rectify_images(left_frame, right_frame, map_set)
+        depth = self.depth_engine.compute(left, right, map_set.P1, map_set.P2, 1.0)
+        path, count = save_point_cloud(depth.disparity, depth.Q, left)
+        print(f"Nokta bulutu {path} dosyasına kaydedildi ({count} nokta).")
+        return path
+        
+    def toggle_point_cloud_recording(self):
+        """Sürekli nokta bulutu kaydını başlat/durdur; her kare aynı dosyaya eklenir"""
+        if self.point_cloud_writer is not None:
+            self.point_cloud_writer.close()
+            print(f"Nokta bulutu kaydı durduruldu: {self.point_cloud_writer.path} "
+                  f"({self.point_cloud_writer.frames} kare, {self.point_cloud_writer.count} nokta)")
+            self.point_cloud_writer = None
+            return
+        if not self.calibration.calibrated:
+            print("Nokta bulutu kaydı için kalibrasyon gerekli.")
+            return
+        config = settings.POINTCLOUD_SETTINGS
+        path = os.path.join(config['output_dir'], f"recording_{utils.get_timestamp()}.{config['format']}")
+        self.point_cloud_writer = PointCloudWriter(path)
+        self.point_cloud_frames = 0
+        print(f"Nokta bulutu kaydı başladı: {path}")
+        
+    def record_point_cloud(self, depth, left_frame):
+        """Kayıttaki her record_interval derinlik karesinden birini dosyaya ekle"""
+        index = self.point_cloud_frames
+        self.point_cloud_frames += 1
+        if index % settings.POINTCLOUD_SETTINGS['record_interval'] != 0:
+            return
+        points, colors = frame_points(depth.disparity, depth.Q, left_frame)
+        self.point_cloud_writer.write(points, colors, index)
+        
+    def rectification_maps(self):
+        """Bu karede gereken çıkış için harita takımı
+        
+        Derinlik modunda veya nokta bulutu kaydında derinlik seviyesinin
+        çalışma ölçeği, ArUco tespiti açıksa tespit ölçeği
+        (ARUCO_SETTINGS['detection_scale']), değilse penceredeki göz genişliği
+        kullanılır; böylece rektifiye kare ekranda ikinci kez küçültülmez.
+        """
+        if self.depth_needed():
+            return self.depth_map_set()
+        crop = settings.CALIBRATION_SETTINGS['crop_to_roi']
+        if self.aruco_detection_enabled:
+            region_width = self.calibration.output_size(self.calibration.img_size[0], crop)[0]
+            width = region_width * settings.ARUCO_SETTINGS['detection_scale']
+        elif self.view_mode in ('left_only', 'right_only'):
+            width = self.window_width
+        else:
+            width = self.window_width // 2
+        return self.calibration.get_map_set(self.calibration.output_size(width, crop), crop)
+        
+    def get_metrics(self):
+        """Hat gecikme/kayıp özeti ve kamera senkronizasyon istatistikleri"""
+        summary = self.metrics.get_summary()
+        summary['camera'] = self.camera.get_sync_stats()
+        if self.drift_monitor is not None:
+            summary['drift'] = self.drift_monitor.get_status()
+        if self.view_mode == 'depth' and self.depth_engine.last_time is not None:
+            summary['depth'] = {'tier': self.depth_engine.tier_name, 'ms': 1000 * self.depth_engine.last_time}
+        return summary
     
     def run(self):
         """Ana döngü"""
@@ -234,15 +590,25 @@ class GUI:
                 if frame is not None:
                     # Görüntüyü göster
                     cv2.imshow(self.window_title, frame)
+                    if self.timeline is not None:
+                        self.metrics.finish(self.timeline)
+                        self.timeline = None
                 
+                    # FPS yalnızca işlenen yeni çiftleri sayar
+                    self.frame_count += 1
+                    
                 # FPS hesapla
-                self.frame_count += 1
                 elapsed_time = time.time() - self.start_time
                 
                 if elapsed_time > self.fps_update_interval:
                     self.fps = self.frame_count / elapsed_time
                     self.frame_count = 0
                     self.start_time = time.time()
+                    # CPU kullanımı son örnekten beri ölçülür, döngü bekletilmez
+                    self.system_info = utils.get_system_info(cpu_interval=None)
+                    
+                self.update_governor()
+                self.check_calibration_result()
                 
                 # Klavye girdisini kontrol et
                 key = cv2.waitKey(1) & 0xFF
@@ -257,9 +623,12 @@ class GUI:
                     if self.calibration_in_progress:
                         self.capture_calibration_image()
                     else:
-                        left_frame, right_frame = self.camera.get_stereo_frame()
-                        utils.save_stereo_images(left_frame, right_frame)
-                        print("Görüntüler kaydedildi.")
+                        handle = self.camera.acquire_stereo_frame()
+                        if handle is not None:
+                            with handle:
+                                utils.save_stereo_images(handle.left, handle.right)
+                                self.save_point_cloud(handle.left, handle.right)
+                            print("Görüntüler kaydedildi.")
                 
                 # c tuşu ile kalibrasyon başlat/durdur
                 elif key == ord('c'):
@@ -280,10 +649,14 @@ class GUI:
                 
                 # m tuşu ile görüntüleme modunu değiştir
                 elif key == ord('m'):
-                    modes = ['side_by_side', 'left_only', 'right_only']
+                    modes = ['side_by_side', 'left_only', 'right_only', 'depth']
                     current_index = modes.index(self.view_mode)
                     self.view_mode = modes[(current_index + 1) % len(modes)]
                     print(f"Görüntüleme modu: {self.view_mode}")
+                    
+                # d tuşu ile derinlik seviyesini değiştir
+                elif key == ord('d'):
+                    print(f"Derinlik seviyesi: {self.depth_engine.next_tier()}")
                 
                 # f tuşu ile FPS gösterimini aç/kapat
                 elif key == ord('f'):
@@ -295,9 +668,37 @@ class GUI:
                     self.show_system_info = not self.show_system_info
                     print(f"Sistem bilgisi gösterimi: {'Açık' if self.show_system_info else 'Kapalı'}")
         
+                # o tuşu ile otomatik kalibrasyon yakalamayı aç/kapat
+                elif key == ord('o'):
+                    self.auto_capture = not self.auto_capture
+                    print(f"Otomatik kalibrasyon yakalama: {'Açık' if self.auto_capture else 'Kapalı'}")
+                    
+                # g tuşu ile kalite yöneticisini aç/kapat
+                elif key == ord('g'):
+                    self.governor_enabled = not self.governor_enabled
+                    if not self.governor_enabled and self.governor is not None:
+                        # Kapatılınca tam kaliteye dönülür
+                        level = self.governor.reset("yönetici kapatıldı")
+                        if level is not None:
+                            self.apply_quality_level(level)
+                    print(f"Kalite yöneticisi: {'Açık' if self.governor_enabled else 'Kapalı'}")
+                    
+                # r tuşu ile sürekli nokta bulutu kaydını aç/kapat
+                elif key == ord('r'):
+                    self.toggle_point_cloud_recording()
+                    
+                # p tuşu ile gecikme ölçüm katmanını aç/kapat
+                elif key == ord('p'):
+                    self.show_metrics = not self.show_metrics
+                    print(f"Gecikme ölçümü gösterimi: {'Açık' if self.show_metrics else 'Kapalı'}")
+                    
         finally:
             # Temizlik
+            if self.point_cloud_writer is not None:
+                self.toggle_point_cloud_recording()
             self.camera.stop_capture()
             self.camera.release()
             cv2.destroyAllWindows()
+            for line in self.metrics.format_lines():
+                print(line)
             print("Uygulama kapatıldı.")
\ No newline at end of file
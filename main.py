@@ -6,14 +6,21 @@ import sys
 import cv2
 import numpy as np
 import time
+import argparse
 from camera import CameraController
 from calibration import StereoCalibration
 from aruco_detector import ArucoDetector
 from gui import GUI
+from rig_manager import RigManager
 import settings
 import utils
 
 def main():
+    parser = argparse.ArgumentParser(description=settings.APP_SETTINGS['window_title'])
+    parser.add_argument('--rigs', action='store_true',
+                        help="RIG_SETTINGS içindeki tüm stereo kafaları ayrı süreçlerde çalıştır")
+    args = parser.parse_args()
+    
     # Gerekli klasörleri oluştur
     for directory in settings.REQUIRED_DIRS:
         os.makedirs(directory, exist_ok=True)
@@ -31,8 +38,11 @@ def main():
     
     # Ana uygulamayı başlat
     try:
-        app = GUI()
-        app.run()
+        if args.rigs:
+            RigManager().run()
+        else:
+            app = GUI()
+            app.run()
     except KeyboardInterrupt:
         print("\nUygulama kapatılıyor...")
     except Exception as e:
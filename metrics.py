@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Hat boyunca kare gecikmesi ve kayıp ölçümü
+Her stereo çift yakalama anından ekrana gelene kadar aşama aşama zaman
+damgalanır. Aşama gecikmeleri için kayan pencerede p50/p95/p99, atlanan,
+tekrarlanan ve bayat (yeni çift gelmeyen) döngü sayıları ile sol/sağ
+kayması tutulur.
+"""
+
+import cv2
+import numpy as np
+import time
+import threading
+from collections import deque
+
+# Zaman damgası sırası; her aşamanın süresi bir önceki işaretten ölçülür
+STAGES = ('capture', 'received', 'rectified', 'detected', 'composed', 'displayed')
+PERCENTILES = (50, 95, 99)
+
+class FrameTimeline:
+    """Tek bir stereo çiftin sıra numarası ve aşama zaman damgaları (time.monotonic)"""
+    def __init__(self, seq, capture_time, skew=0.0):
+        self.seq = seq
+        self.skew = skew
+        self.times = {'capture': capture_time, 'received': time.monotonic()}
+        
+    def mark(self, stage, timestamp=None):
+        self.times[stage] = time.monotonic() if timestamp is None else timestamp
+        
+    def durations(self):
+        """Aşama başına süreler (saniye); işaretlenmeyen aşamalar atlanır"""
+        durations = {}
+        previous = None
+        for stage in STAGES:
+            if stage not in self.times:
+                continue
+            if previous is not None:
+                durations[stage] = self.times[stage] - self.times[previous]
+            previous = stage
+        durations['total'] = self.times[previous] - self.times['capture']
+        return durations
+
+class RollingStats:
+    """Son N değer üzerinde yüzdelikler"""
+    def __init__(self, window=300):
+        self.values = deque(maxlen=window)
+        
+    def add(self, value):
+        self.values.append(value)
+        
+    def percentiles(self, scale=1.0):
+        if not self.values:
+            return None
+        values = np.percentile(np.fromiter(self.values, dtype=np.float64), PERCENTILES) * scale
+        return {f"p{p}": float(v) for p, v in zip(PERCENTILES, values)}
+
+class PipelineMetrics:
+    """Aşama gecikmeleri, kayıp/tekrar/bayat kare sayaçları ve kayma istatistikleri"""
+    def __init__(self, window=300):
+        self.window = window
+        self.lock = threading.Lock()
+        self.reset()
+        
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+            self.skew = RollingStats(self.window)
+            self.frames = 0
+            self.dropped = 0      # Tüketici yetişemediği için hiç işlenmeyen çiftler
+            self.duplicated = 0   # Aynı sıra numarasıyla ikinci kez gelen çiftler
+            self.stale = 0        # Yeni çift gelmeden dönen bekleme döngüleri
+            self.last_seq = 0
+            self.last_timeline = None
+            
+    def reset_window(self):
+        """Gecikme pencerelerini ve sıra takibini sıfırla, sayaçlar korunur
+        
+        Yakalama yeniden başlatıldığında (sıra numaraları 1'den başlar) veya
+        kalite değiştiğinde eski ölçümler yeni duruma karışmasın diye çağrılır.
+        """
+        with self.lock:
+            self.stages = {}
+            self.skew = RollingStats(self.window)
+            self.last_seq = 0
+            
+    def begin(self, seq, capture_time, skew=0.0):
+        """Yeni alınan çift için zaman çizelgesi başlat ve sıra boşluklarını say"""
+        timeline = FrameTimeline(seq, capture_time, skew)
+        with self.lock:
+            if seq <= self.last_seq:
+                self.duplicated += 1
+            else:
+                if self.last_seq > 0:
+                    self.dropped += seq - self.last_seq - 1
+                self.last_seq = seq
+            self.skew.add(skew)
+        return timeline
+        
+    def count_stale(self):
+        with self.lock:
+            self.stale += 1
+            
+    def finish(self, timeline, stage='displayed'):
+        """Çizelgeyi kapat ve aşama sürelerini kayan pencerelere ekle"""
+        timeline.mark(stage)
+        durations = timeline.durations()
+        with self.lock:
+            self.frames += 1
+            for name, duration in durations.items():
+                if name not in self.stages:
+                    self.stages[name] = RollingStats(self.window)
+                self.stages[name].add(duration)
+            self.last_timeline = timeline
+            
+    def get_summary(self):
+        """Sayaçlar ve milisaniye cinsinden aşama yüzdelikleri"""
+        with self.lock:
+            latency = {}
+            for name in STAGES[1:] + ('total',):
+                if name in self.stages:
+                    latency[name] = self.stages[name].percentiles(1000.0)
+            return {
+                'frames': self.frames,
+                'last_seq': self.last_seq,
+                'dropped': self.dropped,
+                'duplicated': self.duplicated,
+                'stale': self.stale,
+                'skew_ms': self.skew.percentiles(1000.0),
+                'latency_ms': latency
+            }
+            
+    def format_lines(self, summary=None):
+        """Özet bilgisini ekran/konsol için satırlara çevir"""
+        summary = summary or self.get_summary()
+        lines = [f"Kare: {summary['frames']}  Atlanan: {summary['dropped']}  "
+                 f"Tekrar: {summary['duplicated']}  Bayat: {summary['stale']}"]
+        if summary['skew_ms']:
+            skew = summary['skew_ms']
+            lines.append(f"Kayma ms p50/p95/p99: {skew['p50']:.1f}/{skew['p95']:.1f}/{skew['p99']:.1f}")
+        for name, stats in summary['latency_ms'].items():
+            lines.append(f"{name:<10} ms: {stats['p50']:.1f}/{stats['p95']:.1f}/{stats['p99']:.1f}")
+        return lines
+        
+    def draw_overlay(self, image, position=(10, 110)):
+        """Gecikme özetini görüntünün üzerine yaz"""
+        x, y = position
+        for line in self.format_lines():
+            cv2.putText(image, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+            y += 18
+        return image
\ No newline at end of file
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Nokta bulutu dışa aktarımı
+Disparite haritası Q matrisiyle (DepthResult.Q, RectificationMaps.Q veya
+kalibrasyonun Q'su) yalnızca geçerli piksellerde vektörel olarak 3B'ye
+çevrilir, voksel ızgarasında seyreltilir ve dosyaya parça parça yazılır.
+Kayıt boyunca bellekte yalnızca o karenin noktaları tutulur; PLY başlığındaki
+nokta sayısı dosya kapanırken düzeltilir.
+"""
+
+import os
+import cv2
+import numpy as np
+import settings
+import utils
+
+PLY_VERTEX = np.dtype([('x', '<f4'), ('y', '<f4'), ('z', '<f4'),
+                       ('red', 'u1'), ('green', 'u1'), ('blue', 'u1'), ('frame', '<u4')])
+COUNT_DIGITS = 10  # Başlıktaki nokta sayısı sabit genişlikte yazılır, kapanışta yerinde düzeltilir
+VOXEL_OFFSET = 1 << 20
+
+def reproject(disparity, Q, min_depth=0.0, max_depth=None):
+    """Geçerli disparitelerin 3B noktaları (N x 3, float32) ve geçerlilik maskesi
+    
+    reprojectImageTo3D ile aynı dönüşüm. Satır ve sütun koordinatları tam
+    ızgara yerine yayınlanan vektörlerdir; maske ölçütleri (disparite,
+    derinlik aralığı) X ve Y hesaplanmadan uygulanır.
+    """
+    height, width = disparity.shape
+    Q = Q.astype(np.float32)
+    xs = np.arange(width, dtype=np.float32)[None, :]
+    ys = np.arange(height, dtype=np.float32)[:, None]
+    
+    def row(i):
+        return Q[i, 0] * xs + Q[i, 1] * ys + Q[i, 2] * disparity + Q[i, 3]
+        
+    w = row(3)
+    valid = (disparity > 0) & (w > 0)
+    inverse = np.divide(1.0, w, out=np.zeros_like(w), where=valid)
+    z = row(2) * inverse
+    valid &= z > min_depth
+    if max_depth is not None:
+        valid &= z < max_depth
+        
+    points = np.empty((np.count_nonzero(valid), 3), np.float32)
+    inverse = inverse[valid]
+    points[:, 0] = row(0)[valid] * inverse
+    points[:, 1] = row(1)[valid] * inverse
+    points[:, 2] = z[valid]
+    return points, valid
+
+def voxel_downsample(points, voxel_size, colors=None):
+    """Her voksel hücresindeki noktaları ağırlık merkezinde (ve ortalama renkte) birleştir"""
+    if voxel_size <= 0 or len(points) == 0:
+        return points, colors
+    # Hücre indeksleri eksen başına 21 bitle tek anahtara paketlenir (±2^20 voksel)
+    cells = np.floor(points / voxel_size).astype(np.int64) + VOXEL_OFFSET
+    keys = (cells[:, 0] << 42) | (cells[:, 1] << 21) | cells[:, 2]
+    # Sıralı anahtarlarda her hücre ardışık bir dilimdir; dilim numarası noktanın hücresidir
+    order = np.argsort(keys)
+    keys = keys[order]
+    first = np.concatenate(([True], keys[1:] != keys[:-1]))
+    cell = np.empty(len(keys), np.intp)
+    cell[order] = np.cumsum(first) - 1
+    counts = np.bincount(cell)
+    
+    def mean(values):
+        return np.stack([np.bincount(cell, weights=column) for column in values.T], axis=1) / counts[:, None]
+        
+    points = mean(points).astype(np.float32)
+    if colors is not None:
+        colors = np.round(mean(colors)).astype(np.uint8)
+    return points, colors
+
+def frame_points(disparity, Q, image=None, config=None):
+    """Bir karenin seyreltilmiş noktaları ve renkleri (BGR, görüntü verildiyse)
+    
+    Görüntü disparite boyutunda değilse disparite boyutuna küçültülür.
+    """
+    config = config or settings.POINTCLOUD_SETTINGS
+    points, valid = reproject(disparity, Q, config['min_depth'], config['max_depth'])
+    colors = None
+    if image is not None:
+        if image.shape[:2] != disparity.shape:
+            image = cv2.resize(image, disparity.shape[::-1], interpolation=cv2.INTER_AREA)
+        colors = utils.to_bgr(image)[valid]
+    return voxel_downsample(points, config['voxel_size'], colors)
+
+class PointCloudWriter:
+    """Noktaları ikili PLY (.ply) veya ham float32 (.raw) dosyasına parça parça yaz
+    
+    Ham dosya (x, y, z, kare) float32 kayıtlarından oluşur. Her kare kendi
+    numarasıyla yazılır; birden çok kare aynı dosyada ayrılabilir.
+    """
+    def __init__(self, path, chunk_points=None):
+        self.path = path
+        self.file_format = 'raw' if path.lower().endswith('.raw') else 'ply'
+        self.chunk_points = chunk_points or settings.POINTCLOUD_SETTINGS['chunk_points']
+        self.count = 0
+        self.frames = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.file = open(path, 'wb')
+        self.count_offset = None
+        if self.file_format == 'ply':
+            self._write_header()
+            
+    def _write_header(self):
+        lines = ["ply", "format binary_little_endian 1.0", "comment stereo kamera nokta bulutu"]
+        prefix = ("\n".join(lines) + "\nelement vertex ").encode('ascii')
+        self.count_offset = len(prefix)
+        self.file.write(prefix + self._count_field())
+        properties = ["property float x", "property float y", "property float z",
+                      "property uchar red", "property uchar green", "property uchar blue",
+                      "property uint frame", "end_header"]
+        self.file.write(("\n" + "\n".join(properties) + "\n").encode('ascii'))
+        
+    def _count_field(self):
+        return f"{self.count:0{COUNT_DIGITS}d}".encode('ascii')
+        
+    def write(self, points, colors=None, frame=None):
+        """Bir karenin noktalarını (BGR renkleriyle) ekle; kare numarası verilmezse sıradaki"""
+        frame = self.frames if frame is None else frame
+        self.frames += 1
+        for start in range(0, len(points), self.chunk_points):
+            chunk = points[start:start + self.chunk_points]
+            if self.file_format == 'raw':
+                records = np.empty((len(chunk), 4), np.float32)
+                records[:, :3] = chunk
+                records[:, 3] = frame
+            else:
+                records = np.empty(len(chunk), PLY_VERTEX)
+                records['x'], records['y'], records['z'] = chunk[:, 0], chunk[:, 1], chunk[:, 2]
+                if colors is None:
+                    records['red'] = records['green'] = records['blue'] = 255
+                else:
+                    chunk_colors = colors[start:start + self.chunk_points]
+                    records['red'], records['green'], records['blue'] = (chunk_colors[:, 2], chunk_colors[:, 1],
+                                                                         chunk_colors[:, 0])
+                records['frame'] = frame
+            self.file.write(records.tobytes())
+        self.count += len(points)
+        
+    def close(self):
+        """PLY başlığındaki nokta sayısını düzelt ve dosyayı kapat"""
+        if self.file is None:
+            return
+        if self.count_offset is not None:
+            self.file.seek(self.count_offset)
+            self.file.write(self._count_field())
+        self.file.close()
+        self.file = None
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def save_point_cloud(disparity, Q, image=None, output_dir=None, file_format=None):
+    """Tek karenin nokta bulutunu zaman damgalı dosyaya kaydet; (dosya yolu, nokta sayısı) döndür"""
+    config = settings.POINTCLOUD_SETTINGS
+    path = os.path.join(output_dir or config['output_dir'],
+                        f"cloud_{utils.get_timestamp()}.{file_format or config['format']}")
+    points, colors = frame_points(disparity, Q, image, config)
+    with PointCloudWriter(path) as writer:
+        writer.write(points, colors)
+    return path, len(points)
\ No newline at end of file
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kaydedilmiş kalibrasyon görüntülerinden yeniden kalibrasyon
+Oturum sırasında diske yazılan calib_left_* / calib_right_* çiftleri okunur
+(varsayılan: spill_dir altındaki en son oturum klasörü);
+köşeler önbellekteyse tespit yapılmadan yalnızca çözücüler çalışır. Kare
+boyutu, alpha veya görünüm seçimi ayarları kamerasız denenebilir.
+
+Kullanım:
+    python recalibrate.py [calibration/20240101_120000] [--square-size 24.5 --alpha 0 --output calibration/deneme]
+"""
+
+import os
+import sys
+import time
+import argparse
+import settings
+from calibration import StereoCalibration
+from corner_cache import CornerCache
+from replay_camera import find_image_pairs, TIMESTAMP_PATTERN
+
+def _board_size(text):
+    columns, rows = text.lower().split('x')
+    return int(columns), int(rows)
+
+def _latest_session(spill_dir):
+    """spill_dir altındaki en son <zaman damgası> oturum klasörü; yoksa spill_dir (eski düz düzen)"""
+    if not os.path.isdir(spill_dir):
+        return spill_dir
+    sessions = sorted(name for name in os.listdir(spill_dir)
+                      if TIMESTAMP_PATTERN.fullmatch(name) and os.path.isdir(os.path.join(spill_dir, name)))
+    return os.path.join(spill_dir, sessions[-1]) if sessions else spill_dir
+
+def main():
+    calibration_settings = settings.CALIBRATION_SETTINGS
+    parser = argparse.ArgumentParser(description="Kaydedilmiş görüntülerden stereo kalibrasyonu yeniden hesapla")
+    parser.add_argument('directory', nargs='?',
+                        help="calib_left_* / calib_right_* görüntülerinin bulunduğu oturum klasörü "
+                             "(varsayılan: spill_dir altındaki en son oturum)")
+    parser.add_argument('--prefix', default='calib_', help="Yalnızca bu önekle başlayan görüntüler kullanılır")
+    parser.add_argument('--board-size', type=_board_size, default=calibration_settings['board_size'],
+                        help="İç köşe sayısı, ör. 9x6")
+    parser.add_argument('--square-size', type=float, default=calibration_settings['square_size'])
+    parser.add_argument('--alpha', type=float, default=calibration_settings['alpha'])
+    parser.add_argument('--coarse-width', type=int, default=calibration_settings['coarse_width'])
+    parser.add_argument('--max-views', type=int, default=calibration_settings['max_views'])
+    parser.add_argument('--outlier-factor', type=float, default=calibration_settings['outlier_factor'])
+    parser.add_argument('--refine', action='store_true', default=calibration_settings['refine_all_views'])
+    parser.add_argument('--workers', type=int, default=calibration_settings['detection_workers'])
+    parser.add_argument('--map-format', choices=('fixed', 'float'), default=calibration_settings['map_format'])
+    parser.add_argument('--cache-dir', default=calibration_settings['corner_cache_dir'] or 'calibration/corner_cache')
+    parser.add_argument('--no-cache', action='store_true', help="Önbelleği kullanma, köşeleri yeniden bul")
+    parser.add_argument('--output', default=calibration_settings['calibration_file'],
+                        help="Kalibrasyon paketinin yazılacağı dizin")
+    args = parser.parse_args()
+    if args.directory is None:
+        args.directory = _latest_session(calibration_settings['spill_dir'])
+        print(f"Oturum klasörü: {args.directory}")
+    
+    pairs = [(left, right) for _, left, right in find_image_pairs(args.directory)
+             if os.path.basename(left).startswith(args.prefix)]
+    if not pairs:
+        print(f"{args.directory} içinde görüntü çifti bulunamadı.")
+        return 1
+    print(f"{len(pairs)} görüntü çifti bulundu.")
+    
+    cache = None if args.no_cache else CornerCache(args.cache_dir)
+    calibration = StereoCalibration(args.map_format, args.alpha)
+    start = time.perf_counter()
+    ok = calibration.calibrate([left for left, _ in pairs], [right for _, right in pairs], args.board_size,
+                               args.square_size, args.workers, None, args.coarse_width, args.max_views,
+                               args.outlier_factor, args.refine, cache)
+    elapsed = time.perf_counter() - start
+    if cache is not None:
+        print(f"Köşe önbelleği: {cache.hits} isabet, {cache.misses} yeni tespit")
+    if not ok:
+        print("Kalibrasyon başarısız.")
+        return 1
+        
+    print(f"Kalibrasyon {elapsed:.2f} s içinde tamamlandı, stereo RMS {calibration.rms:.3f} px.")
+    calibration.save_calibration(args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
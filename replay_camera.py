@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kayıtlı stereo oturumu yeniden oynatan kamera arka ucu
+Kaynak olarak captures/left + captures/right PNG çiftleri, tek klasörde
+*left*/*right* adlı görüntüler, yan yana (side-by-side) tek bir video ya da
+left.*/right.* adlı iki video kullanılabilir. Kareler arka planda önceden
+çözülür; gerçek zamanlı modda özgün zaman damgalarına uyulur.
+"""
+
+import cv2
+import numpy as np
+import os
+import re
+import threading
+import queue
+import time
+import datetime
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov')
+TIMESTAMP_PATTERN = re.compile(r'(\d{8}_\d{6})')
+
+class ReplayItem:
+    """Önceden çözülmüş bir stereo çift ve kayıttaki zaman damgası (saniye)"""
+    def __init__(self, index, left, right, timestamp):
+        self.index = index
+        self.left = left
+        self.right = right
+        self.timestamp = timestamp
+
+def _parse_timestamp(name):
+    """utils.get_timestamp() biçimindeki dosya adından zaman damgası çıkar"""
+    match = TIMESTAMP_PATTERN.search(name)
+    if match is None:
+        return None
+    try:
+        return datetime.datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').timestamp()
+    except ValueError:
+        return None
+
+def _read_timestamp_file(directory):
+    """Varsa timestamps.csv (dosya_adı,saniye) içeriğini sözlük olarak oku"""
+    timestamps = {}
+    path = os.path.join(directory, 'timestamps.csv')
+    if not os.path.exists(path):
+        return timestamps
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.strip().split(',')
+            if len(parts) >= 2:
+                try:
+                    timestamps[parts[0]] = float(parts[1])
+                except ValueError:
+                    continue
+    return timestamps
+
+def _name_index(name):
+    """Addaki zaman damgası dışındaki sayılar (calib_left_10_... için (10,)); sayısal sıralama anahtarı"""
+    return tuple(int(digits) for digits in re.findall(r'\d+', TIMESTAMP_PATTERN.sub('', name)))
+
+def find_image_pairs(path):
+    """Oturum klasöründeki sol/sağ görüntü çiftlerini zaman sırasıyla bul
+    
+    Dosya adlarındaki zaman damgaları saniye çözünürlüklüdür; bu yüzden yalnızca
+    sıralamada kullanılır. Çiftlere zaman damgası ancak timestamps.csv her çift için
+    kesin artan değerler verdiğinde atanır, aksi halde None döner ve oynatıcı kareleri
+    sıra/fps aralıklarıyla verir.
+    """
+    left_dir = os.path.join(path, 'left')
+    right_dir = os.path.join(path, 'right')
+    if not (os.path.isdir(left_dir) and os.path.isdir(right_dir)):
+        # Tek klasör: calib_left_1_... / calib_right_1_... gibi adlar
+        left_dir = right_dir = path
+        
+    timestamps = _read_timestamp_file(path)
+    pairs = []
+    for name in sorted(os.listdir(left_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS) or 'left' not in name:
+            continue
+        right_name = name.replace('left', 'right', 1)
+        right_path = os.path.join(right_dir, right_name)
+        if not os.path.exists(right_path):
+            continue
+        pairs.append((timestamps.get(name), os.path.join(left_dir, name), right_path))
+        
+    names = [os.path.basename(left_path) for _, left_path, _ in pairs]
+    if pairs and all(timestamp is not None for timestamp, _, _ in pairs):
+        keys = [(timestamp, _name_index(name), name) for (timestamp, _, _), name in zip(pairs, names)]
+    else:
+        # Adda zaman damgası olmayanlar sona; aynı saniyedekiler sayısal sıraya göre (calib_left_2 < calib_left_10)
+        keys = [(_parse_timestamp(name) is None, _parse_timestamp(name) or 0.0, _name_index(name), name)
+                for name in names]
+    pairs = [pair for _, pair in sorted(zip(keys, pairs), key=lambda item: item[0])]
+    
+    # Eşit ya da eksik zaman damgalarında kareler sıra/fps ile aralıklanır
+    precise = all(timestamp is not None for timestamp, _, _ in pairs) and \
+        all(b[0] > a[0] for a, b in zip(pairs, pairs[1:]))
+    if not precise:
+        pairs = [(None, left_path, right_path) for _, left_path, right_path in pairs]
+    return pairs
+
+class SessionReplay:
+    """Kayıtlı stereo oturumu iki göz için grab()/retrieve() kaynağı olarak oynat"""
+    def __init__(self, path, fps=30, realtime=True, speed=1.0, loop=False, prefetch=8, color_mode='bgr'):
+        self.path = path
+        self.fps = fps
+        self.realtime = realtime
+        self.speed = speed
+        self.loop = loop
+        self.color_mode = color_mode
+        self.image_pairs = None
+        self.video_paths = None
+        self._open_session()
+        
+        # Önceden çözme işçisi
+        self.queue = queue.Queue(maxsize=max(1, prefetch))
+        self.is_running = True
+        self.finished = False
+        self.worker = threading.Thread(target=self._decode_worker, name="replay-decode")
+        self.worker.daemon = True
+        self.worker.start()
+        
+        # Gözler arası kilitli adım
+        self.cond = threading.Condition()
+        self.index = {'left': 0, 'right': 0}
+        self.pending = {}
+        self.first_timestamp = None
+        self.start_time = None
+        
+        first = self._peek_first()
+        self.frame_size = (first.shape[1], first.shape[0]) if first is not None else None
+        self.sources = {'left': ReplaySource(self, 'left'), 'right': ReplaySource(self, 'right')}
+        
+    def _open_session(self):
+        """Kaynak türünü belirle (görüntü çiftleri, yan yana video veya iki video)"""
+        if os.path.isfile(self.path):
+            self.video_paths = (self.path, None)
+            return
+            
+        if not os.path.isdir(self.path):
+            raise FileNotFoundError(f"Oturum bulunamadı: {self.path}")
+            
+        videos = {}
+        for name in os.listdir(self.path):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() in VIDEO_EXTENSIONS and stem in ('left', 'right'):
+                videos[stem] = os.path.join(self.path, name)
+        if 'left' in videos and 'right' in videos:
+            self.video_paths = (videos['left'], videos['right'])
+            return
+            
+        self.image_pairs = find_image_pairs(self.path)
+        if not self.image_pairs:
+            raise FileNotFoundError(f"Oturumda sol/sağ görüntü çifti bulunamadı: {self.path}")
+        print(f"Oynatılacak {len(self.image_pairs)} stereo çift bulundu: {self.path}")
+        
+    def _peek_first(self):
+        """Kare boyutunu öğrenmek için ilk kareyi çöz"""
+        if self.image_pairs is not None:
+            return self._read_image(self.image_pairs[0][1])
+        capture = cv2.VideoCapture(self.video_paths[0])
+        ret, frame = capture.read()
+        capture.release()
+        if not ret:
+            return None
+        if self.video_paths[1] is None:
+            frame = frame[:, :frame.shape[1] // 2]
+        return frame
+        
+    def _read_image(self, path):
+        flags = cv2.IMREAD_GRAYSCALE if self.color_mode == 'gray' else cv2.IMREAD_COLOR
+        return cv2.imread(path, flags)
+        
+    def _convert(self, frame):
+        if self.color_mode == 'gray' and frame.ndim == 3:
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame
+        
+    def _iterate_images(self):
+        for i, (timestamp, left_path, right_path) in enumerate(self.image_pairs):
+            if timestamp is None:
+                timestamp = i / float(self.fps)
+            yield self._read_image(left_path), self._read_image(right_path), timestamp
+            
+    def _iterate_videos(self):
+        left_capture = cv2.VideoCapture(self.video_paths[0])
+        right_capture = cv2.VideoCapture(self.video_paths[1]) if self.video_paths[1] else None
+        i = 0
+        try:
+            while True:
+                ret, left = left_capture.read()
+                if not ret:
+                    break
+                timestamp = left_capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                if timestamp <= 0 and i > 0:
+                    timestamp = i / float(self.fps)
+                if right_capture is None:
+                    # Yan yana video: sol ve sağ yarılar
+                    half = left.shape[1] // 2
+                    left, right = left[:, :half], left[:, half:2 * half]
+                else:
+                    ret, right = right_capture.read()
+                    if not ret:
+                        break
+                yield self._convert(left), self._convert(right), timestamp
+                i += 1
+        finally:
+            left_capture.release()
+            if right_capture is not None:
+                right_capture.release()
+                
+    def _decode_worker(self):
+        """Kareleri sırayla çözüp sınırlı kuyruğa koy (kuyruk doluysa bekler)"""
+        index = 0
+        offset = 0.0
+        while self.is_running:
+            first_timestamp = last_timestamp = None
+            iterator = self._iterate_images() if self.image_pairs is not None else self._iterate_videos()
+            for left, right, timestamp in iterator:
+                if left is None or right is None:
+                    continue
+                index += 1
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                last_timestamp = timestamp
+                # Zaman damgaları oturum başına göre; her tur bir öncekinin ardından devam eder
+                item = ReplayItem(index, left, right, timestamp - first_timestamp + offset)
+                while self.is_running:
+                    try:
+                        self.queue.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if not self.is_running:
+                    return
+                    
+            if not self.loop or last_timestamp is None:
+                break
+            # Döngüde zaman damgaları artmaya devam eder
+            offset += (last_timestamp - first_timestamp) + 1.0 / self.fps
+            
+        # Bitiş işareti; release() sonrası kuyruğu okuyan olmadığından dolu kuyrukta süresiz beklenmez
+        while self.is_running:
+            try:
+                self.queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        
+    def grab(self, side, timeout=2.0):
+        """Bir göz için sıradaki çifti al; iki göz aynı çifti sırayla paylaşır"""
+        other = 'right' if side == 'left' else 'left'
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.index[side] <= self.index[other], timeout):
+                return None
+            index = self.index[side] + 1
+            if index not in self.pending:
+                if self.finished:
+                    return None
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    return None
+                if item is None:
+                    self.finished = True
+                    print("Oynatma oturumu bitti.")
+                    return None
+                self.pending[index] = item
+            item = self.pending[index]
+            self.index[side] = index
+            if self.index[other] >= index:
+                del self.pending[index]
+                
+            if self.start_time is None:
+                self.start_time = time.monotonic()
+                self.first_timestamp = item.timestamp
+            start_time = self.start_time
+            first_timestamp = self.first_timestamp
+            self.cond.notify_all()
+            
+        if self.realtime:
+            # Kayıttaki zaman aralıklarına uy (speed > 1 hızlandırır)
+            delay = start_time + (item.timestamp - first_timestamp) / self.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return item
+        
+    def release(self):
+        self.is_running = False
+        with self.cond:
+            self.finished = True
+            self.cond.notify_all()
+
+class ReplaySource:
+    """Oynatılan oturumun tek gözü için OpenCV benzeri grab()/retrieve() arayüzü"""
+    def __init__(self, replay, side):
+        self.replay = replay
+        self.side = side
+        self.item = None
+        self.frame_index = None  # Son grab() ile alınan kaydın numarası; iki gözde aynıdır
+        
+    def isOpened(self):
+        return not self.replay.finished
+        
+    def grab(self):
+        self.item = self.replay.grab(self.side)
+        self.frame_index = self.item.index if self.item is not None else None
+        return self.item is not None
+        
+    def retrieve(self, image=None):
+        if self.item is None:
+            return False, None
+        frame = self.item.left if self.side == 'left' else self.item.right
+        if image is None or image.shape != frame.shape:
+            return True, frame
+        np.copyto(image, frame)
+        return True, image
+        
+    def release(self):
+        self.replay.release()
\ No newline at end of file
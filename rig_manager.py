@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Çoklu stereo kafa yöneticisi
+RIG_SETTINGS içindeki her stereo kafa kendi sürecinde yakalanır ve işlenir
+(rektifikasyon, ArUco tespiti). Süreçler küçük önizlemeleri paylaşılan
+belleğe yazar, durumlarını bir kuyruk üzerinden bildirir; yönetici bunları
+tek bir birleşik görünümde toplar.
+"""
+
+import cv2
+import numpy as np
+import time
+import queue
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from camera import CameraController
+from calibration import StereoCalibration, find_calibration
+from aruco_detector import ArucoDetector
+from metrics import PipelineMetrics
+from drift_monitor import DriftMonitor
+import settings
+import utils
+
+# Alt süreçlere aktarılan ayar tabloları (spawn ile yeniden içe aktarılınca kaybolmasın diye)
+SETTINGS_TABLES = ['CAMERA_SETTINGS', 'CALIBRATION_SETTINGS', 'ARUCO_SETTINGS',
+                   'SYNTHETIC_SETTINGS', 'REPLAY_SETTINGS', 'RIG_SETTINGS', 'DRIFT_SETTINGS']
+
+def _preview_shape(camera_settings, preview_width):
+    """Yan yana sol/sağ önizleme boyutu (yükseklik, genişlik, 3)"""
+    eye_width = preview_width // 2
+    eye_height = int(round(eye_width * camera_settings['height'] / float(camera_settings['width'])))
+    return (eye_height, eye_width * 2, 3)
+
+class RigWorker:
+    """Tek bir stereo kafayı yakalayan ve işleyen süreç içi döngü"""
+    def __init__(self, config, preview, preview_lock, preview_seq, status_queue, stop_event):
+        self.config = config
+        self.name = config['name']
+        self.preview = preview
+        self.preview_lock = preview_lock
+        self.preview_seq = preview_seq
+        self.status_queue = status_queue
+        self.stop_event = stop_event
+        
+        # Kafa ayarları genel kamera ayarlarını ezer
+        self.camera_settings = dict(settings.CAMERA_SETTINGS)
+        self.camera_settings.update({k: v for k, v in config.items() if k in self.camera_settings})
+        
+        self.camera = CameraController()
+        self.calibration = StereoCalibration(settings.CALIBRATION_SETTINGS['map_format'],
+                                             settings.CALIBRATION_SETTINGS['alpha'])
+        self.aruco = ArucoDetector(settings.ARUCO_SETTINGS['dictionary'])
+        self.aruco_detection = settings.RIG_SETTINGS['aruco_detection']
+        
+        self.pairs = 0
+        self.metrics = PipelineMetrics(settings.APP_SETTINGS['metrics_window'])
+        self.drift_monitor = DriftMonitor() if settings.DRIFT_SETTINGS['enabled'] else None
+        self.errors = 0
+        self.last_error = None
+        self.markers = []
+        
+    def init(self):
+        self.camera.configure(self.camera_settings)
+        self.camera.synthetic_options = settings.get_synthetic_options()
+        self.camera.replay_options = dict(settings.REPLAY_SETTINGS)
+        if not self.camera.init_cameras(self.camera_settings['left_id'], self.camera_settings['right_id']):
+            return False
+            
+        calibration_file = self.config.get('calibration_file')
+        if calibration_file and find_calibration(calibration_file):
+            self.calibration.load_calibration(calibration_file)
+        elif self.camera.synthetic_rig is not None and settings.SYNTHETIC_SETTINGS['use_ground_truth_calibration']:
+            self.camera.synthetic_rig.apply_to_calibration(self.calibration)
+            
+        return self.camera.start_capture()
+        
+    def process(self, left_frame, right_frame, timeline):
+        """Rektifiye et, markerları tespit et ve çizilmiş görüntüleri döndür"""
+        detect = self.aruco_detection and self.calibration.calibrated
+        if self.calibration.calibrated:
+            # Sağ göz (ve tespit yoksa sol göz) doğrudan önizleme boyutuna rektifiye edilir
+            crop = settings.CALIBRATION_SETTINGS['crop_to_roi']
+            eye_height, width = self.preview.shape[:2]
+            preview_maps = self.calibration.get_map_set((width // 2, eye_height), crop)
+            if detect:
+                region_width = self.calibration.output_size(self.calibration.img_size[0], crop)[0]
+                detection_maps = self.calibration.get_map_set(self.calibration.output_size(
+                    region_width * settings.ARUCO_SETTINGS['detection_scale'], crop), crop)
+            else:
+                detection_maps = preview_maps
+            left_frame = self.calibration.rectify_image(left_frame, 'left', detection_maps)
+            right_frame = self.calibration.rectify_image(right_frame, 'right', preview_maps)
+            timeline.mark('rectified')
+            
+            # Gözler farklı boyutta olabilir; izleyici ikisini ortak genişliğe getirir
+            drift_scale = detection_maps.roi[3] / float(detection_maps.size[1])
+            if self.drift_monitor is not None:
+                self.drift_monitor.submit(left_frame, right_frame, drift_scale)
+            
+        markers = []
+        if detect:
+            left_frame, corners, ids, distances = self.aruco.detect_and_draw(
+                left_frame,
+                detection_maps.camera_matrix_left,
+                detection_maps.dist_coeffs,
+                True,
+                settings.ARUCO_SETTINGS['marker_length'])
+            if ids is not None:
+                markers = [(int(marker_id), float(distance)) for marker_id, distance in zip(ids.ravel(), distances)]
+            timeline.mark('detected')
+                
+        self.markers = markers
+        return left_frame, right_frame
+        
+    def publish_preview(self, left_frame, right_frame):
+        """Küçültülmüş sol/sağ görüntüleri paylaşılan belleğe yaz"""
+        eye_height, width = self.preview.shape[:2]
+        eye_width = width // 2
+        left_small = utils.to_bgr(left_frame)
+        right_small = utils.to_bgr(right_frame)
+        # Önizleme boyutuna rektifiye edilmiş gözler yeniden küçültülmez
+        if left_small.shape[:2] != (eye_height, eye_width):
+            left_small = cv2.resize(left_small, (eye_width, eye_height), interpolation=cv2.INTER_AREA)
+        if right_small.shape[:2] != (eye_height, eye_width):
+            right_small = cv2.resize(right_small, (eye_width, eye_height), interpolation=cv2.INTER_AREA)
+        with self.preview_lock:
+            self.preview[:, :eye_width] = left_small
+            self.preview[:, eye_width:] = right_small
+            self.preview_seq.value += 1
+            
+    def send_status(self, fps):
+        stats = self.camera.get_sync_stats() or {}
+        metrics = self.metrics.get_summary()
+        status = {
+            'name': self.name,
+            'fps': fps,
+            'pairs': self.pairs,
+            'missed_pairs': metrics['dropped'],
+            'metrics': metrics,
+            'skew_ms': (stats.get('last_skew') or 0.0) * 1000.0,
+            'calibrated': self.calibration.calibrated,
+            'markers': self.markers,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'drift': self.drift_monitor.get_status() if self.drift_monitor is not None else None
+        }
+        try:
+            self.status_queue.put_nowait(status)
+        except queue.Full:
+            pass
+            
+    def run(self):
+        if not self.init():
+            self.last_error = "Kameralar başlatılamadı"
+            self.send_status(0.0)
+            return
+            
+        interval = settings.RIG_SETTINGS['status_interval']
+        last_seq = 0
+        frames_since_status = 0
+        last_status = time.monotonic()
+        try:
+            while not self.stop_event.is_set():
+                handle = self.camera.wait_for_new_pair(last_seq, 0.1)
+                if handle is None:
+                    self.metrics.count_stale()
+                else:
+                    timeline = self.metrics.begin(handle.seq, handle.timestamp, handle.skew)
+                    last_seq = handle.seq
+                    try:
+                        left_frame, right_frame = self.process(handle.left, handle.right, timeline)
+                        self.publish_preview(left_frame, right_frame)
+                        self.metrics.finish(timeline, 'composed')
+                    except Exception as e:
+                        self.errors += 1
+                        self.last_error = str(e)
+                    finally:
+                        handle.release()
+                    self.pairs += 1
+                    frames_since_status += 1
+                    
+                now = time.monotonic()
+                if now - last_status >= interval:
+                    self.send_status(frames_since_status / (now - last_status))
+                    frames_since_status = 0
+                    last_status = now
+        finally:
+            self.camera.release()
+
+def _rig_process_main(config, settings_snapshot, preview_name, preview_shape, preview_lock,
+                      preview_seq, status_queue, stop_event, opencv_threads):
+    """Alt süreç giriş noktası"""
+    for table_name, table in settings_snapshot.items():
+        getattr(settings, table_name).update(table)
+    cv2.setNumThreads(opencv_threads)
+    
+    preview_memory = shared_memory.SharedMemory(name=preview_name)
+    try:
+        preview = np.ndarray(preview_shape, dtype=np.uint8, buffer=preview_memory.buf)
+        RigWorker(config, preview, preview_lock, preview_seq, status_queue, stop_event).run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        del preview
+        preview_memory.close()
+
+class RigManager:
+    """Birden fazla stereo kafayı ayrı süreçlerde başlat, durum ve görünümü birleştir"""
+    def __init__(self, rig_settings=None):
+        self.rig_settings = rig_settings if rig_settings is not None else settings.RIG_SETTINGS
+        self.context = mp.get_context('spawn')
+        self.stop_event = self.context.Event()
+        self.status_queue = self.context.Queue(maxsize=256)
+        self.rigs = []
+        self.status = {}
+        
+    def start(self):
+        """Her kafa için paylaşılan önizleme belleğini ve süreci oluştur"""
+        snapshot = {name: dict(getattr(settings, name)) for name in SETTINGS_TABLES}
+        preview_width = self.rig_settings['preview_width']
+        
+        for config in self.rig_settings['rigs']:
+            camera_settings = dict(settings.CAMERA_SETTINGS)
+            camera_settings.update({k: v for k, v in config.items() if k in camera_settings})
+            shape = _preview_shape(camera_settings, preview_width)
+            
+            memory = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+            preview = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+            preview[:] = 0
+            lock = self.context.Lock()
+            seq = self.context.Value('Q', 0, lock=False)
+            
+            process = self.context.Process(
+                target=_rig_process_main, name=f"rig-{config['name']}",
+                args=(config, snapshot, memory.name, shape, lock, seq, self.status_queue,
+                      self.stop_event, self.rig_settings['opencv_threads']))
+            process.daemon = True
+            process.start()
+            
+            self.rigs.append({'config': config, 'memory': memory, 'preview': preview,
+                              'lock': lock, 'seq': seq, 'process': process})
+            print(f"Stereo kafa başlatıldı: {config['name']} (pid {process.pid})")
+        return True
+        
+    def poll_status(self):
+        """Kuyruktaki durum raporlarını topla"""
+        while True:
+            try:
+                status = self.status_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.status[status['name']] = status
+        return self.status
+        
+    def get_status(self):
+        """Tüm kafaların son durumu ve toplam işlenen çift hızı"""
+        self.poll_status()
+        total_fps = sum(status['fps'] for status in self.status.values())
+        return {
+            'rigs': dict(self.status),
+            'total_fps': total_fps,
+            'alive': {rig['config']['name']: rig['process'].is_alive() for rig in self.rigs}
+        }
+        
+    def get_combined_view(self):
+        """Kafaların önizlemelerini alt alta birleştir ve durum satırlarını ekle"""
+        self.poll_status()
+        tiles = []
+        width = max(rig['preview'].shape[1] for rig in self.rigs)
+        for rig in self.rigs:
+            with rig['lock']:
+                tile = rig['preview'].copy()
+            if tile.shape[1] != width:
+                tile = utils.resize_image(tile, width=width)
+                
+            name = rig['config']['name']
+            status = self.status.get(name)
+            if status is None:
+                text = f"{name}: başlatılıyor..."
+            else:
+                markers = ", ".join(f"#{marker_id} {distance:.2f}" for marker_id, distance in status['markers'])
+                text = f"{name}: {status['fps']:.1f} FPS, kayma {status['skew_ms']:.1f} ms"
+                total = status['metrics']['latency_ms'].get('total')
+                if total:
+                    text += f", gecikme p95 {total['p95']:.0f} ms"
+                if markers:
+                    text += f", marker: {markers}"
+                if status['last_error']:
+                    text += f", hata: {status['last_error']}"
+                if status.get('drift') and status['drift']['alert']:
+                    text += f", kalibrasyon sapması {status['drift']['vertical_error_px']:.1f} px"
+            cv2.putText(tile, text, (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            tiles.append(tile)
+        return np.vstack(tiles)
+        
+    def run(self):
+        """Birleşik görünümü göster; q veya ESC ile çık"""
+        self.start()
+        window_title = settings.APP_SETTINGS['window_title'] + " - Çoklu Kafa"
+        cv2.namedWindow(window_title, cv2.WINDOW_NORMAL)
+        try:
+            while True:
+                cv2.imshow(window_title, self.get_combined_view())
+                key = cv2.waitKey(30) & 0xFF
+                if key == 27 or key == ord('q'):
+                    break
+        finally:
+            self.stop()
+            cv2.destroyWindow(window_title)
+            
+    def stop(self):
+        """Süreçleri durdur ve paylaşılan belleği serbest bırak"""
+        self.stop_event.set()
+        for rig in self.rigs:
+            rig['process'].join(timeout=3.0)
+            if rig['process'].is_alive():
+                rig['process'].terminate()
+            del rig['preview']
+            rig['memory'].close()
+            rig['memory'].unlink()
+        self.rigs = []
+        print("Tüm stereo kafalar durduruldu.")
\ No newline at end of file
@@ -10,7 +10,9 @@ REQUIRED_DIRS = [
     'captures/right',
     'calibration',
     'aruco_markers',
-    'aruco_detections'
+    'aruco_detections',
+    'pointclouds',
+    'logs'
 ]
 
 # Kamera ayarları
@@ -20,6 +22,13 @@ CAMERA_SETTINGS = {
     'fps': 30,
     'left_id': 0,
     'right_id': 1,
+    'max_skew_ms': 10,  # Sol/sağ kare eşleştirme toleransı (milisaniye)
+    'ring_size': 5,     # Kamera başına önceden ayrılan kare yuvası sayısı
+    'color_mode': 'bgr',  # 'bgr' veya 'gray' (yakalamadan tespite tek kanal, yalnızca ekranda BGR)
+    'backend': 'auto',    # 'auto', 'arducam', 'opencv', 'synthetic', 'replay'
+    'capture_format': 'mjpeg',  # OpenCV/USB kameralar için 'mjpeg' (sıkıştırılmış) veya 'raw' (YUYV)
+    'decode_threads': 4,  # MJPEG çözme havuzundaki iş parçacığı sayısı
+    'decode_scale': 1,    # MJPEG çözme ölçeği: 1, 2, 4 veya 8 (2: yarı çözünürlük)
     'exposure': -1,    # -1: Otomatik
     'gain': -1,        # -1: Otomatik
     'brightness': 50,
@@ -29,13 +38,44 @@ CAMERA_SETTINGS = {
     'auto_focus': True
 }
 
+# Sentetik kamera ayarları (CAMERA_SETTINGS['backend'] = 'synthetic')
+SYNTHETIC_SETTINGS = {
+    'baseline': 60.0,         # Kameralar arası mesafe (mm)
+    'hfov': 70.0,             # Yatay görüş açısı (derece)
+    'realtime': True,         # False: kareleri olabildiğince hızlı üret
+    'marker_count': 4,        # Sahnedeki ArUco marker sayısı
+    'seed': 0,                # Doku üretimi için rastgele tohum
+    'use_ground_truth_calibration': True  # Bilinen parametreleri kalibrasyon olarak yükle
+}
+
+# Kayıtlı oturum oynatma ayarları (CAMERA_SETTINGS['backend'] = 'replay')
+REPLAY_SETTINGS = {
+    'path': 'captures',       # left/right klasörleri, görüntü klasörü veya video dosyası/klasörü
+    'realtime': True,         # True: kayıttaki zaman damgalarına uy, False: olabildiğince hızlı
+    'speed': 1.0,             # Gerçek zamanlı modda oynatma hızı çarpanı
+    'loop': True,             # Oturum bitince başa dön
+    'prefetch': 8             # Önceden çözülen çift sayısı
+}
+
 # Kalibrasyon ayarları
 CALIBRATION_SETTINGS = {
     'board_size': (9, 6),     # Köşe sayısı (genişlik, yükseklik)
     'square_size': 25.0,      # Kare boyutu (mm)
     'min_captures': 20,       # Minimum görüntü sayısı
     'capture_delay': 2,       # Görüntü yakalama arasındaki gecikme (saniye)
-    'calibration_file': 'calibration/stereo_calibration.pkl'
+    'detection_workers': None,  # Paralel köşe tespiti iş parçacığı sayısı (None: çekirdek sayısı)
+    'coarse_width': 640,      # Tahta önce bu genişliğe küçültülmüş kopyada aranır (None: tam çözünürlük)
+    'auto_capture': False,    # Tahta iki gözde yeni bir pozda görününce kendiliğinden yakala
+    'min_pose_change': 0.05,  # Yeni poz için köşelerin köşegene göre en az ortalama yer değiştirmesi
+    'map_format': 'fixed',    # Rektifikasyon haritası: 'fixed' (CV_16SC2, hızlı) veya 'float' (CV_32FC1)
+    'crop_to_roi': False,     # Rektifiye görüntüleri iki gözün ortak geçerli bölgesine kırp
+    'max_views': 40,          # Çözücüler poz çeşitliliği ve kapsamaya göre seçilen en fazla bu kadar görünümde çalışır (None: hepsi)
+    'outlier_factor': 3.0,    # Hatası medyanın bu katını aşan görünümler atılır (None: atılmaz)
+    'refine_all_views': False,  # Seçilen alt kümenin sonucunu sonunda tüm görünümlerde iyileştir
+    'alpha': 0.9,             # stereoRectify ölçeklemesi (0: yalnızca geçerli pikseller, 1: tüm pikseller)
+    'spill_dir': 'calibration',  # Kalibrasyon kareleri her oturumda bunun altında <zaman damgası>/ klasörüne yazılır
+    'corner_cache_dir': 'calibration/corner_cache',  # Bulunan köşelerin disk önbelleği (None: kapalı)
+    'calibration_file': 'calibration/stereo_calibration'  # Paket dizini (eski .pkl yüklenirken dönüştürülür)
 }
 
 # ArUco Marker ayarları
@@ -44,7 +84,9 @@ ARUCO_SETTINGS = {
     'marker_size': 200,       # Piksel cinsinden
     'marker_length': 0.05,    # Metre cinsinden
     'output_dir': 'aruco_markers',
-    'detection_dir': 'aruco_detections'
+    'detection_dir': 'aruco_detections',
+    'detection_scale': 1.0,   # Tespit, rektifiye görüntünün bu ölçeğinde yapılır (ör. 0.5: yarım çözünürlük)
+    'stereo': True            # İki gözde görülen markerlar göz başına PnP yerine üçgenlenir
 }
 
 # ArUco Dictionary seçenekleri
@@ -78,14 +120,83 @@ RESOLUTION_OPTIONS = [
 # FPS seçenekleri
 FPS_OPTIONS = [15, 30, 60]
 
+# Yük ve sıcaklığa duyarlı kalite yöneticisi (governor.py)
+GOVERNOR_SETTINGS = {
+    'enabled': False,
+    'target_latency_ms': 80,      # Yakalamadan ekrana p95 gecikme bütçesi
+    'max_temperature': 75.0,      # Bu sıcaklıkta (°C) kalite düşürülür
+    'resume_temperature': 68.0,   # Kalite ancak bunun altında geri yükseltilir
+    'max_cpu_percent': 90,
+    'headroom': 0.7,              # Yükseltmek için ölçümler bütçenin bu oranının altında olmalı
+    'check_interval': 2.0,        # Değerlendirme aralığı (saniye)
+    'upgrade_delay': 10.0,        # Yükseltmeden önce bütçe içinde kalınması gereken süre (saniye)
+    'aruco_intervals': [1, 2, 4], # ArUco tespiti her N karede bir
+    'rectify_interpolations': ['linear', 'nearest'],
+    'min_fps': 15,                # FPS_OPTIONS içinden inilebilecek en düşük değer
+    'log_file': 'logs/governor.log'
+}
+
+# Kalibrasyon sapması izleyicisi (rektifiye akışta dikey hata)
+DRIFT_SETTINGS = {
+    'enabled': True,
+    'interval': 1.0,          # Örnekleme aralığı (saniye)
+    'work_width': 640,        # Örnekler bu genişliğe küçültülmüş gri çiftte alınır
+    'max_features': 200,      # Sol gözde aranan en fazla köşe
+    'min_points': 20,         # Örnek için gereken en az eşlenik nokta
+    'window': 30,             # Kayan penceredeki örnek sayısı
+    'min_samples': 5,         # Uyarı için gereken en az örnek
+    'threshold_px': 1.0,      # Ortanca dikey hata (tam çözünürlük pikseli) bu değeri aşınca uyar
+    'clear_ratio': 0.7,       # Uyarı, hata eşiğin bu oranının altına inince kalkar
+    'log_file': 'logs/drift.log'
+}
+
+# Derinlik motoru (depth.py)
+DEPTH_SETTINGS = {
+    'tier': 'fast',           # DEPTH_TIERS içinden başlangıç seviyesi
+    'max_disparity': 0.1,     # Aranan en büyük disparite, çalışma genişliğine oranla
+    'cursor_radius': 2,       # Ekranda gösterilen merkez derinliği için ortanca penceresi (piksel)
+    'workers': None,          # Yatay bant iş parçacığı sayısı (None: çekirdek sayısı)
+    'band_margin': 32,        # SGBM yol birikimi için bant payına eklenen satır
+    'incremental': False,     # Yalnızca değişen karoları yeniden hesapla (durağan sahneler)
+    'tile_size': 32,          # Değişiklik karosu (çalışma çözünürlüğü pikseli)
+    'change_threshold': 12,   # Bu gri düzeyinden fazla değişen piksel "değişmiş" sayılır
+    'change_blur': 3,         # Fark bu pencerede ortalanarak algılayıcı gürültüsü bastırılır
+    'change_fraction': 0.02,  # Karonun bu oranından fazlası değişince karo yeniden hesaplanır
+    'refresh_interval': 30    # Her N çiftte bir tüm kare yeniden hesaplanır
+}
+
+# Nokta bulutu dışa aktarımı (pointcloud.py)
+POINTCLOUD_SETTINGS = {
+    'output_dir': 'pointclouds',
+    'format': 'ply',          # 'ply' (ikili, renkli) veya 'raw' (x, y, z, kare float32)
+    'voxel_size': 10.0,       # Seyreltme vokseli (kalibrasyon birimi, mm); 0: seyreltme yok
+    'min_depth': 100.0,       # Bu derinlik aralığı dışındaki noktalar atılır
+    'max_depth': 5000.0,
+    'record_interval': 1,     # Sürekli kayıtta her N derinlik karesinden biri yazılır
+    'chunk_points': 65536     # Dosyaya tek seferde yazılan en fazla nokta
+}
+
+# Derinlik hız/kalite seviyeleri; scale tam rektifiye çözünürlüğe göre çalışma ölçeğidir
+DEPTH_TIERS = {
+    'fast': {'matcher': 'bm', 'scale': 0.5, 'block_size': 15, 'uniqueness': 15,
+             'speckle_window': 50, 'speckle_range': 2},
+    'balanced': {'matcher': 'sgbm', 'mode': '3way', 'scale': 0.5, 'block_size': 5, 'uniqueness': 10,
+                 'speckle_window': 100, 'speckle_range': 2, 'median': 5},
+    'quality': {'matcher': 'sgbm', 'mode': 'sgbm', 'scale': 1.0, 'block_size': 5, 'uniqueness': 10,
+                'speckle_window': 100, 'speckle_range': 2, 'median': 5,
+                'wls': True, 'wls_lambda': 8000.0, 'wls_sigma': 1.5}  # WLS opencv-contrib gerektirir
+}
+
 # Uygulama ayarları
 APP_SETTINGS = {
     'window_title': 'Stereo Kamera Uygulaması',
     'window_width': 1280,
     'window_height': 720,
-    'view_mode': 'side_by_side',  # 'side_by_side', 'left_only', 'right_only', 'overlay'
+    'view_mode': 'side_by_side',  # 'side_by_side', 'left_only', 'right_only', 'depth'
     'show_fps': True,
     'show_system_info': True,
+    'show_metrics': False,        # Aşama gecikmeleri ve kare kayıpları katmanı
+    'metrics_window': 300,        # Gecikme yüzdelikleri için kayan pencere (kare)
     'capture_format': 'png',      # 'png', 'jpg'
     'capture_quality': 95,        # JPEG kalitesi (0-100)
     'auto_save_calibration': True,
@@ -107,6 +218,35 @@ GUI_COLORS = {
     'info': (0, 120, 215)
 }
 
+# Çoklu stereo kafa ayarları (python main.py --rigs)
+# Her kafa kendi sürecinde çalışır; verilen anahtarlar CAMERA_SETTINGS değerlerini ezer
+RIG_SETTINGS = {
+    'rigs': [
+        {'name': 'rig0', 'left_id': 0, 'right_id': 1,
+         'calibration_file': 'calibration/rig0_stereo_calibration'},
+        {'name': 'rig1', 'left_id': 2, 'right_id': 3,
+         'calibration_file': 'calibration/rig1_stereo_calibration'}
+    ],
+    'preview_width': 640,     # Birleşik görünümde kafa başına önizleme genişliği (piksel)
+    'status_interval': 1.0,   # Durum raporlama aralığı (saniye)
+    'opencv_threads': 1,      # Süreç başına OpenCV iş parçacığı (çekirdekleri paylaşmak için)
+    'aruco_detection': True
+}
+
+def get_synthetic_options():
+    """SyntheticStereoRig için parametreleri ilgili ayar tablolarından topla"""
+    return {
+        'baseline': SYNTHETIC_SETTINGS['baseline'],
+        'hfov': SYNTHETIC_SETTINGS['hfov'],
+        'realtime': SYNTHETIC_SETTINGS['realtime'],
+        'marker_count': SYNTHETIC_SETTINGS['marker_count'],
+        'seed': SYNTHETIC_SETTINGS['seed'],
+        'board_size': CALIBRATION_SETTINGS['board_size'],
+        'square_size': CALIBRATION_SETTINGS['square_size'],
+        'dictionary_id': ARUCO_SETTINGS['dictionary'],
+        'marker_length': ARUCO_SETTINGS['marker_length']
+    }
+
 # Ayarları kaydet
 def save_settings():
     """Tüm ayarları bir dosyaya kaydet"""
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Sentetik stereo kamera arka ucu
+Bilinen taban çizgisi ve iç parametrelerle, betiklenmiş pozlarda dokulu
+düzlemler, dama tahtası ve ArUco markerları içeren stereo kareler üretir.
+Kamera olmayan makinelerde hız, gecikme ve doğruluk ölçümü için kullanılır.
+"""
+
+import cv2
+import numpy as np
+import threading
+import time
+
+class PlanarObject:
+    """Dokusu bilinen, poz fonksiyonuyla hareket eden düzlemsel nesne"""
+    def __init__(self, name, texture, width_mm, pose_function, static=False):
+        self.name = name
+        self.texture = texture
+        self.width_mm = width_mm
+        self.height_mm = width_mm * texture.shape[0] / texture.shape[1]
+        self.scale = width_mm / texture.shape[1]  # mm / doku pikseli
+        self.pose_function = pose_function      # t (saniye) -> (R, t) sol kamera koordinatlarında
+        self.static = static
+        
+    def pose(self, t):
+        return self.pose_function(t)
+        
+    def local_to_camera(self, R, tvec, eye_offset=0.0):
+        """Doku pikseli (u, v, 1) -> kamera koordinatı dönüşüm matrisi (3x3)"""
+        # Piksel merkezleri (u + 0.5) * scale konumundadır; doku kenarları düzlem kenarlarına oturur
+        M = np.empty((3, 3))
+        M[:, 0] = R[:, 0] * self.scale
+        M[:, 1] = R[:, 1] * self.scale
+        M[:, 2] = (R[:, 0] * (0.5 * self.scale - self.width_mm / 2) +
+                   R[:, 1] * (0.5 * self.scale - self.height_mm / 2) + tvec)
+        M[0, 2] -= eye_offset
+        return M
+        
+    def plane_points(self, points_mm, R, tvec):
+        """Düzlem üzerindeki (x, y) mm noktalarını sol kamera koordinatlarına çevir"""
+        points = np.zeros((len(points_mm), 3))
+        points[:, 0] = points_mm[:, 0] - self.width_mm / 2
+        points[:, 1] = points_mm[:, 1] - self.height_mm / 2
+        return points @ R.T + tvec
+
+def _pose(rvec, tvec):
+    R, _ = cv2.Rodrigues(np.asarray(rvec, dtype=np.float64))
+    return R, np.asarray(tvec, dtype=np.float64)
+
+class SyntheticStereoRig:
+    """Rektifiye edilmiş ideal stereo kamera çifti ve betiklenmiş sahne
+    
+    Birimler milimetredir. Sağ kamera sol kameranın +x yönünde baseline
+    kadar ötededir (OpenCV kuralı: T = [-baseline, 0, 0]). Bozulma yoktur,
+    bu yüzden üretilen kareler zaten rektifiyedir.
+    """
+    def __init__(self, width=640, height=480, fps=30, baseline=60.0, hfov=70.0,
+                 color_mode='bgr', realtime=True, board_size=(9, 6), square_size=25.0,
+                 dictionary_id=cv2.aruco.DICT_4X4_50, marker_length=0.05, marker_count=4, seed=0):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.baseline = baseline
+        self.color_mode = color_mode
+        self.realtime = realtime
+        self.board_size = board_size
+        self.square_size = square_size
+        self.marker_length = marker_length
+        self.marker_count = marker_count
+        
+        # İç parametreler
+        fx = (width / 2.0) / np.tan(np.radians(hfov) / 2.0)
+        self.camera_matrix = np.array([[fx, 0, (width - 1) / 2.0],
+                                       [0, fx, (height - 1) / 2.0],
+                                       [0, 0, 1]])
+        self.dist_coeffs = np.zeros(5)
+        self.R = np.eye(3)
+        self.T = np.array([[-baseline], [0.0], [0.0]])
+        
+        self.rng = np.random.default_rng(seed)
+        self.aruco_dict = cv2.aruco.getPredefinedDictionary(dictionary_id)
+        self.objects = self._build_scene()
+        self.static_layers = {}
+        
+        # Gözler arası kilitli adım ve zamanlama
+        self.cond = threading.Condition()
+        self.frame_index = {'left': 0, 'right': 0}
+        self.start_time = None
+        self.sources = {'left': SyntheticSource(self, 'left'), 'right': SyntheticSource(self, 'right')}
+        
+    # ------------------------------------------------------------------ sahne
+    def _noise_texture(self, size, blob):
+        """Stereo eşleştirme için yeterince dokulu rastgele desen"""
+        coarse = self.rng.integers(0, 256, (size // blob, size // blob), dtype=np.uint8)
+        texture = cv2.resize(coarse, (size, size), interpolation=cv2.INTER_CUBIC)
+        fine = self.rng.integers(-25, 26, (size, size))
+        return np.clip(texture.astype(np.int16) + fine, 0, 255).astype(np.uint8)
+        
+    def _chessboard_texture(self, pixels_per_square=32):
+        """İç köşe sayısı board_size olan, bir kare beyaz kenarlı dama tahtası"""
+        cols, rows = self.board_size[0] + 1, self.board_size[1] + 1
+        texture = np.full(((rows + 2) * pixels_per_square, (cols + 2) * pixels_per_square), 255, np.uint8)
+        for r in range(rows):
+            for c in range(cols):
+                if (r + c) % 2 == 0:
+                    y = (r + 1) * pixels_per_square
+                    x = (c + 1) * pixels_per_square
+                    texture[y:y + pixels_per_square, x:x + pixels_per_square] = 0
+        return texture
+        
+    def _marker_plate_texture(self):
+        """Izgara şeklinde marker_count adet ArUco marker içeren beyaz plaka"""
+        cells = self.aruco_dict.markerSize + 2
+        marker_px = cells * 12
+        gap_px = marker_px // 2
+        grid_cols = int(np.ceil(np.sqrt(self.marker_count)))
+        grid_rows = int(np.ceil(self.marker_count / grid_cols))
+        pitch = marker_px + gap_px
+        texture = np.full((grid_rows * pitch + gap_px, grid_cols * pitch + gap_px), 255, np.uint8)
+        
+        self.marker_layout = {}  # marker id -> doku üzerindeki sol üst köşe (piksel)
+        for marker_id in range(self.marker_count):
+            r, c = divmod(marker_id, grid_cols)
+            x = gap_px + c * pitch
+            y = gap_px + r * pitch
+            texture[y:y + marker_px, x:x + marker_px] = cv2.aruco.generateImageMarker(
+                self.aruco_dict, marker_id, marker_px)
+            self.marker_layout[marker_id] = (x, y)
+        self.marker_px = marker_px
+        return texture
+        
+    def _build_scene(self):
+        """Arkadan öne çizim sırasıyla sahne nesnelerini oluştur"""
+        objects = []
+        
+        # Görüş alanını kaplayan uzak arka plan
+        background = self._noise_texture(1024, 16)
+        objects.append(PlanarObject('background', background, 9000.0,
+                                    lambda t: _pose([0, 0, 0], [0, 0, 3500.0]), static=True))
+                                    
+        # Eğik dokulu duvar
+        wall = self._noise_texture(512, 8)
+        objects.append(PlanarObject('wall', wall, 1400.0,
+                                    lambda t: _pose([0, 0.6, 0], [-700.0, 150.0, 2000.0]), static=True))
+                                    
+        # Hareketli dama tahtası
+        board = self._chessboard_texture()
+        board_width = (self.board_size[0] + 3) * self.square_size
+        objects.append(PlanarObject('chessboard', board, board_width, lambda t: _pose(
+            [0.35 * np.sin(0.7 * t), 0.45 * np.sin(0.5 * t + 1.0), 0.15 * np.sin(0.3 * t)],
+            [100.0 * np.sin(0.4 * t) + 0.5 * board_width, 70.0 * np.sin(0.6 * t),
+             2.5 * board_width + 150.0 * np.sin(0.25 * t)])))
+             
+        # Hareketli ArUco marker plakası
+        if self.marker_count > 0:
+            plate = self._marker_plate_texture()
+            plate_width = self.marker_length * 1000.0 * plate.shape[1] / self.marker_px
+            objects.append(PlanarObject('markers', plate, plate_width, lambda t: _pose(
+                [0.3 * np.sin(0.45 * t), 0.5 * np.sin(0.33 * t), 0.4 * np.sin(0.2 * t)],
+                [-1.2 * plate_width - 150.0 + 60.0 * np.sin(0.5 * t), -50.0 + 50.0 * np.cos(0.4 * t),
+                 2.5 * plate_width + 400.0 + 150.0 * np.sin(0.3 * t)])))
+                 
+        return objects
+        
+    # ---------------------------------------------------------------- çizim
+    def _eye_offset(self, side):
+        return 0.0 if side == 'left' else self.baseline
+        
+    def _texture(self, obj):
+        if self.color_mode == 'gray':
+            return obj.texture
+        if not hasattr(obj, 'texture_bgr'):
+            obj.texture_bgr = cv2.cvtColor(obj.texture, cv2.COLOR_GRAY2BGR)
+        return obj.texture_bgr
+        
+    def _draw_object(self, canvas, obj, side, t):
+        """Nesneyi yalnızca izdüşüm kutusu içinde tuvale çiz (BORDER_TRANSPARENT)"""
+        R, tvec = obj.pose(t)
+        H = self.camera_matrix @ obj.local_to_camera(R, tvec, self._eye_offset(side))
+        
+        h_t, w_t = obj.texture.shape[:2]
+        corners = np.array([[0, 0, 1], [w_t, 0, 1], [w_t, h_t, 1], [0, h_t, 1]], dtype=np.float64).T
+        projected = H @ corners
+        if np.any(projected[2] <= 0):
+            return
+        projected = projected[:2] / projected[2]
+        
+        x0 = max(0, int(np.floor(projected[0].min())))
+        y0 = max(0, int(np.floor(projected[1].min())))
+        x1 = min(self.width, int(np.ceil(projected[0].max())) + 1)
+        y1 = min(self.height, int(np.ceil(projected[1].max())) + 1)
+        if x0 >= x1 or y0 >= y1:
+            return
+            
+        shift = np.array([[1, 0, -x0], [0, 1, -y0], [0, 0, 1]], dtype=np.float64)
+        roi = canvas[y0:y1, x0:x1]
+        cv2.warpPerspective(self._texture(obj), shift @ H, (x1 - x0, y1 - y0), dst=roi,
+                            flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_TRANSPARENT)
+                            
+    def _frame_shape(self):
+        if self.color_mode == 'gray':
+            return (self.height, self.width)
+        return (self.height, self.width, 3)
+        
+    def _static_layer(self, side):
+        """Sabit nesneler göz başına bir kez çizilir"""
+        if side not in self.static_layers:
+            layer = np.zeros(self._frame_shape(), np.uint8)
+            for obj in self.objects:
+                if obj.static:
+                    self._draw_object(layer, obj, side, 0.0)
+            self.static_layers[side] = layer
+        return self.static_layers[side]
+        
+    def render(self, side, t, out=None):
+        """Verilen sahne zamanında bir gözün karesini üret (verildiyse out'a yaz)"""
+        if out is None or out.shape != self._frame_shape():
+            out = np.empty(self._frame_shape(), np.uint8)
+        np.copyto(out, self._static_layer(side))
+        for obj in self.objects:
+            if not obj.static:
+                self._draw_object(out, obj, side, t)
+        return out
+        
+    def scene_time(self, index):
+        """Kare numarasından betik zamanı (gerçek saatten bağımsız, tekrarlanabilir)"""
+        return index / float(self.fps)
+        
+    # --------------------------------------------------------- zamanlama
+    def grab(self, side, timeout=1.0):
+        """Bir göz için sıradaki kareyi kilitle; gözler arasında en fazla bir kare fark olur"""
+        other = 'right' if side == 'left' else 'left'
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.frame_index[side] <= self.frame_index[other], timeout):
+                return None
+            self.frame_index[side] += 1
+            index = self.frame_index[side]
+            if self.start_time is None:
+                self.start_time = time.monotonic()
+            start_time = self.start_time
+            self.cond.notify_all()
+            
+        if self.realtime:
+            # Son tarih paylaşılan başlangıca göre hesaplanır, iki göz aynı anda uyanır
+            delay = start_time + index / float(self.fps) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return index
+        
+    # ------------------------------------------------------- gerçek değerler
+    def chessboard_corners(self, t):
+        """Dama tahtası iç köşelerinin 3B konumu (calibrate() objp sırasıyla)"""
+        board = self._object('chessboard')
+        R, tvec = board.pose(t)
+        grid = np.mgrid[0:self.board_size[0], 0:self.board_size[1]].T.reshape(-1, 2)
+        points_mm = (grid + 2) * self.square_size
+        return board.plane_points(points_mm.astype(np.float64), R, tvec)
+        
+    def marker_corners(self, t):
+        """marker id -> dört köşenin 3B konumu (ArUco köşe sırası)"""
+        plate = self._object('markers')
+        if plate is None:
+            return {}
+        R, tvec = plate.pose(t)
+        size = self.marker_px * plate.scale
+        markers = {}
+        for marker_id, (x, y) in self.marker_layout.items():
+            x_mm, y_mm = x * plate.scale, y * plate.scale
+            corners = np.array([[x_mm, y_mm], [x_mm + size, y_mm],
+                                [x_mm + size, y_mm + size], [x_mm, y_mm + size]])
+            markers[marker_id] = plate.plane_points(corners, R, tvec)
+        return markers
+        
+    def project(self, points, side):
+        """Sol kamera koordinatlarındaki 3B noktaları bir göze izdüşür"""
+        shifted = np.asarray(points, dtype=np.float64) - [self._eye_offset(side), 0, 0]
+        projected = shifted @ self.camera_matrix.T
+        return projected[:, :2] / projected[:, 2:3]
+        
+    def ground_truth(self, index):
+        """Kare numarası için bilinen sahne değerleri"""
+        t = self.scene_time(index)
+        board = self.chessboard_corners(t)
+        return {
+            'time': t,
+            'chessboard_corners': board,
+            'chessboard_left': self.project(board, 'left'),
+            'chessboard_right': self.project(board, 'right'),
+            'markers': self.marker_corners(t)
+        }
+        
+    def render_disparity(self, index):
+        """Sol görüntü için gerçek disparite haritası (piksel, float32; boş alanlar 0)"""
+        t = self.scene_time(index)
+        fx = self.camera_matrix[0, 0]
+        K_inv = np.linalg.inv(self.camera_matrix)
+        xs, ys = np.meshgrid(np.arange(self.width), np.arange(self.height))
+        disparity = np.zeros((self.height, self.width), np.float32)
+        
+        for obj in self.objects:
+            R, tvec = obj.pose(t)
+            H = self.camera_matrix @ obj.local_to_camera(R, tvec)
+            mask = cv2.warpPerspective(np.ones(obj.texture.shape[:2], np.uint8), H,
+                                       (self.width, self.height), flags=cv2.INTER_NEAREST)
+            # Düzlem: n·X = d; 1/Z = n·K^-1·x / d, disparite = fx * B / Z
+            normal = R[:, 2]
+            distance = normal @ tvec
+            a = fx * self.baseline / distance * (normal @ K_inv)
+            disparity[mask > 0] = (a[0] * xs + a[1] * ys + a[2])[mask > 0]
+            
+        return disparity
+        
+    def _object(self, name):
+        for obj in self.objects:
+            if obj.name == name:
+                return obj
+        return None
+        
+    def apply_to_calibration(self, calibration):
+        """Bilinen parametreleri bir StereoCalibration nesnesine yükle"""
+        calibration.camera_matrix_left = self.camera_matrix.copy()
+        calibration.camera_matrix_right = self.camera_matrix.copy()
+        calibration.dist_coeffs_left = self.dist_coeffs.reshape(1, -1).copy()
+        calibration.dist_coeffs_right = self.dist_coeffs.reshape(1, -1).copy()
+        calibration.R = self.R.copy()
+        calibration.T = self.T.copy()
+        tx = np.array([[0, -self.T[2, 0], self.T[1, 0]],
+                       [self.T[2, 0], 0, -self.T[0, 0]],
+                       [-self.T[1, 0], self.T[0, 0], 0]])
+        calibration.E = tx @ self.R
+        K_inv = np.linalg.inv(self.camera_matrix)
+        calibration.F = K_inv.T @ calibration.E @ K_inv
+        calibration.img_size = (self.width, self.height)
+        calibration.init_rectification()
+        calibration.calibrated = True
+        return calibration
+
+class SyntheticSource:
+    """Sentetik düzenin tek gözü için OpenCV benzeri grab()/retrieve() arayüzü"""
+    def __init__(self, rig, side):
+        self.rig = rig
+        self.side = side
+        self.frame_index = 0  # Son grab() ile kilitlenen sahne karesi; iki gözde aynı numara aynı sahnedir
+        
+    def isOpened(self):
+        return True
+        
+    def grab(self):
+        index = self.rig.grab(self.side)
+        if index is None:
+            return False
+        self.frame_index = index
+        return True
+        
+    def retrieve(self, image=None):
+        return True, self.rig.render(self.side, self.rig.scene_time(self.frame_index), image)
+        
+    def release(self):
+        pass
\ No newline at end of file
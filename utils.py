@@ -34,12 +34,25 @@ def check_arducam():
     # Doğrudan True döndür
     return True
 
-def get_system_info():
-    """Sistem bilgilerini döndür"""
+def read_temperature():
+    """SoC sıcaklığını (°C) oku, okunamazsa None döndür"""
+    if platform.system() == 'Linux' and os.path.exists('/sys/class/thermal/thermal_zone0/temp'):
+        try:
+            with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
+                return float(f.read().strip()) / 1000
+        except Exception:
+            pass
+    return None
+
+def get_system_info(cpu_interval=0.1):
+    """Sistem bilgilerini döndür
+    
+    cpu_interval=None ise CPU kullanımı bekletmeden son çağrıdan beri ölçülür.
+    """
     info = {}
     
     # CPU kullanımı
-    info['cpu_percent'] = psutil.cpu_percent(interval=0.1)
+    info['cpu_percent'] = psutil.cpu_percent(interval=cpu_interval)
     
     # Bellek kullanımı
     memory = psutil.virtual_memory()
@@ -54,14 +67,7 @@ def get_system_info():
     info['disk_total'] = disk.total / (1024 * 1024 * 1024)  # GB
     
     # Sıcaklık (Raspberry Pi için)
-    info['temperature'] = None
-    if platform.system() == 'Linux' and os.path.exists('/sys/class/thermal/thermal_zone0/temp'):
-        try:
-            with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                temp = float(f.read().strip()) / 1000
-                info['temperature'] = temp
-        except Exception:
-            pass
+    info['temperature'] = read_temperature()
     
     return info
 
@@ -129,10 +135,21 @@ def save_stereo_images(left_image, right_image, left_dir="captures/left", right_
     
     return left_path, right_path
 
+def to_bgr(image):
+    """Tek kanallı görüntüyü çizim için BGR'ye genişlet, renkliyse olduğu gibi döndür"""
+    if image is None or image.ndim == 3:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
 def create_side_by_side(left_image, right_image):
     """Sol ve sağ görüntüleri yan yana birleştir"""
     if left_image is None or right_image is None:
         return None
+        
+    # Biri işaretlenip BGR'ye genişletildiyse diğerini de genişlet
+    if left_image.ndim != right_image.ndim:
+        left_image = to_bgr(left_image)
+        right_image = to_bgr(right_image)
     
     # Görüntülerin boyutlarını kontrol et
     h1, w1 = left_image.shape[:2]
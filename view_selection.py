@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kalibrasyon görünümü seçimi
+Çözüm süresi görünüm sayısıyla büyür, neredeyse aynı pozlar ise bilgi katmaz.
+Görünümler poz çeşitliliği ve görüntü kapsamasına göre açgözlü seçilir,
+görünüm başına yeniden izdüşüm hatası yüksek aykırı görünümler atılır ve
+çözücüler sınırlı bir alt küme üzerinde çalışır.
+"""
+
+import cv2
+import numpy as np
+
+COVERAGE_GRID = (8, 6)  # Kapsama için görüntü ızgarası (sütun, satır)
+
+def board_descriptor(corners, board_size, img_size):
+    """Tahtanın dört dış köşesi, görüntü köşegenine göre normalize
+    
+    Konum, ölçek, dönme ve perspektif eğimi birlikte değişir; iki görünümün
+    tanımlayıcıları arasındaki uzaklık poz farkının ölçüsüdür.
+    """
+    points = np.asarray(corners, dtype=np.float64).reshape(board_size[1], board_size[0], 2)
+    outer = np.array([points[0, 0], points[0, -1], points[-1, -1], points[-1, 0]])
+    return (outer / np.hypot(*img_size)).ravel()
+
+def coverage_cells(corners, img_size, grid=COVERAGE_GRID):
+    """Köşelerin düştüğü ızgara hücrelerinin kümesi"""
+    points = np.asarray(corners, dtype=np.float64).reshape(-1, 2)
+    cx = np.clip((points[:, 0] * grid[0] / img_size[0]).astype(int), 0, grid[0] - 1)
+    cy = np.clip((points[:, 1] * grid[1] / img_size[1]).astype(int), 0, grid[1] - 1)
+    return set((cy * grid[0] + cx).tolist())
+
+def select_diverse(corners_left, corners_right, board_size, img_size, count, candidates=None, coverage_weight=0.5):
+    """Açgözlü en uzak nokta seçimi; seçilen görünüm indekslerini sıralı döndür
+    
+    Her adımda seçilenlere en uzak pozdaki ve iki gözde en çok yeni hücre
+    kapsayan görünüm eklenir. İlk görünüm en geniş kapsamalı olandır.
+    """
+    candidates = list(range(len(corners_left))) if candidates is None else list(candidates)
+    if len(candidates) <= count:
+        return sorted(candidates)
+        
+    descriptors = np.array([np.concatenate((board_descriptor(corners_left[i], board_size, img_size),
+                                            board_descriptor(corners_right[i], board_size, img_size)))
+                            for i in candidates])
+    # Sağ göz hücreleri ayrı numaralanır
+    offset = COVERAGE_GRID[0] * COVERAGE_GRID[1]
+    cells = [coverage_cells(corners_left[i], img_size) | {c + offset for c in coverage_cells(corners_right[i], img_size)}
+             for i in candidates]
+             
+    first = max(range(len(candidates)), key=lambda k: len(cells[k]))
+    selected = [first]
+    covered = set(cells[first])
+    min_distance = np.linalg.norm(descriptors - descriptors[first], axis=1)
+    while len(selected) < count:
+        new_cells = np.array([len(c - covered) for c in cells], dtype=np.float64)
+        score = min_distance / max(min_distance.max(), 1e-12)
+        if new_cells.max() > 0:
+            score = score + coverage_weight * new_cells / new_cells.max()
+        score[selected] = -np.inf
+        best = int(np.argmax(score))
+        selected.append(best)
+        covered |= cells[best]
+        min_distance = np.minimum(min_distance, np.linalg.norm(descriptors - descriptors[best], axis=1))
+    return sorted(candidates[k] for k in selected)
+
+def view_errors(objp, imgpoints, camera_matrix, dist_coeffs):
+    """Her görünümün kendi pozuyla (solvePnP) RMS yeniden izdüşüm hatası (piksel)"""
+    errors = np.empty(len(imgpoints))
+    for i, corners in enumerate(imgpoints):
+        corners = np.asarray(corners, dtype=np.float64).reshape(-1, 2)
+        ok, rvec, tvec = cv2.solvePnP(objp, corners, camera_matrix, dist_coeffs)
+        if not ok:
+            errors[i] = np.inf
+            continue
+        projected, _ = cv2.projectPoints(objp, rvec, tvec, camera_matrix, dist_coeffs)
+        errors[i] = np.sqrt(np.mean(np.sum((projected.reshape(-1, 2) - corners) ** 2, axis=1)))
+    return errors
+
+def find_outliers(errors, factor=3.0):
+    """Hatası medyanın factor katını aşan görünümlerin indeksleri"""
+    finite = errors[np.isfinite(errors)]
+    if finite.size == 0:
+        return []
+    threshold = factor * np.median(finite)
+    return [i for i, error in enumerate(errors) if not error <= threshold]
+
+def rms(errors):
+    """Görünüm başına RMS hatalarından toplam RMS (her görünüm eşit nokta sayılı)"""
+    errors = np.asarray(errors)
+    return float(np.sqrt(np.mean(errors ** 2))) if errors.size else None
\ No newline at end of file